@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compares the token alignment and entity merging of DictionaryTagger with
+the former approach: list.index on lists of token offsets per annotation,
+sorting with cmp_to_key and merging with existing entities through an
+IntervalTree built per document (requires intervaltree).
+
+The speedup of sorting the annotations and of aligning and merging them
+into the documents is reported separately. Synthetic entity-dense abstracts
+are used, every third word a chemical or taxon from the test resources, and
+about a third of the tokens already carry entities of another component,
+so no model is needed.
+
+Usage:
+    python -m benchmarks.dictionary_alignment [--words 200 1000 5000]
+"""
+import argparse
+import random
+import time
+from functools import cmp_to_key
+from typing import List
+
+import spacy
+from intervaltree import IntervalTree
+from spacy.parts_of_speech import NOUN
+from spacy.tokens import Doc, Span
+
+from scicopia_tools.components.ChemTagger import ChemTagger
+from scicopia_tools.components.DictionaryTagger import (
+    Annotation,
+    DictionaryTagger,
+    entity_key,
+)
+from scicopia_tools.components.TaxonTagger import TaxonTagger
+
+CHEMICALS = "scicopia_tools/tests/resources/chemicals.txt"
+TAXA = "scicopia_tools/tests/resources/taxa.tsv"
+FILLER = "the of and in with was were by to a measured samples".split()
+
+
+def entity_sort(entity1: Annotation, entity2: Annotation) -> int:
+    if entity1.start < entity2.start:
+        return -1
+    if entity1.start > entity2.start:
+        return 1
+    return entity2.end - entity1.end
+
+
+def former_retokenize(tagger: DictionaryTagger, doc: Doc, annotations) -> Doc:
+    start = [token.idx for token in doc]
+    end = [token.idx + len(token) for token in doc]
+    spans = []
+    for annotation in annotations:
+        if annotation.start in start and annotation.end in end:
+            s = start.index(annotation.start)
+            e = end.index(annotation.end)
+            if (
+                s == e
+                and annotation.name in tagger.dictionaries[annotation.label].nouns
+                and doc[s].pos != NOUN
+            ):
+                continue
+            span = Span(doc, s, e + 1, label=annotation.label)
+            if annotation.ids:
+                span._.set("id_candidates", annotation.ids)
+            spans.append(span)
+    if spans:
+        tree = IntervalTree()
+        for ent in doc.ents:
+            tree[ent.start : ent.end] = ent
+        for span in spans:
+            tree.remove_overlap(span.start, span.end)
+            tree.addi(span.start, span.end, span)
+        doc.ents = tuple(span for (_, _, span) in tree)
+        with doc.retokenize() as retok:
+            for span in spans:
+                if span.end - span.start > 1:
+                    retok.merge(doc[span.start : span.end])
+    return doc
+
+
+def abstract(entries: List[str], words: int, rng: random.Random) -> str:
+    tokens = []
+    while len(tokens) < words:
+        tokens.extend(rng.sample(FILLER, 2))
+        tokens.append(rng.choice(entries))
+    return " ".join(tokens) + "."
+
+
+def make_docs(nlp, texts: List[str], rng: random.Random) -> List[Doc]:
+    docs = []
+    for text in texts:
+        doc = nlp.make_doc(text)
+        doc.ents = [
+            Span(doc, i, i + 1, label="OTHER")
+            for i in range(0, len(doc), 3)
+            if rng.random() < 0.9
+        ]
+        docs.append(doc)
+    return docs
+
+
+def time_sort(annotations: List[List[Annotation]], key, repeat: int) -> float:
+    elapsed = 0.0
+    for _ in range(repeat):
+        # Matches arrive in order of their end
+        shuffled = [sorted(annos, key=lambda a: a.end) for annos in annotations]
+        start = time.perf_counter()
+        for annos in shuffled:
+            annos.sort(key=key)
+        elapsed += time.perf_counter() - start
+    return elapsed / repeat
+
+
+def time_retokenize(retokenize, tagger, nlp, texts, annotations, repeat: int):
+    elapsed = 0.0
+    for _ in range(repeat):
+        docs = make_docs(nlp, texts, random.Random(0))
+        start = time.perf_counter()
+        results = [
+            retokenize(tagger, doc, annos) for doc, annos in zip(docs, annotations)
+        ]
+        elapsed += time.perf_counter() - start
+    ents = [[(ent.start, ent.end, ent.label_) for ent in doc.ents] for doc in results]
+    return ents, elapsed / repeat
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(
+        description="Benchmark token alignment and entity merging"
+    )
+    PARSER.add_argument(
+        "--words",
+        type=int,
+        nargs="+",
+        default=[200, 1000, 5000],
+        help="Approximate number of words per abstract",
+    )
+    PARSER.add_argument(
+        "--docs", type=int, default=50, help="Number of abstracts per size"
+    )
+    PARSER.add_argument(
+        "--repeat", type=int, default=3, help="Number of runs to average over"
+    )
+    ARGS = PARSER.parse_args()
+
+    nlp = spacy.blank("en")
+    tagger = DictionaryTagger(
+        [ChemTagger.dictionary(CHEMICALS), TaxonTagger.dictionary(TAXA)]
+    )
+    entries = list(tagger.automaton.keys())
+    rng = random.Random(42)
+    print(
+        f"{'words':>6} {'entities':>9} {'sort':>7} {'former s':>9} "
+        f"{'current s':>10} {'speedup':>8}"
+    )
+    for words in ARGS.words:
+        texts = [abstract(entries, words, rng) for _ in range(ARGS.docs)]
+        annotations = [tagger.annotate(text) for text in texts]
+        sort_speedup = time_sort(
+            annotations, cmp_to_key(entity_sort), ARGS.repeat
+        ) / time_sort(annotations, entity_key, ARGS.repeat)
+        reference, former_time = time_retokenize(
+            former_retokenize, tagger, nlp, texts, annotations, ARGS.repeat
+        )
+        results, current_time = time_retokenize(
+            DictionaryTagger.retokenize, tagger, nlp, texts, annotations, ARGS.repeat
+        )
+        assert results == reference, "Entities differ"
+        entities = sum(map(len, annotations)) / len(annotations)
+        print(
+            f"{words:>6} {entities:>9.0f} {sort_speedup:>6.1f}x {former_time:>9.3f} "
+            f"{current_time:>10.3f} {former_time / current_time:>7.1f}x"
+        )
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compares the leftmost-longest scan of DictionaryTagger.annotate with the
+former approach: checking the boundaries of every match of automaton.iter,
+then sorting all annotations and dropping the shorter ones with
+remove_overlap.
+
+Real chemical dictionaries are full of nested names, e.g. "sodium",
+"chloride" and "sodium chloride". Besides the chemicals of the test
+resources, a synthetic dictionary of compound names made of two or three
+of them is used. The texts are dense with dictionary entries, glued
+together and to suffixes, hyphens and plural endings, so that many matches
+are substrings of other matches or fail the boundary rules. The benchmark
+fails if any text is annotated differently.
+
+Usage:
+    python -m benchmarks.dictionary_scan [--docs 2000] [--compounds 20000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+from scicopia_tools.components.ChemTagger import ChemTagger
+from scicopia_tools.components.DictionaryTagger import (
+    Annotation,
+    DictionaryTagger,
+    disambiguate,
+    entity_key,
+    make_dictionary,
+    remove_overlap,
+)
+from scicopia_tools.components.TaxonTagger import TaxonTagger
+
+CHEMICALS = "scicopia_tools/tests/resources/chemicals.txt"
+TAXA = "scicopia_tools/tests/resources/taxa.tsv"
+FILLER = "the of and in with was were by to a measured samples".split()
+JOINERS = [" ", " ", " ", "", "-", "s ", "ic ", ", ", " (", ") ", ". "]
+
+
+def former_annotate(tagger: DictionaryTagger, text: str) -> List[Annotation]:
+    payloads = tagger.payloads
+    annotations = []
+    length = len(text)
+    for end, offset in tagger.automaton.iter(text):
+        end += 1
+        start = end - payloads[offset]
+        if start > 0 and text[start - 1].isalnum():
+            continue
+        exact = length == end or not text[end].isalnum()
+        plural = (
+            not exact
+            and text[end] == "s"
+            and (length == end + 1 or not text[end + 1].isalnum())
+        )
+        position = offset + 2
+        for _ in range(payloads[offset + 1]):
+            index = payloads[position]
+            if exact or plural and index in tagger.plurals:
+                annotations.append(
+                    Annotation(
+                        text[start:end],
+                        tagger.labels[index],
+                        start,
+                        end,
+                        tagger.ids(position + 1),
+                    )
+                )
+                break
+            position += 2 + payloads[position + 1]
+    annotations.sort(key=entity_key)
+    annotations = remove_overlap(annotations)
+    for label, dictionary in tagger.dictionaries.items():
+        if dictionary.disambiguate:
+            annotations = disambiguate(annotations, label)
+    return annotations
+
+
+def dense_text(entries: List[str], words: int, rng: random.Random) -> str:
+    parts = []
+    for _ in range(words):
+        word = rng.choice(entries) if rng.random() < 0.7 else rng.choice(FILLER)
+        parts.append(word)
+        parts.append(rng.choice(JOINERS))
+    return "".join(parts)
+
+
+def compound_names(chemicals: str, size: int, rng: random.Random) -> List[str]:
+    with open(chemicals, "rt") as words:
+        base = [line.strip() for line in words if line.strip()]
+    names = set(base)
+    while len(names) < size:
+        names.add(" ".join(rng.sample(base, rng.choice([2, 2, 3]))))
+    return sorted(names)
+
+
+def run(annotate, tagger: DictionaryTagger, texts: List[str], repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [annotate(tagger, text) for text in texts]
+    return results, (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(
+        description="Benchmark the leftmost-longest dictionary scan"
+    )
+    PARSER.add_argument(
+        "--docs", type=int, default=2000, help="Number of synthetic texts"
+    )
+    PARSER.add_argument(
+        "--words", type=int, default=200, help="Number of words per text"
+    )
+    PARSER.add_argument(
+        "--compounds",
+        type=int,
+        default=20000,
+        help="Size of the synthetic dictionary of compound names",
+    )
+    PARSER.add_argument(
+        "--repeat", type=int, default=3, help="Number of runs to average over"
+    )
+    ARGS = PARSER.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        compounds = os.path.join(tmp, "compounds.txt")
+        with open(compounds, "wt") as names:
+            names.write("\n".join(compound_names(CHEMICALS, ARGS.compounds, rng)))
+        taggers = {
+            "chemicals": DictionaryTagger(
+                [ChemTagger.dictionary(CHEMICALS), TaxonTagger.dictionary(TAXA)]
+            ),
+            "compounds": DictionaryTagger(
+                [
+                    make_dictionary("CHEMICAL", compounds, plural=True),
+                    TaxonTagger.dictionary(TAXA),
+                ]
+            ),
+        }
+    print(
+        f"{'dictionary':<10} {'matches':>8} {'kept':>6} "
+        f"{'former s':>9} {'current s':>10} {'speedup':>8}"
+    )
+    for name, tagger in taggers.items():
+        entries = list(tagger.automaton.keys())
+        texts = [dense_text(entries, ARGS.words, rng) for _ in range(ARGS.docs)]
+        matches = sum(len(list(tagger.automaton.iter(text))) for text in texts)
+        reference, former_time = run(former_annotate, tagger, texts, ARGS.repeat)
+        results, current_time = run(
+            DictionaryTagger.annotate, tagger, texts, ARGS.repeat
+        )
+        # The IDs narrowed down by disambiguate come from a set
+        normalize = lambda annotations: [
+            anno._replace(ids=tuple(sorted(anno.ids))) for anno in annotations
+        ]
+        assert list(map(normalize, results)) == list(
+            map(normalize, reference)
+        ), "Annotations differ"
+        kept = sum(map(len, results)) / matches
+        print(
+            f"{name:<10} {matches:>8} {kept:>6.0%} {former_time:>9.3f} "
+            f"{current_time:>10.3f} {former_time / current_time:>7.2f}x"
+        )
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compares the phrase matching of Hearst with the former approach of
+building a networkx graph per sentence and running a shortest path search
+for every pair of noun chunks. Only the "such as" pattern is compiled, as
+the networkx approach knew no other.
+
+A synthetic parsed sentence is used, so no model is needed: a chain of
+clauses "the compound_i nouns such as x_i and y_i ," attached to each other.
+
+Usage:
+    python -m benchmarks.hearst_paths [--clauses 5 20 50 100]
+"""
+import argparse
+import itertools
+import time
+from typing import List
+
+import networkx as nx
+from spacy.tokens import Doc
+
+from scicopia_tools.analyzers.Hearst import Hearst
+
+
+def synthetic_doc(vocab, clauses: int) -> Doc:
+    words = []
+    heads = []
+    deps = []
+    pos = []
+    previous = None
+    for i in range(clauses):
+        base = len(words)
+        noun = base + 2
+        words += ["the", f"compound{i}", "nouns", "such", "as", f"x{i}", "and", f"y{i}", ","]
+        heads += [noun, noun, noun, base + 4, noun, base + 4, base + 5, base + 5, noun]
+        deps += ["det", "compound", "ROOT", "amod", "prep", "pobj", "cc", "conj", "punct"]
+        pos += ["DET", "NOUN", "NOUN", "ADJ", "ADP", "NOUN", "CCONJ", "NOUN", "PUNCT"]
+        if previous is not None:
+            heads[noun] = previous
+            deps[noun] = "appos"
+        previous = noun
+    sent_starts = [True] + [False] * (len(words) - 1)
+    return Doc(
+        vocab, words=words, heads=heads, deps=deps, pos=pos, sent_starts=sent_starts
+    )
+
+
+def networkx_extract(hearst: Hearst, doc: Doc) -> List:
+    hits = []
+    for sent in doc.sents:
+        edges = []
+        for token in sent:
+            for child in token.children:
+                edges.append((token.i, child.i))
+        graph = nx.Graph(edges)
+        candidates = hearst.conflate_conjuncts(list(sent.noun_chunks))
+        for source, target in itertools.combinations(candidates, 2):
+            try:
+                path = nx.shortest_path(
+                    graph, source=source[0].root.i, target=target[0].root.i
+                )
+            except nx.NetworkXNoPath:
+                continue
+            if (
+                len(path) == 3
+                and doc[path[1]].text == "as"
+                and doc[path[1] - 1].text == "such"
+            ):
+                span1 = source[0]
+                if doc[span1.start].pos_ in ("DET", "PUNCT"):
+                    span1 = doc[span1.start + 1 : span1.end]
+                for span2 in target:
+                    if doc[span2.start].pos_ == "DET":
+                        span2 = doc[span2.start + 1 : span2.end]
+                    hits.append((span1.text, "such as", span2.text))
+    return hits
+
+
+def best_of(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description="Benchmark the Hearst pattern matching")
+    PARSER.add_argument(
+        "--clauses",
+        type=int,
+        nargs="+",
+        default=[5, 20, 50, 100],
+        help="Sentence lengths in clauses of nine tokens",
+    )
+    PARSER.add_argument("--repeat", type=int, default=5)
+    ARGS = PARSER.parse_args()
+
+    hearst = Hearst("blank:en", patterns=["such as"])
+    print(f"{'tokens':>7} {'chunks':>7} {'networkx s':>11} {'matcher s':>9} {'speedup':>8}")
+    for clauses in ARGS.clauses:
+        doc = synthetic_doc(hearst.nlp.vocab, clauses)
+        expected = networkx_extract(hearst, doc)
+        assert hearst.extract(doc) == expected, "Results differ"
+        old = best_of(lambda: networkx_extract(hearst, doc), ARGS.repeat)
+        new = best_of(lambda: hearst.extract(doc), ARGS.repeat)
+        chunks = len(list(doc.noun_chunks))
+        print(f"{len(doc):>7} {chunks:>7} {old:>11.4f} {new:>9.4f} {old / new:>7.1f}x")
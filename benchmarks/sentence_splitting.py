@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compares the sentence splitter backends of TextSplitter.
+
+The output of the "senter" backend serves as the reference. For every other
+backend, the precision, recall and F1 score of the sentence boundaries, the
+share of documents split exactly like the reference, the time needed to
+load the backend and the speedup of splitting are reported.
+
+Usage:
+    python -m benchmarks.sentence_splitting [--model en_core_web_lg] [FILE ...]
+
+Files are either JSON documents or JSON lines with an "abstract" field.
+"""
+import argparse
+import json
+import time
+from typing import Iterable, List, Set, Tuple
+
+from scicopia_tools.analyzers.TextSplitter import BACKENDS, TextSplitter
+
+DEFAULT_DATA = ["scicopia_tools/tests/data/arxiv.json"]
+
+
+def read_abstracts(files: Iterable[str]) -> List[str]:
+    abstracts = []
+    for filename in files:
+        with open(filename, "rt", encoding="utf-8") as data:
+            content = data.read()
+        try:
+            docs = [json.loads(content)]
+        except json.JSONDecodeError:
+            docs = [json.loads(line) for line in content.splitlines() if line.strip()]
+        abstracts.extend(doc["abstract"] for doc in docs if doc.get("abstract"))
+    return abstracts
+
+
+def boundaries(sentences: List[Tuple[int, int]]) -> Set[int]:
+    # The end of the last sentence is the end of the text and no decision
+    return {start for start, _ in sentences[1:]}
+
+
+def run(splitter: TextSplitter, abstracts: List[str], repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [
+            result[TextSplitter.field] for result in splitter.process_batch(abstracts)
+        ]
+    return results, (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description="Benchmark the sentence splitters")
+    PARSER.add_argument(
+        "files",
+        nargs="*",
+        default=DEFAULT_DATA,
+        help="JSON or JSON lines files with abstracts",
+    )
+    PARSER.add_argument(
+        "--model", default="en_core_web_lg", help="spaCy model of the senter backend"
+    )
+    PARSER.add_argument(
+        "--repeat", type=int, default=5, help="Number of runs to average over"
+    )
+    ARGS = PARSER.parse_args()
+
+    abstracts = read_abstracts(ARGS.files)
+    print(f"{len(abstracts)} abstracts, {sum(map(len, abstracts))} characters")
+    timings = {}
+    reference = None
+    print(
+        f"{'backend':<12} {'load s':>8} {'split s':>8} {'speedup':>8} "
+        f"{'P':>6} {'R':>6} {'F1':>6} {'exact':>6}"
+    )
+    for backend in BACKENDS:
+        start = time.perf_counter()
+        splitter = TextSplitter(ARGS.model, backend=backend)
+        load = time.perf_counter() - start
+        results, split = run(splitter, abstracts, ARGS.repeat)
+        timings[backend] = load, split
+        if reference is None:
+            reference = results
+        found = correct = expected = exact = 0
+        for predicted, gold in zip(results, reference):
+            predicted_boundaries = boundaries(predicted)
+            gold_boundaries = boundaries(gold)
+            found += len(predicted_boundaries)
+            expected += len(gold_boundaries)
+            correct += len(predicted_boundaries & gold_boundaries)
+            exact += predicted == gold
+        precision = correct / found if found else 1.0
+        recall = correct / expected if expected else 1.0
+        f1 = (
+            2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        )
+        speedup = timings["senter"][1] / split if split else float("inf")
+        print(
+            f"{backend:<12} {load:>8.3f} {split:>8.4f} {speedup:>7.1f}x "
+            f"{precision:>6.3f} {recall:>6.3f} {f1:>6.3f} {exact / len(abstracts):>6.1%}"
+        )
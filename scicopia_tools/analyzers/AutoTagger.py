@@ -7,24 +7,35 @@ Created on Tue Feb 11 13:44:30 2020
 """
 from scicopia_tools.analyzers import Analyzer
 import string
+from typing import Any, Dict, Iterable, Iterator, Union
 
-import pke
 import spacy
 from nltk.corpus import stopwords
+from spacy.tokens import Doc
+
+from scicopia_tools.analyzers.multipartite import multipartite_rank
 
 
 class AutoTagger(Analyzer):
     field = "tags"
     doc_section = "abstract"
+    languages = ("en",)
 
-    def __init__(self, model: str = "en_core_web_lg"):
+    def __init__(
+        self, model: str = "en_core_web_lg", batch_size: int = 64, engine: str = "native"
+    ):
         """
-        Loads a spaCy model to be used with pke.
+        Loads a spaCy model to be used for keyphrase extraction.
 
         Parameters
         ----------
         model : str
             The name of a spaCy model, e.g. "en_core_web_lg".
+        batch_size : int
+            Number of texts parsed together by process_batch, by default 64.
+        engine : str
+            "native" for the built-in MultipartiteRank implementation or
+            "pke" for the one of pke, by default "native".
 
         Returns
         -------
@@ -34,11 +45,25 @@ class AutoTagger(Analyzer):
         super().__init__()
         self.nlp = spacy.load(model, exclude=["ner", "textcat", "parser"])
         self.nlp.enable_pipe("senter")
+        self.batch_size = batch_size
+        # Candidate filters are the same for every document
+        self.pos = {"NOUN", "PROPN", "ADJ"}
+        self.stoplist = list(string.punctuation)
+        self.stoplist += ["-lrb-", "-rrb-", "-lcb-", "-rcb-", "-lsb-", "-rsb-"]
+        self.stoplist += stopwords.words("english")
+        self.stopwords = frozenset(self.stoplist)
+        if engine == "pke":
+            import pke
+
+            self.pke = pke
+        elif engine != "native":
+            raise ValueError(f"Unknown keyphrase engine: {engine}")
+        self.engine = engine
 
     def process(self, text: str):
         """
-        Performs MultipartiteRank keyphrase extraction via pke
-        (Python Keyphrase Extraction toolkit).
+        Performs MultipartiteRank keyphrase extraction, either with the
+        built-in implementation or via pke (Python Keyphrase Extraction toolkit).
         Details are given in https://arxiv.org/abs/1803.0872 and
         https://boudinfl.github.io/pke/build/html/unsupervised.html#multipartiterank
 
@@ -53,15 +78,46 @@ class AutoTagger(Analyzer):
             "tags": List of keyphrases.
 
         """
+        return self.extract(text)
+
+    def process_batch(self, texts: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Performs keyphrase extraction on several texts.
+        With the native engine, the texts are parsed in batches with
+        nlp.pipe and the parsed documents are handed to the engine.
+        pke only accepts raw text and parses it itself, so with pke
+        the texts are processed one by one.
+
+        Parameters
+        ----------
+        texts : Iterable[str]
+            Texts to extract keyphrases from.
+
+        Yields
+        -------
+        dict
+            "tags": List of keyphrases, in the order of the texts.
+
+        """
+        if self.engine == "pke":
+            for text in texts:
+                yield self.extract(text)
+            return
+        for doc in self.nlp.pipe(texts, batch_size=self.batch_size):
+            yield self.extract(doc)
+
+    def extract(self, text: Union[str, Doc]) -> Dict[str, Any]:
+        if self.engine == "native":
+            doc = text if isinstance(text, Doc) else self.nlp(text)
+            keyphrases = multipartite_rank(
+                doc, self.pos, self.stopwords, n=10, alpha=1.1, threshold=0.74
+            )
+            return {AutoTagger.field: [key[0] for key in keyphrases]}
         # Use a new MultiPartiteRank every time.
         # Trying to reuse one leads to a ZeroDivisionError: float division by zero
-        extractor = pke.unsupervised.MultipartiteRank()
+        extractor = self.pke.unsupervised.MultipartiteRank()
         extractor.load_document(input=text, encoding="utf-8", spacy_model=self.nlp)
-        pos = {"NOUN", "PROPN", "ADJ"}
-        stoplist = list(string.punctuation)
-        stoplist += ["-lrb-", "-rrb-", "-lcb-", "-rcb-", "-lsb-", "-rsb-"]
-        stoplist += stopwords.words("english")
-        extractor.candidate_selection(pos=pos, stoplist=stoplist)
+        extractor.candidate_selection(pos=self.pos, stoplist=self.stoplist)
         extractor.candidate_weighting(alpha=1.1, threshold=0.74, method="average")
         keyphrases = extractor.get_n_best(n=10)
         return {AutoTagger.field: [key[0] for key in keyphrases]}
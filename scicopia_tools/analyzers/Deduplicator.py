@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 18:52:36 2026
+
+@author: tech
+"""
+import logging
+import os
+import pickle
+import tempfile
+from os.path import exists
+from typing import Dict
+
+from scicopia_tools.analyzers import Analyzer
+from scicopia_tools.analyzers.minhash import (
+    LSHIndex,
+    MinHasher,
+    shingles,
+    similarity,
+)
+
+logger = logging.getLogger("scicopia_tools.analyzers.Deduplicator")
+
+
+class Deduplicator(Analyzer):
+    """
+    Finds near-identical abstracts, e.g. of a preprint and its published
+    version. Every document points to its canonical version, which is the
+    first one of a group of near-duplicates that has been seen.
+    Canonical documents point to themselves.
+
+    The index of canonical documents is kept in memory and stored in a file,
+    so that later imports are compared to all documents seen before. New
+    canonical documents are appended to a journal at every checkpoint, i.e.
+    before each batch is saved, so that the index never lags behind the
+    database. As it is shared state, documents have to be processed by
+    a single process.
+    """
+
+    field = "duplicate_of"
+    doc_section = "abstract"
+    # process gets the key of the document in addition to its text
+    keyed = True
+    sequential = True
+
+    def __init__(
+        self,
+        index: str = "minhash.pkl",
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 8,
+        seed: int = 1,
+    ):
+        """
+        Loads the index of canonical documents, if it exists.
+
+        Parameters
+        ----------
+        index : str, optional
+            Where the index is stored, by default "minhash.pkl"
+        threshold : float, optional
+            The estimated Jaccard similarity of the shingles above which
+            two documents are near-duplicates, by default 0.8
+        num_perm : int, optional
+            The length of the MinHash signatures, by default 128
+        bands : int, optional
+            The number of LSH bands, by default 16
+        shingle_size : int, optional
+            Length of the shingles in bytes, by default 8
+        seed : int, optional
+            Seed of the hash functions, by default 1
+
+        Raises
+        ------
+        ValueError
+            If the stored index has been built with other settings
+        """
+        super().__init__()
+        self.path = index
+        self.journal = f"{index}.journal"
+        # Canonical documents added since the last checkpoint
+        self.inserted = []
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.settings = (num_perm, bands, shingle_size, seed)
+        self.hasher = MinHasher(num_perm, seed)
+        if exists(index):
+            with open(index, "rb") as index_file:
+                settings, self.index = pickle.load(index_file)
+            if settings != self.settings:
+                raise ValueError(
+                    f"The index in {index} has been built with different settings: {settings}"
+                )
+            logger.info("Loaded %d canonical documents from %s", len(self.index), index)
+        else:
+            self.index = LSHIndex(num_perm, bands)
+        self.journaled = self.replay()
+        if self.journaled:
+            logger.info(
+                "Replayed %d canonical documents from %s", self.journaled, self.journal
+            )
+
+    def process(self, text: str, key: str) -> Dict[str, str]:
+        """
+        Looks up a document in the index and adds it as a canonical
+        document, if there is no near-duplicate.
+
+        Parameters
+        ----------
+        text : str
+            The text of the document
+        key : str
+            The key of the document
+
+        Returns
+        -------
+        Dict[str, str]
+            A field 'duplicate_of' with the key of the canonical document
+        """
+        if key in self.index:
+            return {Deduplicator.field: key}
+        signature = self.hasher.signature(shingles(text, self.shingle_size))
+        best, score = None, 0.0
+        for candidate in self.index.query(signature):
+            estimate = similarity(signature, self.index.signatures[candidate])
+            if estimate > score:
+                best, score = candidate, estimate
+        if best is not None and score >= self.threshold:
+            return {Deduplicator.field: best}
+        self.index.insert(key, signature)
+        self.inserted.append((key, signature))
+        return {Deduplicator.field: key}
+
+    def replay(self) -> int:
+        """
+        Adds the documents of the journal to the index. An incomplete
+        record at the end, left by a crash, is cut off.
+
+        Returns
+        -------
+        int
+            The number of records in the journal
+        """
+        if not exists(self.journal):
+            return 0
+        records = 0
+        with open(self.journal, "r+b") as journal:
+            end = 0
+            while True:
+                try:
+                    key, signature = pickle.load(journal)
+                except EOFError:
+                    break
+                except (pickle.UnpicklingError, ValueError) as e:
+                    logger.warning("Cutting off the end of %s: %s", self.journal, e)
+                    break
+                end = journal.tell()
+                records += 1
+                # Already in the index, if a crash interrupted compact
+                if key not in self.index:
+                    self.index.insert(key, signature)
+            journal.truncate(end)
+        return records
+
+    def checkpoint(self):
+        """
+        Appends the canonical documents found since the last checkpoint
+        to the journal. Once the journal holds more than a quarter of the
+        index, the whole index is written instead.
+        """
+        if self.inserted:
+            with open(self.journal, "ab") as journal:
+                for record in self.inserted:
+                    pickle.dump(record, journal, protocol=pickle.HIGHEST_PROTOCOL)
+                journal.flush()
+                os.fsync(journal.fileno())
+            self.journaled += len(self.inserted)
+            self.inserted.clear()
+        if 4 * self.journaled > len(self.index):
+            self.compact()
+
+    def compact(self):
+        """
+        Writes the whole index and starts a new journal.
+        """
+        directory = os.path.dirname(self.path) or "."
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as index_file:
+                pickle.dump(
+                    (self.settings, self.index),
+                    index_file,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        if exists(self.journal):
+            os.remove(self.journal)
+        self.journaled = 0
+
+    def release_resources(self):
+        self.checkpoint()
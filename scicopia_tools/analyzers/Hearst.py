@@ -6,21 +6,149 @@ Created on Wed Jan 15 13:55:23 2020
 @author: kampe
 """
 
-import itertools
-import logging
+from bisect import bisect_right
+from collections import namedtuple
 from functools import cmp_to_key
-from typing import List, Tuple
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
-import networkx as nx
 import spacy
+from ahocorasick import Automaton
+from spacy.matcher import Matcher
+from spacy.tokens import Doc, Token
 from spacy.tokens.span import Span
 
+from scicopia_tools.analyzers.sentences import split_sentences
+
+# A relation signalled by one of the phrases, e.g. "such as". The relation
+# function finds the hypernym and the hyponyms around the matched phrase in
+# the dependency tree, or returns None if the parse does not fit.
+HearstPattern = namedtuple("HearstPattern", ["name", "phrases", "relation"])
+
+Relation = Optional[Tuple[Token, List[Token]]]
+
+
+def prepositional(phrase: Span) -> Relation:
+    """
+    X such as Y, X including Y: Y is attached
+    to the preposition, which is attached to X.
+    """
+    trigger = phrase[-1]
+    if trigger.head.i == trigger.i:
+        return None
+    return trigger.head, [child for child in trigger.children if child.i > trigger.i]
+
+
+def and_other(phrase: Span) -> Relation:
+    """
+    Y and other X: X is a conjunct of Y.
+    """
+    hypernym = phrase[-1].head
+    if hypernym.dep_ != "conj" or hypernym.head.i > phrase.start:
+        return None
+    return hypernym, [hypernym.head]
+
+
+def especially(phrase: Span) -> Relation:
+    """
+    X, especially Y: "especially" modifies Y, which is attached to X.
+    """
+    hyponym = phrase[0].head
+    hypernym = hyponym.head
+    if hypernym.i == hyponym.i or hypernym.i > phrase.start:
+        return None
+    return hypernym, [hyponym]
+
+
+def copula(phrase: Span) -> Relation:
+    """
+    Y is a X: X is the attribute and Y the subject of "is".
+    """
+    verb = phrase[0]
+    hypernym = phrase[-1].head
+    if hypernym.dep_ != "attr" or hypernym.head.i != verb.i:
+        return None
+    return hypernym, [
+        child for child in verb.children if child.dep_ in ("nsubj", "nsubjpass")
+    ]
+
+
+PATTERNS = (
+    HearstPattern("such as", ("such as",), prepositional),
+    HearstPattern("including", ("including",), prepositional),
+    HearstPattern("and other", ("and other", "or other"), and_other),
+    HearstPattern("especially", ("especially",), especially),
+    HearstPattern("is a", ("is a", "is an", "was a", "was an"), copula),
+)
+
+
+def trigger_automaton(triggers: Sequence[str]) -> Automaton:
+    """
+    An automaton of the lowercased trigger phrases, to be run on
+    lowercased text, as the Matcher compares the LOWER attribute.
+    The values are the lengths of the phrases.
+    """
+    automaton = Automaton()
+    for trigger in triggers:
+        automaton.add_word(trigger.lower(), len(trigger))
+    automaton.make_automaton()
+    return automaton
+
+
+def lowercase(text: str) -> str:
+    """
+    Lowercases a text, keeping the offsets of all characters.
+    The few characters that become longer, e.g. "İ", are kept as they are.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(
+        char if len(lower) != 1 else lower
+        for char, lower in zip(text, map(str.lower, text))
+    )
+
+
+def select_patterns(names: Iterable[str] = None) -> List[HearstPattern]:
+    """
+    The patterns with the given names, all of them by default.
+
+    Raises
+    ------
+    ValueError
+        If a name is unknown
+    """
+    if names is None:
+        return list(PATTERNS)
+    by_name = {pattern.name: pattern for pattern in PATTERNS}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown Hearst patterns: {', '.join(unknown)}")
+    return [by_name[name] for name in names]
+
 
 class Hearst:
     field = "hearst"
     doc_section = "abstract"
+    version = 3
+    languages = ("en",)
 
-    def __init__(self, model: str = "en_core_web_lg", extra=[]):
+    def __init__(
+        self,
+        model: str = "en_core_web_lg",
+        extra=[],
+        prefilter: bool = True,
+        context: int = 0,
+        patterns: List[str] = None,
+    ):
         """
         Loads a spaCy model.
 
@@ -28,6 +156,18 @@ class Hearst:
         ----------
         model : str
             The name of a spaCy model, e.g. "en_core_web_lg".
+        extra : list
+            Additional pipeline components, given as dicts
+            with the keys "component" and "config".
+        prefilter : bool
+            Only parse the sentences that contain a trigger phrase,
+            e.g. "such as". Texts without one are not parsed at all.
+        context : int
+            The number of sentences before and after a trigger
+            sentence that are parsed as well.
+        patterns : List[str]
+            The names of the patterns to extract, e.g. ["such as"],
+            by default all of PATTERNS.
 
         Returns
         -------
@@ -40,6 +180,23 @@ class Hearst:
                 self.nlp.add_pipe(add_me["component"], config=add_me["config"])
 
         self.IntervalKey = cmp_to_key(self.interval_sort)
+        self.patterns = select_patterns(patterns)
+        # The phrases of all patterns are compiled once and found in a
+        # single pass, the relations are then checked from there on
+        self.matcher = Matcher(self.nlp.vocab)
+        self.relations = {}
+        for pattern in self.patterns:
+            self.matcher.add(
+                pattern.name,
+                [
+                    [{"LOWER": word} for word in phrase.split()]
+                    for phrase in pattern.phrases
+                ],
+            )
+            self.relations[self.nlp.vocab.strings[pattern.name]] = pattern
+        phrases = [phrase for pattern in self.patterns for phrase in pattern.phrases]
+        self.triggers = trigger_automaton(phrases) if prefilter else None
+        self.context = context
 
     def interval_sort(self, entity1, entity2) -> int:
         if entity1[0] < entity2[0]:
@@ -95,49 +252,137 @@ class Hearst:
             A list of 3-tuples stating hyponymy relations, e.g. [('X', 'such as', 'Y')].
 
         """
-        doc = self.nlp(text)
-        hits = []
+        return next(self.process_batch([text]))
+
+    def process_batch(
+        self, texts: Iterable[str]
+    ) -> Iterator[Dict[str, List[Tuple[str]]]]:
+        """
+        Extracts the relations of a whole batch, parsing all windows
+        of all texts in a single nlp.pipe call.
+        """
+        texts = list(texts)
+        if self.triggers is None:
+            for doc in self.nlp.pipe(texts):
+                yield {Hearst.field: self.extract(doc)}
+            return
+        owners = []
+        parts = []
+        for i, text in enumerate(texts):
+            for start, end in self.windows(text):
+                owners.append(i)
+                parts.append(text[start:end])
+        hits = [[] for _ in texts]
+        if parts:
+            for owner, doc in zip(owners, self.nlp.pipe(parts)):
+                hits[owner].extend(self.extract(doc))
+        for relations in hits:
+            yield {Hearst.field: relations}
+
+    def windows(self, text: str) -> List[Tuple[int, int]]:
+        """
+        The parts of a text that have to be parsed: the sentences
+        containing a trigger phrase and their context.
 
+        Parameters
+        ----------
+        text : str
+            Raw text.
+
+        Returns
+        -------
+        List[Tuple[int, int]]
+            Non-overlapping start and end offsets in ascending order,
+            an empty list if there is no trigger.
+
+        """
+        positions = []
+        last = len(text) - 1
+        for end, length in self.triggers.iter(lowercase(text)):
+            start = end - length + 1
+            # Only whole words, not e.g. "is a" in "this approach"
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < last and text[end + 1].isalnum():
+                continue
+            positions.append(end)
+        if not positions:
+            return []
+        sentences = split_sentences(text)
+        starts = [start for start, _ in sentences]
+        windows = []
+        for position in positions:
+            i = bisect_right(starts, position) - 1
+            first = max(i - self.context, 0)
+            last = min(i + self.context, len(sentences) - 1)
+            if windows and first <= windows[-1][1] + 1:
+                # Overlapping or adjacent
+                windows[-1][1] = max(windows[-1][1], last)
+            else:
+                windows.append([first, last])
+        return [(sentences[first][0], sentences[last][1]) for first, last in windows]
+
+    def extract(self, doc: Doc) -> List[Tuple[str]]:
+        """
+        Finds pairs of noun chunks matching one of the patterns.
+        Conjoined hyponyms, e.g. "X such as Y and Z", yield a relation each.
+
+        Parameters
+        ----------
+        doc : Doc
+            A parsed document.
+
+        Returns
+        -------
+        List[Tuple[str]]
+            A list of 3-tuples (hypernym, pattern, hyponym),
+            in the order of the hypernyms in the text.
+
+        """
+        matches = self.matcher(doc)
+        if not matches:
+            return []
+        chunks = {}
+        groups = {}
         for sent in doc.sents:
-            edges = []
-            for token in sent:
-                for child in token.children:
-                    edges.append((token.i, child.i))
-
-            graph = nx.Graph(edges)
-            candidates = list(sent.noun_chunks)
-            candidates = self.conflate_conjuncts(candidates)
-            print(f"candidates: {candidates}")
-
-            for source, target in itertools.combinations(candidates, 2):
-                source_root = source[0].root.i
-                target_root = target[0].root.i
-                logging.debug("%d->%d:", source[0].root.i, target[0].root.i)
-                try:
-                    path = nx.shortest_path(
-                        graph, source=source_root, target=target_root
-                    )
-                    logging.debug([doc[x].text for x in path])
-                    if (
-                        len(path) == 3
-                        and doc[path[1]].text == "as"
-                        and doc[path[1] - 1].text == "such"
-                    ):
-                        span1 = source[0]
-                        if (
-                            doc[span1.start].pos_ == "DET"
-                            or doc[span1.start].pos_ == "PUNCT"
-                        ):
-                            span1 = Span(doc, span1.start + 1, span1.end)
-                        for t in target:
-                            span2 = t
-                            if doc[span2.start].pos_ == "DET":
-                                span2 = Span(doc, span2.start + 1, span2.end)
-                            hits.append((span1.text, "such as", span2.text))
-                except nx.NetworkXNoPath:
-                    pass
-        print(hits)
-        return {Hearst.field: hits}
+            for group in self.conflate_conjuncts(list(sent.noun_chunks)):
+                for chunk in group:
+                    chunks[chunk.root.i] = chunk
+                    groups[chunk.root.i] = group
+        relations = []
+        for match_id, start, end in matches:
+            pattern = self.relations[match_id]
+            relation = pattern.relation(doc[start:end])
+            if relation is None or relation[0].i not in chunks:
+                continue
+            hypernym = relation[0].i
+            matched = set(range(start, end))
+            for hyponym in relation[1]:
+                if hyponym.i in groups:
+                    relations.append((hypernym, hyponym.i, pattern.name, matched))
+        relations.sort(key=lambda relation: relation[:2])
+        hits = []
+        for hypernym, hyponym, name, matched in relations:
+            span1 = self.trim(chunks[hypernym], matched, ("DET", "PUNCT"))
+            for t in groups[hyponym]:
+                if t.root.i == hypernym:
+                    continue
+                span2 = self.trim(t, matched, ("DET",))
+                hit = (span1.text, name, span2.text)
+                if hit not in hits:
+                    hits.append(hit)
+        return hits
+
+    @staticmethod
+    def trim(span: Span, matched: Set[int], pos: Tuple[str]) -> Span:
+        """
+        Removes a leading token if it has one of the given parts of speech
+        or is part of the pattern, like "other" in "and other X".
+        """
+        first = span[0]
+        if first.i != span.root.i and (first.pos_ in pos or first.i in matched):
+            return Span(span.doc, span.start + 1, span.end)
+        return span
 
     def release_resources(self):
         del self.nlp
@@ -5,11 +5,17 @@ Created on Tue May 26 17:26:07 2020
 
 @author: tech
 """
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import pycld2 as cld2
 
 from scicopia_tools.analyzers import Analyzer
-from typing import Dict
+from scicopia_tools.db.parallel import DocTransformer
 
-import pycld2 as cld2
+logger = logging.getLogger("scicopia_tools.analyzers.LangDetect")
 
 
 class LangDetect(Analyzer):
@@ -18,16 +24,31 @@ class LangDetect(Analyzer):
     """
 
     field = "language"
-    doc_section = "abstract"
+    doc_section = ["title", "abstract"]
 
-    def __init__(self, model=None):
+    def __init__(
+        self,
+        model=None,
+        prefix_bytes: Optional[int] = None,
+        threads: int = 0,
+        min_chars: int = 200,
+    ):
         """
-        No initialization needed.
+        No model has to be loaded.
 
         Parameters
         ----------
         model : Optional[str]
             Only needed for compatibility with the other analyzers.
+        prefix_bytes : Optional[int]
+            Only detect the language on the first bytes of a text,
+            by default the whole text is used.
+        threads : int
+            Detect the languages of a batch on a thread pool of this size,
+            by default 0, i.e. in the calling thread.
+        min_chars : int
+            The title is used as well, if the abstract is shorter than this,
+            by default 200.
 
         Returns
         -------
@@ -35,15 +56,50 @@ class LangDetect(Analyzer):
 
         """
         super().__init__()
+        self.prefix_bytes = prefix_bytes
+        self.min_chars = min_chars
+        self.threads = threads
+        self.executor = ThreadPoolExecutor(threads) if threads > 1 else None
 
-    def process(self, text: str) -> Dict[str, str]:
+    def text(self, section: Union[str, Dict[str, Any]]) -> str:
+        """
+        The text to detect the language on: the abstract, preceded by
+        the title if the abstract is short. Long texts are cut after
+        prefix_bytes bytes.
+        """
+        if isinstance(section, dict):
+            abstract = section.get("abstract") or ""
+            title = section.get("title") or ""
+            if title and len(abstract) < self.min_chars:
+                text = f"{title}\n{abstract}" if abstract else title
+            else:
+                text = abstract
+        else:
+            text = section
+        if self.prefix_bytes is not None and len(text) > self.prefix_bytes // 4:
+            # Cutting within a multi-byte character leaves an invalid tail
+            text = text.encode("utf-8")[: self.prefix_bytes].decode("utf-8", "ignore")
+        return text
+
+    def detect(self, section: Union[str, Dict[str, Any]]) -> str:
+        try:
+            isReliable, _, details = cld2.detect(self.text(section))
+        except (cld2.error, UnicodeEncodeError) as e:
+            logger.debug("Language detection failed: %s", e)
+            return "unk"
+        return details[0][1] if isReliable else "unk"  # ISO 639-1 Code
+
+    def detect_all(self, sections: List[Union[str, Dict[str, Any]]]) -> List[str]:
+        return [self.detect(section) for section in sections]
+
+    def process(self, text: Union[str, Dict[str, Any]]) -> Dict[str, str]:
         """
         Detects the language of a text using Compact Langauge Detect 2.
 
         Parameters
         ----------
-        doc : str
-            DESCRIPTION.
+        text : Union[str, Dict[str, Any]]
+            A text or a document with the fields 'title' and 'abstract'.
 
         Returns
         -------
@@ -52,10 +108,74 @@ class LangDetect(Analyzer):
             if the language could be reliably detected and 'unk' otherwise.
 
         """
-        isReliable, _, details = cld2.detect(text)
-        return {
-            LangDetect.field: details[0][1] if isReliable else "unk"
-        }  # ISO 639-1 Code
+        return {LangDetect.field: self.detect(text)}
+
+    def process_batch(
+        self, texts: Iterable[Union[str, Dict[str, Any]]]
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Detects the languages of a whole batch, split into one chunk
+        per thread if there is a thread pool.
+        """
+        texts = list(texts)
+        if self.executor is None or len(texts) < 2 * self.threads:
+            languages = self.detect_all(texts)
+        else:
+            size = -(-len(texts) // self.threads)
+            chunks = [texts[i : i + size] for i in range(0, len(texts), size)]
+            languages = [
+                language
+                for chunk in self.executor.map(self.detect_all, chunks)
+                for language in chunk
+            ]
+        for language in languages:
+            yield {LangDetect.field: language}
 
     def release_resources(self):
-        pass
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(
+        description="Detect the language of all documents in the Arango database"
+    )
+    PARSER.add_argument(
+        "--batch",
+        type=int,
+        help="Number of documents fetched, detected and saved at once",
+        default=10000,
+    )
+    PARSER.add_argument(
+        "--threads",
+        metavar="N",
+        type=int,
+        default=0,
+        help="Detect the languages of a batch on N threads",
+    )
+    PARSER.add_argument(
+        "--prefix-bytes",
+        metavar="N",
+        type=int,
+        help="Only use the first N bytes of a text",
+    )
+    PARSER.add_argument(
+        "--min-chars",
+        metavar="N",
+        type=int,
+        default=200,
+        help="Use the title as well for abstracts shorter than N characters",
+    )
+    ARGS = PARSER.parse_args()
+    # A single process without dask, the detection is far
+    # cheaper than the transfer of the documents to workers
+    transformer = DocTransformer(
+        LangDetect.field,
+        LangDetect,
+        {
+            "prefix_bytes": ARGS.prefix_bytes,
+            "threads": ARGS.threads,
+            "min_chars": ARGS.min_chars,
+        },
+    )
+    transformer.main(ARGS.batch)
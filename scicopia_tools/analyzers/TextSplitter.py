@@ -5,22 +5,53 @@ Created on Tue Feb 11 13:44:30 2020
 
 @author: tech
 """
-from scicopia_tools.analyzers import Analyzer
+from typing import Any, Dict, Iterable, Iterator
+
 import spacy
 
+from scicopia_tools.analyzers import Analyzer
+from scicopia_tools.analyzers.offsets import ENCODINGS, encode_offsets
+from scicopia_tools.analyzers.sentences import split_sentences
+
+BACKENDS = ("senter", "sentencizer", "regex")
+
 
 class TextSplitter(Analyzer):
     field = "abstract_offsets"
     doc_section = "abstract"
+    # Results refer to character offsets and
+    # cannot be copied between near-duplicates
+    positional = True
+    languages = ("en",)
 
-    def __init__(self, model: str = "en_core_web_lg"):
+    def __init__(
+        self,
+        model: str = "en_core_web_lg",
+        backend: str = "senter",
+        encoding: str = "pairs",
+    ):
         """
-        Loads a spaCy model.
+        Loads a spaCy model or prepares a rule-based splitter.
 
         Parameters
         ----------
         model : str
             The name of a spaCy model, e.g. "en_core_web_lg".
+            Only used by the "senter" backend.
+        backend : str
+            "senter" for the trained sentence recognizer of the model,
+            "sentencizer" for spaCy's punctuation-based sentencizer or
+            "regex" for a splitter that knows scientific abbreviations.
+            The latter two need neither a model nor a neural network.
+        encoding : str
+            How the offsets are stored: "pairs" of start and end, "delta"
+            for a flat list of sentence lengths or "varint" for a base64
+            string of the latter. See scicopia_tools.analyzers.offsets.
+
+        Raises
+        ------
+        ValueError
+            If the backend or the encoding is unknown.
 
         Returns
         -------
@@ -28,18 +59,30 @@ class TextSplitter(Analyzer):
 
         """
         super().__init__()
-        self.nlp = spacy.load(
-            model,
-            exclude=[
-                "ner",
-                "textcat",
-                "parser",
-                "lemmatizer",
-                "tagger",
-                "attribute_ruler",
-            ],
-        )
-        self.nlp.enable_pipe("senter")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown sentence splitter: {backend}")
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown offset encoding: {encoding}")
+        self.backend = backend
+        self.encoding = encoding
+        if backend == "senter":
+            self.nlp = spacy.load(
+                model,
+                exclude=[
+                    "ner",
+                    "textcat",
+                    "parser",
+                    "lemmatizer",
+                    "tagger",
+                    "attribute_ruler",
+                ],
+            )
+            self.nlp.enable_pipe("senter")
+        elif backend == "sentencizer":
+            self.nlp = spacy.blank("en")
+            self.nlp.add_pipe("sentencizer")
+        else:
+            self.nlp = None
 
     def process(self, text: str):
         """
@@ -54,11 +97,28 @@ class TextSplitter(Analyzer):
         Returns
         -------
         list
-            List of tuples of start and end positions of each sentence
+            List of tuples of start and end positions of each sentence,
+            encoded as configured
 
         """
-        doc = self.nlp(text)
-        return {TextSplitter.field: [(x.start_char, x.end_char) for x in doc.sents]}
+        if self.nlp is None:
+            offsets = split_sentences(text)
+        else:
+            offsets = [(x.start_char, x.end_char) for x in self.nlp(text).sents]
+        return {TextSplitter.field: encode_offsets(offsets, self.encoding)}
+
+    def process_batch(self, texts: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        if self.nlp is None:
+            for text in texts:
+                yield {
+                    TextSplitter.field: encode_offsets(
+                        split_sentences(text), self.encoding
+                    )
+                }
+        else:
+            for doc in self.nlp.pipe(texts):
+                offsets = [(x.start_char, x.end_char) for x in doc.sents]
+                yield {TextSplitter.field: encode_offsets(offsets, self.encoding)}
 
     def release_resources(self):
         del self.nlp
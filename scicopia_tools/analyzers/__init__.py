@@ -1,12 +1,38 @@
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Iterator
 
 class Analyzer:
+    # Has to be increased whenever the output changes, as it
+    # identifies the results in the result cache
+    version = 1
+    # Whether the results refer to character offsets in the text
+    positional = False
+    # ISO 639-1 codes of the supported languages, None for all languages
+    languages = None
 
     def __init__(self) -> None:
         pass
 
+    @classmethod
+    def cache_params(cls, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The parameters that identify the results in the result cache.
+        Analyzers leave out those that do not change the results and
+        replace paths by a hash of the file content.
+        """
+        return params
+
     def process(self, text: str) -> Dict[str, Any]:
         return {}
 
+    def process_batch(self, texts: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        for text in texts:
+            yield self.process(text)
+
+    def checkpoint(self):
+        """
+        Persists state that has to survive the run, e.g. an index.
+        """
+        pass
+
     def release_resources(self):
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MinHash signatures and locality-sensitive hashing for near-duplicate texts.
+
+Texts are normalized, cut into overlapping byte shingles and hashed with a
+family of multiply-shift hash functions. All hash functions are applied to
+all shingles at once with NumPy. The LSH index splits signatures into bands,
+so that only texts sharing at least one band have to be compared.
+
+Broder, A. Z.
+On the resemblance and containment of documents
+Compression and Complexity of Sequences 1997
+"""
+import re
+import unicodedata
+from typing import Dict, List
+
+import numpy as np
+
+WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """
+    Removes differences in Unicode representation, case,
+    punctuation and whitespace.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(WORD.findall(text))
+
+
+def shingles(text: str, k: int = 8) -> np.ndarray:
+    """
+    The distinct shingles of k bytes of a normalized text,
+    each folded into 32 bits.
+    """
+    data = np.frombuffer(normalize(text).encode("utf-8"), dtype=np.uint8)
+    if len(data) < k:
+        data = np.concatenate([data, np.zeros(k - len(data), dtype=np.uint8)])
+    windows = np.lib.stride_tricks.sliding_window_view(data, k).astype(np.uint64)
+    # Packs up to 8 bytes into one integer, longer shingles wrap around
+    packed = windows @ (np.uint64(1) << (np.uint64(8) * np.arange(k, dtype=np.uint64)))
+    folded = (packed ^ (packed >> np.uint64(32))) & np.uint64(0xFFFFFFFF)
+    return np.unique(folded)
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        """
+        Parameters
+        ----------
+        num_perm : int, optional
+            The number of hash functions, i.e. the length of a signature,
+            by default 128
+        seed : int, optional
+            Seed of the hash functions, signatures are only comparable
+            with the same seed, by default 1
+        """
+        self.num_perm = num_perm
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(0, 2 ** 64, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 64, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        The MinHash signature of a set of 32-bit shingle hashes.
+        """
+        # Multiply-add-shift hashing, the products wrap around modulo 2**64
+        values = (self.a[:, None] * hashes[None, :] + self.b[:, None]) >> np.uint64(32)
+        return values.min(axis=1).astype(np.uint32)
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """
+    Estimates the Jaccard similarity of two texts from their signatures.
+    """
+    return float(np.count_nonzero(first == second)) / len(first)
+
+
+class LSHIndex:
+    def __init__(self, num_perm: int = 128, bands: int = 16):
+        """
+        Parameters
+        ----------
+        num_perm : int, optional
+            The length of the signatures, by default 128
+        bands : int, optional
+            The number of bands a signature is split into. More bands
+            find less similar pairs at the cost of more candidates,
+            by default 16
+        """
+        if num_perm % bands:
+            raise ValueError(f"{num_perm} hash functions cannot be split into {bands} bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(bands)]
+        self.signatures: Dict[str, np.ndarray] = {}
+
+    def band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[i * self.rows : (i + 1) * self.rows].tobytes()
+            for i in range(self.bands)
+        ]
+
+    def insert(self, key: str, signature: np.ndarray):
+        self.signatures[key] = signature
+        for buckets, band in zip(self.buckets, self.band_keys(signature)):
+            buckets.setdefault(band, []).append(key)
+
+    def query(self, signature: np.ndarray) -> List[str]:
+        """
+        The keys of all texts sharing at least one band with the signature.
+        """
+        candidates = {}
+        for buckets, band in zip(self.buckets, self.band_keys(signature)):
+            for key in buckets.get(band, ()):
+                candidates[key] = None
+        return list(candidates)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.signatures
+
+    def __len__(self) -> int:
+        return len(self.signatures)
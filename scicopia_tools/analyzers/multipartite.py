@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MultipartiteRank keyphrase extraction on spaCy Docs.
+
+A reimplementation of pke.unsupervised.MultipartiteRank that works on an
+already parsed Doc. Candidate clustering and the random walk are done with
+NumPy/SciPy on dense and sparse matrices instead of a networkx graph.
+
+Boudin, F.
+Unsupervised Keyphrase Extraction with Multipartite Graphs
+NAACL 2018
+https://arxiv.org/abs/1803.08721
+"""
+import math
+from collections import namedtuple
+from functools import lru_cache
+from typing import Collection, Dict, List, Tuple
+
+import numpy as np
+from nltk.stem.snowball import SnowballStemmer
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.sparse import csr_matrix
+from scipy.spatial.distance import pdist
+from spacy.tokens import Doc
+
+# surface: the words of the first occurrence
+# stems: the lexical form shared by all occurrences
+# offsets: token positions of all occurrences
+Candidate = namedtuple("Candidate", ["surface", "stems", "offsets"])
+
+_stemmer = SnowballStemmer("porter")
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    return _stemmer.stem(word).lower()
+
+
+def is_alphanum(word: str, valid_punctuation_marks: str = "-") -> bool:
+    for punct in valid_punctuation_marks:
+        word = word.replace(punct, "")
+    return word.isalnum()
+
+
+def select_candidates(
+    doc: Doc,
+    pos: Collection[str],
+    stoplist: Collection[str],
+    minimum_length: int = 3,
+    minimum_word_size: int = 2,
+    maximum_word_number: int = 5,
+) -> Dict[str, Candidate]:
+    """
+    Selects the longest sequences of words with one of the given parts of speech
+    within a sentence and filters them like pke's candidate_filtering.
+
+    Parameters
+    ----------
+    doc : Doc
+        A spaCy document with sentence boundaries and POS tags
+    pos : Collection[str]
+        Valid universal POS tags, e.g. {"NOUN", "PROPN", "ADJ"}
+    stoplist : Collection[str]
+        Candidates containing one of these words are dropped
+
+    Returns
+    -------
+    Dict[str, Candidate]
+        Candidates by their lexical form, in the order of their first occurrence
+    """
+    candidates = {}
+    for sent in doc.sents:
+        sequence = []
+        for token in sent:
+            if token.pos_ in pos:
+                sequence.append(token)
+                if token.i < sent.end - 1:
+                    continue
+            if sequence:
+                stems = tuple(stem(token.text) for token in sequence)
+                key = " ".join(stems)
+                if key in candidates:
+                    candidates[key].offsets.append(sequence[0].i)
+                else:
+                    surface = tuple(token.text for token in sequence)
+                    candidates[key] = Candidate(surface, stems, [sequence[0].i])
+            sequence = []
+
+    stoplist = stoplist if isinstance(stoplist, (set, frozenset)) else set(stoplist)
+    filtered = {}
+    for key, candidate in candidates.items():
+        words = [word.lower() for word in candidate.surface]
+        if not stoplist.isdisjoint(words):
+            continue
+        if len("".join(words)) < minimum_length:
+            continue
+        if min(len(word) for word in words) < minimum_word_size:
+            continue
+        if len(candidate.stems) > maximum_word_number:
+            continue
+        if not all(map(is_alphanum, words)):
+            continue
+        filtered[key] = candidate
+    return filtered
+
+
+def cluster_topics(
+    keys: List[str], candidates: Dict[str, Candidate], threshold: float, method: str
+) -> np.ndarray:
+    """
+    Groups candidates into topics by hierarchical agglomerative clustering
+    on the Jaccard distance of their stems.
+
+    Returns
+    -------
+    np.ndarray
+        The topic of each candidate, in the order of keys
+    """
+    if len(keys) == 1:
+        return np.zeros(1, dtype=np.int64)
+    # pke clusters the candidates in lexicographic order
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    vocabulary = {}
+    rows = []
+    cols = []
+    for row, i in enumerate(order):
+        for word in candidates[keys[i]].stems:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+    X = np.zeros((len(keys), len(vocabulary)))
+    np.add.at(X, (rows, cols), 1)
+    distances = np.nan_to_num(pdist(X, "jaccard"))
+    clusters = fcluster(
+        linkage(distances, method=method), t=threshold, criterion="distance"
+    )
+    topics = np.empty(len(keys), dtype=np.int64)
+    topics[order] = clusters - 1
+    return topics
+
+
+def build_graph(
+    keys: List[str], candidates: Dict[str, Candidate], topics: np.ndarray
+) -> np.ndarray:
+    """
+    The weighted adjacency matrix of the complete multipartite graph.
+    Candidates of different topics are connected with the sum of the
+    inverse distances between their occurrences.
+    """
+    positions = []
+    owners = []
+    lengths = []
+    for i, key in enumerate(keys):
+        candidate = candidates[key]
+        positions.extend(candidate.offsets)
+        owners.extend([i] * len(candidate.offsets))
+        lengths.extend([len(candidate.stems)] * len(candidate.offsets))
+    positions = np.array(positions)
+    owners = np.array(owners)
+    lengths = np.array(lengths)
+
+    p_i = positions[:, None]
+    p_j = positions[None, :]
+    gaps = np.abs(p_i - p_j)
+    gaps = gaps - np.where(p_i < p_j, lengths[:, None] - 1, 0)
+    gaps = gaps - np.where(p_j < p_i, lengths[None, :] - 1, 0)
+    connected = topics[owners][:, None] != topics[owners][None, :]
+    with np.errstate(divide="ignore"):
+        weights = np.where(connected, 1.0 / gaps, 0.0)
+
+    # Sum up the weights of all pairs of occurrences per pair of candidates
+    membership = np.zeros((len(positions), len(keys)))
+    membership[np.arange(len(positions)), owners] = 1.0
+    return membership.T @ weights @ membership
+
+
+def adjust_weights(
+    keys: List[str],
+    candidates: Dict[str, Candidate],
+    topics: np.ndarray,
+    graph: np.ndarray,
+    alpha: float,
+) -> np.ndarray:
+    """
+    Increases the weights of the edges pointing to the first occurring
+    candidate of each topic, by the weights of the edges leaving the
+    other candidates of that topic.
+    """
+    adjusted = graph.copy()
+    first_offsets = np.array([candidates[key].offsets[0] for key in keys])
+    for topic in np.unique(topics):
+        members = np.flatnonzero(topics == topic)
+        if len(members) == 1:
+            continue
+        first = members[np.argmin(first_offsets[members])]
+        others = members[members != first]
+        boosters = graph[others].sum(axis=0)
+        targets = topics != topic
+        position = math.exp(1.0 / (1 + first_offsets[first]))
+        adjusted[targets, first] += boosters[targets] * alpha * position
+    return adjusted
+
+
+def pagerank(
+    graph: np.ndarray, damping: float = 0.85, max_iter: int = 100, tol: float = 1.0e-6
+) -> np.ndarray:
+    """
+    PageRank by power iteration on the sparse, row-normalized graph,
+    following networkx.pagerank_scipy.
+    """
+    n = graph.shape[0]
+    M = csr_matrix(graph)
+    out_weights = np.asarray(M.sum(axis=1)).ravel()
+    dangling = out_weights == 0
+    out_weights[~dangling] = 1.0 / out_weights[~dangling]
+    M = csr_matrix(M.multiply(out_weights[:, None]))
+    x = np.full(n, 1.0 / n)
+    p = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        last = x
+        x = damping * (M.T @ x + x[dangling].sum() * p) + (1 - damping) * p
+        if np.abs(x - last).sum() < n * tol:
+            return x
+    return x
+
+
+def multipartite_rank(
+    doc: Doc,
+    pos: Collection[str],
+    stoplist: Collection[str],
+    n: int = 10,
+    alpha: float = 1.1,
+    threshold: float = 0.74,
+    method: str = "average",
+) -> List[Tuple[str, float]]:
+    """
+    Extracts the n best keyphrases from a document.
+
+    Parameters
+    ----------
+    doc : Doc
+        A spaCy document with sentence boundaries and POS tags
+    pos : Collection[str]
+        Valid universal POS tags for candidates
+    stoplist : Collection[str]
+        Words that must not be part of a candidate
+    n : int, optional
+        The number of keyphrases, by default 10
+    alpha : float, optional
+        Strength of the weight adjustment, by default 1.1
+    threshold : float, optional
+        Distance threshold for the topic clustering, by default 0.74
+    method : str, optional
+        Linkage method for the topic clustering, by default "average"
+
+    Returns
+    -------
+    List[Tuple[str, float]]
+        Lowercased keyphrases and their scores, best first
+    """
+    candidates = select_candidates(doc, pos, stoplist)
+    if not candidates:
+        return []
+    keys = list(candidates)
+    topics = cluster_topics(keys, candidates, threshold, method)
+    graph = build_graph(keys, candidates, topics)
+    if alpha > 0.0:
+        graph = adjust_weights(keys, candidates, topics, graph, alpha)
+    scores = pagerank(graph)
+    # A stable sort keeps ties in the order of their first occurrence
+    best = sorted(range(len(keys)), key=lambda i: -scores[i])[:n]
+    return [
+        (" ".join(candidates[keys[i]].surface).lower(), float(scores[i])) for i in best
+    ]
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact encodings of sentence offsets.
+
+Offsets are stored as [start, end] pairs by default. Consecutive sentences
+are usually separated by a single space, so most starts follow from the
+previous end. The "delta" encoding is a flat list of integers: the start of
+the first sentence followed by the length of every sentence. A gap between
+two sentences other than one character is written as ~gap (i.e. -gap - 1)
+before the length of the next sentence. The "varint" encoding packs the
+same integers as zigzag LEB128 varints into a base64 string.
+
+decode_offsets recognizes all three formats, so readers do not need to
+know how a document was stored.
+"""
+import base64
+from typing import List, Sequence, Tuple, Union
+
+ENCODINGS = ("pairs", "delta", "varint")
+
+Offsets = List[Tuple[int, int]]
+
+
+def to_deltas(offsets: Sequence[Sequence[int]]) -> List[int]:
+    if not offsets:
+        return []
+    deltas = [offsets[0][0]]
+    end = None
+    for start, stop in offsets:
+        if end is not None and start - end != 1:
+            deltas.append(~(start - end))
+        deltas.append(stop - start)
+        end = stop
+    return deltas
+
+
+def from_deltas(deltas: Sequence[int]) -> Offsets:
+    if not deltas:
+        return []
+    offsets = []
+    start = deltas[0]
+    for value in deltas[1:]:
+        if value < 0:
+            start += ~value - 1
+            continue
+        offsets.append((start, start + value))
+        start += value + 1
+    return offsets
+
+
+def zigzag(n: int) -> int:
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def unzigzag(n: int) -> int:
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+
+def to_varints(values: Sequence[int]) -> str:
+    data = bytearray()
+    for value in values:
+        value = zigzag(value)
+        while value >= 0x80:
+            data.append(value & 0x7F | 0x80)
+            value >>= 7
+        data.append(value)
+    return base64.b64encode(bytes(data)).decode("ascii")
+
+
+def from_varints(blob: str) -> List[int]:
+    values = []
+    value = shift = 0
+    for byte in base64.b64decode(blob):
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(unzigzag(value))
+            value = shift = 0
+    return values
+
+
+def encode_offsets(
+    offsets: Sequence[Sequence[int]], encoding: str = "pairs"
+) -> Union[List[Tuple[int, int]], List[int], str]:
+    """
+    Encodes sentence offsets for storage.
+
+    Parameters
+    ----------
+    offsets : Sequence[Sequence[int]]
+        Start and end of every sentence, in ascending order
+    encoding : str, optional
+        "pairs", "delta" or "varint", by default "pairs"
+
+    Returns
+    -------
+    Union[List[Tuple[int, int]], List[int], str]
+        The offsets unchanged, a flat list of integers or a base64 string
+
+    Raises
+    ------
+    ValueError
+        If the encoding is unknown
+    """
+    if encoding == "pairs":
+        return [tuple(pair) for pair in offsets]
+    if encoding == "delta":
+        return to_deltas(offsets)
+    if encoding == "varint":
+        return to_varints(to_deltas(offsets))
+    raise ValueError(f"Unknown offset encoding: {encoding}")
+
+
+def decode_offsets(value: Union[Sequence, str, None]) -> Offsets:
+    """
+    Decodes sentence offsets stored in any of the encodings.
+
+    Returns
+    -------
+    List[Tuple[int, int]]
+        Start and end of every sentence
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        return from_deltas(from_varints(value))
+    if isinstance(value[0], int):
+        return from_deltas(value)
+    return [tuple(pair) for pair in value]
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A rule-based sentence splitter for scientific abstracts.
+
+Sentences end with a full stop, question or exclamation mark, possibly
+followed by closing quotes or brackets, if the next sentence does not start
+with a lowercase letter. Full stops after common abbreviations of scientific
+writing ("et al.", "Fig.", "i.e.") and after single capital letters, as in
+species names ("C. elegans") or initials, do not end a sentence.
+"""
+import re
+from typing import List, Tuple
+
+ABBREVIATIONS = frozenset(
+    [
+        # References to the literature and within a paper
+        "al",
+        "fig",
+        "figs",
+        "tab",
+        "eq",
+        "eqs",
+        "ref",
+        "refs",
+        "sec",
+        "sect",
+        "ch",
+        "vol",
+        "no",
+        "nos",
+        "p",
+        "pp",
+        "suppl",
+        # Latin and other phrases
+        "e.g",
+        "i.e",
+        "cf",
+        "vs",
+        "viz",
+        "approx",
+        "ca",
+        "resp",
+        "incl",
+        # Titles
+        "dr",
+        "prof",
+        "mr",
+        "mrs",
+        "ms",
+        "st",
+        # Taxonomy and cultivars
+        "sp",
+        "spp",
+        "subsp",
+        "var",
+        "cv",
+        "gen",
+        "nov",
+        "sp.nov",
+        # Units and measurements
+        "wt",
+        "conc",
+        "temp",
+        "exp",
+    ]
+)
+
+BOUNDARY = re.compile(r"[.!?]+[\"'”’)\]]*(?=\s+[^\sa-z])")
+LAST_WORD = re.compile(r"\S+$")
+WHITESPACE = re.compile(r"\s*")
+OPENING = "([{\"'“‘"
+
+
+def is_abbreviation(word: str) -> bool:
+    word = word.lstrip(OPENING)
+    if len(word) == 1:
+        # Initials and abbreviated genera, e.g. "E. coli"
+        return word.isupper()
+    return word.lower() in ABBREVIATIONS
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """
+    Splits a text into sentences.
+
+    Parameters
+    ----------
+    text : str
+        The text to split
+
+    Returns
+    -------
+    List[Tuple[int, int]]
+        Start and end offsets of the sentences, without
+        surrounding whitespace, like spaCy's Span.start_char
+        and Span.end_char
+    """
+    sentences = []
+    start = WHITESPACE.match(text).end()
+    for match in BOUNDARY.finditer(text, start):
+        if text[match.start()] == ".":
+            word = LAST_WORD.search(text, max(start, match.start() - 16), match.start())
+            if word is not None and is_abbreviation(word.group()):
+                continue
+        sentences.append((start, match.end()))
+        start = WHITESPACE.match(text, match.end()).end()
+    end = len(text.rstrip())
+    if start < end:
+        sentences.append((start, end))
+    return sentences
@@ -1,12 +1,25 @@
 import argparse
 import logging
+import sys
 
 from scicopia_tools.analyzers.AutoTagger import AutoTagger
-from scicopia_tools.analyzers.TextSplitter import TextSplitter
+from scicopia_tools.analyzers.Deduplicator import Deduplicator
+from scicopia_tools.analyzers.LangDetect import LangDetect
+from scicopia_tools.analyzers.offsets import ENCODINGS
+from scicopia_tools.analyzers.TextSplitter import BACKENDS, TextSplitter
 from scicopia_tools.db.arango import setup
+from scicopia_tools.db.cache import CacheConfig
+from scicopia_tools.db.latency import LatencyTracker
 from scicopia_tools.db.parallel import DocTransformer
+from scicopia_tools.db.profiling import PROFILERS, Profile
+from scicopia_tools.db.watchdog import Budget
 
-features = {"auto_tags": AutoTagger, "split": TextSplitter}
+features = {
+    "auto_tags": AutoTagger,
+    "dedup": Deduplicator,
+    "language": LangDetect,
+    "split": TextSplitter,
+}
 logger = logging.getLogger("scicopia_tools.arangofetch")
 
 if __name__ == "__main__":
@@ -26,9 +39,147 @@ if __name__ == "__main__":
     PARSER.add_argument(
         "--batch", type=int, help="Batch size of bulk import", default=1000
     )
+    PARSER.add_argument(
+        "--time-budget",
+        metavar="SECONDS",
+        type=float,
+        help="Maximum processing time per document, documents exceeding it are "
+        "only tried again with a larger budget",
+    )
+    PARSER.add_argument(
+        "--max-chars",
+        metavar="N",
+        type=int,
+        help="Truncate longer texts at a sentence boundary",
+    )
+    PARSER.add_argument(
+        "--outliers",
+        metavar="FILE",
+        type=str,
+        help="Record documents exceeding the time budget as JSON lines",
+    )
+    PARSER.add_argument(
+        "--latency-file",
+        metavar="FILE",
+        type=str,
+        default="latency.json",
+        help="Where to store the slowest documents and the latency histogram",
+    )
+    PARSER.add_argument(
+        "--report",
+        action="store_true",
+        help="Show the latency report of the last run instead of processing documents",
+    )
+    PARSER.add_argument(
+        "--profile",
+        metavar="N",
+        type=int,
+        help="Profile the first N batches of every worker",
+    )
+    PARSER.add_argument(
+        "--profiler",
+        choices=PROFILERS,
+        default="cprofile",
+        help="cProfile or a sampling profiler with flamegraph-compatible output",
+    )
+    PARSER.add_argument(
+        "--profile-output",
+        metavar="PREFIX",
+        type=str,
+        default="profile",
+        help="Path prefix of the merged profile",
+    )
+    PARSER.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and process new documents as they arrive",
+    )
+    PARSER.add_argument(
+        "--interval",
+        metavar="SECONDS",
+        type=float,
+        default=5.0,
+        help="Polling interval of the watch mode",
+    )
+    PARSER.add_argument(
+        "--order-by",
+        metavar="ATTRIBUTE",
+        type=str,
+        help="Process documents in the order of this attribute, e.g. an import timestamp or a priority",
+    )
+    PARSER.add_argument(
+        "--ascending",
+        action="store_true",
+        help="Process the lowest values of --order-by first instead of the highest",
+    )
+    PARSER.add_argument(
+        "--cache",
+        metavar="FILE",
+        type=str,
+        help="Reuse the results of documents with identical content from this SQLite cache",
+    )
+    PARSER.add_argument(
+        "--cache-size",
+        metavar="MB",
+        type=int,
+        default=1024,
+        help="Size limit of the result cache, least recently used results are evicted first",
+    )
+    PARSER.add_argument(
+        "--splitter",
+        choices=BACKENDS,
+        default="senter",
+        help="Sentence splitter of the 'split' feature, 'sentencizer' and 'regex' need no model",
+    )
+    PARSER.add_argument(
+        "--offsets",
+        choices=ENCODINGS,
+        default="pairs",
+        help="Storage format of the sentence offsets of the 'split' feature",
+    )
+    PARSER.add_argument(
+        "--model",
+        metavar="LANGUAGE=MODEL",
+        action="append",
+        default=[],
+        help="A spaCy model for documents in another language, e.g. de=de_core_news_lg",
+    )
+    PARSER.add_argument(
+        "--reuse-duplicates",
+        action="store_true",
+        help="Copy the results of the canonical document to its near-duplicates (run 'dedup' first)",
+    )
     ARGS = PARSER.parse_args()
-    transformer = DocTransformer(ARGS.feature, features[ARGS.feature])
-    if ARGS.parallel is None:
+    if ARGS.report:
+        print(LatencyTracker.load(ARGS.latency_file).report(ARGS.feature))
+        sys.exit(0)
+    if any("=" not in model for model in ARGS.model):
+        PARSER.error("--model expects LANGUAGE=MODEL")
+    models = dict(model.split("=", 1) for model in ARGS.model)
+    params = None
+    if ARGS.feature == "split":
+        params = {"backend": ARGS.splitter, "encoding": ARGS.offsets}
+    transformer = DocTransformer(
+        ARGS.feature,
+        features[ARGS.feature],
+        params,
+        budget=Budget(ARGS.time_budget, ARGS.max_chars),
+        outlier_file=ARGS.outliers,
+        latency_file=ARGS.latency_file,
+        profile=None
+        if ARGS.profile is None
+        else Profile(ARGS.profile, ARGS.profiler, ARGS.profile_output),
+        order_by=ARGS.order_by,
+        descending=not ARGS.ascending,
+        cache=None
+        if ARGS.cache is None
+        else CacheConfig(ARGS.cache, ARGS.cache_size),
+        reuse_duplicates=ARGS.reuse_duplicates,
+        models=models,
+    )
+    if ARGS.watch:
+        transformer.watch(ARGS.batch, ARGS.interval)
+    elif ARGS.parallel is None:
         transformer.main(ARGS.batch)
     else:
         transformer.parallel_main(ARGS.parallel, ARGS.batch)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 23:02:17 2026
+
+@author: tech
+"""
+import argparse
+import gzip
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, List, Optional, TextIO, Tuple
+
+import zstandard as zstd
+
+from scicopia_tools.compile.utils import chunked
+
+logger = logging.getLogger("scicopia_tools.compile.dictionaries")
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Set in every worker process, so that it is not sent with every chunk
+_blocklist: FrozenSet[str] = frozenset()
+
+
+def open_source(path: str) -> TextIO:
+    """
+    Opens a plain, gzip or zstd compressed text file for streaming.
+    The compression is recognized by the magic number.
+    """
+    with open(path, "rb") as raw:
+        magic = raw.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if magic.startswith(ZSTD_MAGIC):
+        reader = zstd.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, "rt", encoding="utf-8")
+
+
+def read_blocklist(path: str) -> FrozenSet[str]:
+    with open_source(path) as names:
+        return frozenset(filter(None, (normalize(name) for name in names)))
+
+
+def normalize(name: str) -> str:
+    """
+    Composes the Unicode characters of a name and collapses its whitespace.
+    The case is kept, as the taggers match case-sensitively.
+    """
+    return " ".join(unicodedata.normalize("NFC", name).split())
+
+
+def parse_words(lines: List[str]) -> Tuple[List[str], int]:
+    """
+    Parses a chunk of a word list, one name per line.
+
+    Returns
+    -------
+    Tuple[List[str], int]
+        The normalized names not on the blocklist
+        and the number of malformed lines, always 0
+    """
+    names = []
+    for line in lines:
+        name = normalize(line)
+        if name and name not in _blocklist:
+            names.append(name)
+    return names, 0
+
+
+def parse_ids(lines: List[str]) -> Tuple[List[Tuple[str, List[str]]], int]:
+    """
+    Parses a chunk of an ID list, an ID and |-separated names per line.
+
+    Returns
+    -------
+    Tuple[List[Tuple[str, List[str]]], int]
+        The IDs with their distinct normalized names not on
+        the blocklist and the number of malformed lines
+    """
+    entries = []
+    malformed = 0
+    for line in lines:
+        id_names = line.rstrip("\r\n").split("\t")
+        if len(id_names) != 2 or ":" not in id_names[0]:
+            malformed += 1
+            continue
+        names = {}
+        for name in id_names[1].split("|"):
+            name = normalize(name)
+            if name and name not in _blocklist:
+                names[name] = None
+        if names:
+            entries.append((id_names[0].strip(), list(names)))
+    return entries, malformed
+
+
+# By the formats of DictionaryTagger.FORMATS
+PARSERS = {"words": parse_words, "ids": parse_ids}
+
+
+def _init_worker(blocklist: FrozenSet[str]):
+    global _blocklist
+    _blocklist = blocklist
+
+
+def compile_dictionary(
+    source: str,
+    output: str,
+    format: str,
+    blocklist: Iterable[str] = (),
+    parallel: Optional[int] = None,
+    chunk_size: int = 20000,
+) -> Tuple[int, int]:
+    """
+    Compiles a possibly compressed dump into the dictionary file
+    a tagger reads, e.g. the ID list of the TaxonTagger.
+
+    Chunks of lines are parsed and normalized, optionally in parallel,
+    while the source is still being decompressed. Names are deduplicated: a word
+    list keeps the first occurrence of a name, an ID list the distinct
+    names of an ID, even if it occurs on several lines.
+
+    Parameters
+    ----------
+    source : str
+        A plain, gzip or zstd compressed dump
+    output : str
+        The uncompressed dictionary file
+    format : str
+        "words" or "ids", see DictionaryTagger.Dictionary
+    blocklist : Iterable[str], optional
+        Names that are dropped, e.g. NEGATIVE_TAX
+    parallel : Optional[int], optional
+        Number of processes parsing chunks, by default None, i.e. none.
+        Experimental: the chunks are pickled to the processes and back,
+        which made two processes slower than none on a single core
+        (3.1 s instead of 1.8 s). Any speedup on several cores has not
+        been measured yet.
+    chunk_size : int, optional
+        Number of lines parsed at once, by default 20000
+
+    Returns
+    -------
+    Tuple[int, int]
+        The number of entries and the number of names written
+
+    Raises
+    ------
+    ValueError
+        If the format is unknown
+    """
+    if format not in PARSERS:
+        raise ValueError(f"Unknown dictionary format: {format}")
+    parse = PARSERS[format]
+    blocklist = frozenset(normalize(name) for name in blocklist)
+    words: Dict[str, None] = {}
+    ids: Dict[str, Dict[str, None]] = {}
+    malformed = 0
+    with open_source(source) as lines:
+        if parallel is None or parallel < 2:
+            _init_worker(blocklist)
+            results = map(parse, chunked(lines, chunk_size))
+            pool = None
+        else:
+            pool = multiprocessing.Pool(parallel, _init_worker, (blocklist,))
+            results = pool.imap(parse, chunked(lines, chunk_size))
+        try:
+            for entries, bad_lines in results:
+                malformed += bad_lines
+                if format == "words":
+                    words.update(dict.fromkeys(entries))
+                else:
+                    for entry_id, names in entries:
+                        ids.setdefault(entry_id, {}).update(dict.fromkeys(names))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    if malformed:
+        logger.warning("Skipped %d lines with the wrong format", malformed)
+    directory = os.path.dirname(output) or "."
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wt", encoding="utf-8") as compiled:
+            if format == "words":
+                for word in words:
+                    compiled.write(f"{word}\n")
+            else:
+                for entry_id, names in ids.items():
+                    compiled.write(f"{entry_id}\t{'|'.join(names)}\n")
+        os.replace(temporary, output)
+    except BaseException:
+        os.remove(temporary)
+        raise
+    if format == "words":
+        return len(words), len(words)
+    return len(ids), sum(map(len, ids.values()))
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(
+        description="Compile a compressed dump into the dictionary of a tagger"
+    )
+    PARSER.add_argument(
+        "tagger", choices=["chemicals", "taxa"], help="The tagger the dictionary is for"
+    )
+    PARSER.add_argument(
+        "source", type=str, help="A plain, gzip or zstd compressed dump"
+    )
+    PARSER.add_argument("output", type=str, help="Path to the compiled dictionary")
+    PARSER.add_argument(
+        "--blocklist",
+        metavar="FILE",
+        action="append",
+        default=[],
+        help="Drop the names in this file, one per line, can be given repeatedly",
+    )
+    PARSER.add_argument(
+        "-p",
+        "--parallel",
+        metavar="N",
+        type=int,
+        help="Parse the dump with N processes (experimental, slower on a single core)",
+    )
+    PARSER.add_argument(
+        "--chunk-size",
+        metavar="LINES",
+        type=int,
+        default=20000,
+        help="Number of lines parsed at once",
+    )
+    PARSER.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        type=str,
+        help="Build the automaton of the dictionary into this cache directory",
+    )
+    PARSER.add_argument(
+        "--shared",
+        action="store_true",
+        help="Build the flat file memory-mapped by all workers",
+    )
+    ARGS = PARSER.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    blocklist = set()
+    for path in ARGS.blocklist:
+        blocklist.update(read_blocklist(path))
+    if ARGS.tagger == "chemicals":
+        from scicopia_tools.components.ChemTagger import ChemTagger as Tagger
+
+        format = "words"
+    else:
+        from scicopia_tools.components.TaxonTagger import NEGATIVE_TAX
+        from scicopia_tools.components.TaxonTagger import TaxonTagger as Tagger
+
+        format = "ids"
+        blocklist.update(NEGATIVE_TAX)
+    start = time.perf_counter()
+    entries, names = compile_dictionary(
+        ARGS.source, ARGS.output, format, blocklist, ARGS.parallel, ARGS.chunk_size
+    )
+    logger.info(
+        "Compiled %d entries with %d names into %s in %.2f s",
+        entries,
+        names,
+        ARGS.output,
+        time.perf_counter() - start,
+    )
+    if ARGS.cache_dir is not None:
+        # The taggers find the automaton by the hash of the compiled file
+        Tagger(ARGS.output, cache_dir=ARGS.cache_dir, shared=ARGS.shared)
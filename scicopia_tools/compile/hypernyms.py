@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 18:40:12 2026
+
+@author: tech
+"""
+import argparse
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+from tqdm import tqdm
+
+from scicopia_tools.analyzers.Hearst import PATTERNS, Hearst
+from scicopia_tools.compile.utils import chunked
+from scicopia_tools.db.arango import DbAccess, setup
+from scicopia_tools.exceptions import ScicopiaException
+
+# Bit of every pattern name in the pattern mask of an edge
+PATTERN_BITS = {pattern.name: 1 << i for i, pattern in enumerate(PATTERNS)}
+
+
+def normalize_term(term: str) -> str:
+    """
+    Lowercases a term and collapses its whitespace, so that
+    "Hydrogen  peroxide" and "hydrogen peroxide" become one term.
+    """
+    return " ".join(term.lower().split())
+
+
+class HypernymGraph:
+    """
+    Aggregates the Hearst relations of a corpus.
+
+    Terms are mapped to consecutive integer IDs. Their counts and the
+    endpoints, weights and patterns of the edges are kept in arrays, only
+    the lookups by term and by edge are dicts. An edge points from the
+    hyponym to the hypernym ("is a") and its weight is the number of
+    documents stating the relation.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.counts = array("I")
+        self.edge_ids: Dict[int, int] = {}
+        self.hyponyms = array("I")
+        self.hypernyms = array("I")
+        self.weights = array("I")
+        self.patterns = array("B")
+
+    def term_id(self, term: str) -> int:
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = len(self.terms)
+            self.ids[term] = term_id
+            self.terms.append(term)
+            self.counts.append(0)
+        return term_id
+
+    def add(self, relations: Iterable[Sequence[str]]):
+        """
+        Adds the relations of one document. Repeated relations
+        and terms are counted once per document.
+
+        Parameters
+        ----------
+        relations : Iterable[Sequence[str]]
+            3-tuples (hypernym, pattern, hyponym) as returned by Hearst
+        """
+        seen_terms = set()
+        seen_edges = {}
+        for hypernym, pattern, hyponym in relations:
+            hypernym = normalize_term(hypernym)
+            hyponym = normalize_term(hyponym)
+            if not hypernym or not hyponym or hypernym == hyponym:
+                continue
+            source = self.term_id(hyponym)
+            target = self.term_id(hypernym)
+            seen_terms.add(source)
+            seen_terms.add(target)
+            key = source << 32 | target
+            seen_edges[key] = seen_edges.get(key, 0) | PATTERN_BITS.get(pattern, 0)
+        for term_id in seen_terms:
+            self.counts[term_id] += 1
+        for key, bits in seen_edges.items():
+            edge_id = self.edge_ids.get(key)
+            if edge_id is None:
+                self.edge_ids[key] = len(self.weights)
+                self.hyponyms.append(key >> 32)
+                self.hypernyms.append(key & 0xFFFFFFFF)
+                self.weights.append(1)
+                self.patterns.append(bits)
+            else:
+                self.weights[edge_id] += 1
+                self.patterns[edge_id] |= bits
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def vertices(self) -> Iterator[Dict[str, Any]]:
+        for term_id, term in enumerate(self.terms):
+            yield {"_key": str(term_id), "term": term, "count": self.counts[term_id]}
+
+    def edges(self, vertices: str, min_weight: int = 1) -> Iterator[Dict[str, Any]]:
+        """
+        The edges as ArangoDB edge documents.
+
+        Parameters
+        ----------
+        vertices : str
+            The name of the term vertex collection
+        min_weight : int, optional
+            Only edges stated in at least this many documents, by default 1
+        """
+        for edge_id, weight in enumerate(self.weights):
+            if weight < min_weight:
+                continue
+            bits = self.patterns[edge_id]
+            patterns = [name for name, bit in PATTERN_BITS.items() if bits & bit]
+            yield {
+                "_from": f"{vertices}/{self.hyponyms[edge_id]}",
+                "_to": f"{vertices}/{self.hypernyms[edge_id]}",
+                "weight": weight,
+                "patterns": patterns,
+            }
+
+
+def fetch_relations(
+    db_access: DbAccess, field: str = Hearst.field
+) -> Iterator[List[List[str]]]:
+    """
+    Streams the Hearst relations of all documents that have them.
+
+    Parameters
+    ----------
+    db_access : DbAccess
+        Access to the collection of the ArangoDB database one wants to access
+    field : str, optional
+        The field holding the relations, by default "hearst"
+
+    Returns
+    -------
+    Iterator[List[List[str]]]
+        The relations of every document
+    """
+    collection = db_access.collection.name
+    aql = (
+        f"FOR x IN {collection} FILTER x.{field} != null AND LENGTH(x.{field}) > 0 "
+        f"RETURN x.{field}"
+    )
+    return db_access.database.AQLQuery(aql, rawResults=True, batchSize=1000, ttl=3600)
+
+
+def get_collection(database, name: str, edges: bool = False):
+    """
+    An empty collection, created if it does not exist yet.
+    """
+    if database.hasCollection(name):
+        collection = database[name]
+        collection.truncate()
+        return collection
+    return database.createCollection(
+        className="Edges" if edges else "Collection", name=name
+    )
+
+
+def save_graph(
+    database,
+    graph: HypernymGraph,
+    terms: str,
+    hypernyms: str,
+    min_weight: int = 1,
+    batch_size: int = 10000,
+):
+    """
+    Replaces the contents of the term vertex and the hypernym edge
+    collections, inserting batch_size documents per request.
+    The terms are indexed, so that a traversal can start from a
+    term without scanning the vertex collection.
+    """
+    vertex_collection = get_collection(database, terms)
+    for batch in chunked(graph.vertices(), batch_size):
+        vertex_collection.bulkSave(batch)
+    vertex_collection.ensurePersistentIndex(["term"], unique=True)
+    edge_collection = get_collection(database, hypernyms, edges=True)
+    for batch in chunked(graph.edges(terms, min_weight), batch_size):
+        edge_collection.bulkSave(batch)
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(
+        description="Build a hypernym graph from the Hearst relations of all documents"
+    )
+    PARSER.add_argument(
+        "--terms",
+        type=str,
+        default="terms",
+        help="The vertex collection of the terms, by default 'terms'",
+    )
+    PARSER.add_argument(
+        "--hypernyms",
+        type=str,
+        default="hypernyms",
+        help="The edge collection of the relations, by default 'hypernyms'",
+    )
+    PARSER.add_argument(
+        "--field",
+        type=str,
+        default=Hearst.field,
+        help=f"The field holding the relations, by default '{Hearst.field}'",
+    )
+    PARSER.add_argument(
+        "--min-weight",
+        type=int,
+        default=1,
+        help="Only keep relations stated in at least this many documents",
+    )
+    PARSER.add_argument(
+        "--batch",
+        type=int,
+        default=10000,
+        help="Number of vertices or edges inserted at once",
+    )
+    ARGS = PARSER.parse_args()
+    try:
+        arango_access = setup()
+        docs = fetch_relations(arango_access, ARGS.field)
+    except ScicopiaException as e:
+        print(e)
+    else:
+        hypernym_graph = HypernymGraph()
+        for doc_relations in tqdm(docs):
+            hypernym_graph.add(doc_relations)
+        save_graph(
+            arango_access.database,
+            hypernym_graph,
+            ARGS.terms,
+            ARGS.hypernyms,
+            ARGS.min_weight,
+            ARGS.batch,
+        )
+        print(f"{len(hypernym_graph.terms)} terms, {len(hypernym_graph)} relations")
@@ -9,7 +9,7 @@ import argparse
 import pickle
 from collections import Counter
 from itertools import tee
-from typing import Any, Iterable, Iterator
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 import spacy
 import zstandard as zstd
@@ -17,6 +17,13 @@ from spacy.matcher import Matcher
 from tqdm import tqdm
 
 from scicopia_tools.db.arango import DbAccess, setup
+from scicopia_tools.db.profiling import (
+    PROFILERS,
+    BatchProfiler,
+    merge_results,
+    profile_items,
+)
+from scicopia_tools.db.routing import LANGUAGE_FIELD, UNKNOWN, LanguageRouter
 from scicopia_tools.exceptions import ScicopiaException
 
 
@@ -688,7 +695,9 @@ def zstd_pickle(filename: str, obj: Any, protocol: int = 4):
             pickle.dump(obj, compressor, protocol=protocol)
 
 
-def fetch_abstracts(db_access: DbAccess) -> Iterator[str]:
+def fetch_abstracts(
+    db_access: DbAccess, languages: Optional[List[str]] = None
+) -> Iterator[str]:
     """
     Fetches the abstracts of all documents in a collection that have them.
 
@@ -696,15 +705,43 @@ def fetch_abstracts(db_access: DbAccess) -> Iterator[str]:
     ----------
     db_access : DbAccess
         Access to the collection of the ArangoDB database one wants to access
+    languages : Optional[List[str]], optional
+        Only fetch abstracts in these languages, by default None, i.e. all.
+        The language field set by LangDetect is used, abstracts without it
+        are detected on the fly. As in the routing of the DocTransformer,
+        abstracts whose language could not be determined are kept.
 
     Returns
     -------
     Iterator[str]
         An iterator of all available abstracts
     """
-    aql = f"FOR x IN {db_access.collection.name} FILTER x.abstract != null RETURN x.abstract"
+    collection = db_access.collection.name
+    if languages is None:
+        aql = f"FOR x IN {collection} FILTER x.abstract != null RETURN x.abstract"
+        return db_access.database.AQLQuery(aql, rawResults=True, batchSize=100, ttl=60)
+    field = f"x.{LANGUAGE_FIELD}"
+    aql = (
+        f"FOR x IN {collection} FILTER x.abstract != null "
+        f"FILTER {field} == null OR {field} IN {list(languages) + [UNKNOWN]} "
+        f"RETURN {{ 'abstract': x.abstract, 'language': {field} }}"
+    )
     docs = db_access.database.AQLQuery(aql, rawResults=True, batchSize=100, ttl=60)
-    return docs
+    return filter_languages(docs, languages)
+
+
+def filter_languages(
+    docs: Iterable[Dict[str, str]], languages: List[str]
+) -> Iterator[str]:
+    """
+    Yields the abstracts in one of the given languages or of unknown
+    language, detecting the language of those that have none.
+    """
+    router = LanguageRouter(languages)
+    for doc in docs:
+        language = doc["language"] or router.language(doc["abstract"])
+        if router.supports(language):
+            yield doc["abstract"]
 
 
 if __name__ == "__main__":
@@ -737,20 +774,57 @@ if __name__ == "__main__":
         action="store_true",
         help="Should the frequenies be re-weighted by their n-gram lengths?",
     )
+    PARSER.add_argument(
+        "--profile",
+        metavar="N",
+        type=int,
+        help="Profile the first N batches of 100 abstracts",
+    )
+    PARSER.add_argument(
+        "--profiler",
+        choices=PROFILERS,
+        default="cprofile",
+        help="cProfile or a sampling profiler with flamegraph-compatible output",
+    )
+    PARSER.add_argument(
+        "--profile-output",
+        metavar="PREFIX",
+        type=str,
+        default="profile",
+        help="Path prefix of the merged profile",
+    )
+    PARSER.add_argument(
+        "--model",
+        type=str,
+        default="en_core_web_lg",
+        help="The spaCy model to parse the abstracts with, by default en_core_web_lg",
+    )
+    PARSER.add_argument(
+        "--languages",
+        nargs="+",
+        default=["en"],
+        help="Only use abstracts in these languages, by default en. 'all' uses every abstract.",
+    )
     ARGS = PARSER.parse_args()
+    LANGUAGES = None if "all" in ARGS.languages else ARGS.languages
     try:
         arango_access = setup()
-        db_docs = fetch_abstracts(arango_access)
+        db_docs = fetch_abstracts(arango_access, LANGUAGES)
     except ScicopiaException as e:
         print(e)
     else:
-        spacy_model = spacy.load("en_core_web_lg", exclude=["ner", "textcat"])
+        spacy_model = spacy.load(ARGS.model, exclude=["ner", "textcat"])
         PATTERNS = ARGS.patterns
+        if ARGS.profile is not None:
+            profiler = BatchProfiler(1, ARGS.profiler)
+            db_docs = profile_items(db_docs, profiler, 100 * ARGS.profile)
         try:
             frequencies = export_ngrams(db_docs, spacy_model, ARGS.n, PATTERNS)
         except ValueError as e:
             print(f"Value of n: {e}")
         else:
+            if ARGS.profile is not None:
+                merge_results([profiler.results()], ARGS.profiler, ARGS.profile_output)
             frequencies = clean_ngrams(frequencies)
             frequencies = lower_ngrams(frequencies)
             THRESHOLD = ARGS.threshold
@@ -0,0 +1,20 @@
+"""
+Helpers shared by the compile scripts.
+
+Kept free of heavy dependencies, so that importing them does not pull in
+spaCy or the database drivers, e.g. in the worker processes of a pool.
+"""
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    """
+    Splits an iterable into lists of at most size items.
+    """
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,830 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 19:58:21 2026
+
+@author: tech
+"""
+
+import argparse
+import logging
+import re  # Only used in exception handling
+import sys
+from array import array
+from collections import namedtuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import spacy
+from ahocorasick import STORE_INTS, Automaton
+from spacy.language import Language
+from spacy.parts_of_speech import NOUN
+from spacy.tokens import Doc, Span
+
+from scicopia_tools.analyzers import Analyzer
+from scicopia_tools.components.automata import (
+    SharedAutomaton,
+    Tables,
+    automaton_key,
+    cached_automaton,
+)
+from scicopia_tools.db.cache import CacheConfig
+from scicopia_tools.db.latency import LatencyTracker
+from scicopia_tools.db.parallel import DocTransformer
+from scicopia_tools.db.profiling import PROFILERS, Profile
+from scicopia_tools.db.watchdog import Budget
+
+Annotation = namedtuple("Annotation", ["name", "label", "start", "end", "ids"])
+
+# A labelled dictionary.
+# format: "words" (one entry per line) or "ids" (an ID and |-separated
+#         variants per line, separated by a tab, e.g. "species:ncbi:562")
+# plural: Also accept matches followed by an "s"
+# nouns: Single-token entries only tagged if they are nouns, e.g. "lead"
+# stopwords: Entries that are ignored
+# disambiguate: Narrow down ambiguous IDs to those found unambiguously
+#               elsewhere in the same text
+Dictionary = namedtuple(
+    "Dictionary",
+    ["label", "wordlist", "format", "plural", "nouns", "stopwords", "disambiguate"],
+)
+
+FORMATS = ("words", "ids")
+
+
+def make_dictionary(
+    label: str,
+    wordlist: str,
+    format: str = "words",
+    plural: bool = False,
+    nouns: Iterable[str] = (),
+    stopwords: Iterable[str] = (),
+    disambiguate: bool = False,
+) -> Dictionary:
+    if format not in FORMATS:
+        raise ValueError(f"Unknown dictionary format: {format}")
+    return Dictionary(
+        label,
+        wordlist,
+        format,
+        plural,
+        frozenset(nouns),
+        frozenset(stopwords),
+        disambiguate,
+    )
+
+
+def read_words(wordlist: str) -> Iterator[Tuple[str, Tuple[str, ...]]]:
+    with open(wordlist, "rt") as words:
+        for line in words:
+            line = line.rstrip()
+            if line:
+                yield line, ()
+                # Uppercase at the start of a sentence
+                yield f"{line[0].title()}{line[1:]}", ()
+
+
+def read_ids(wordlist: str) -> Iterator[Tuple[str, Tuple[str, ...]]]:
+    with open(wordlist, "rt") as entries:
+        for line in entries:
+            id_variants = line.rstrip().split("\t")
+            if len(id_variants) != 2:
+                logging.warning("Found line with wrong format: %s", line)
+                continue
+            delim = id_variants[0].rindex(":")
+            label = id_variants[0][delim + 1 :]
+            for variant in id_variants[1].split("|"):
+                yield variant, (label,)
+
+
+READERS = {"words": read_words, "ids": read_ids}
+
+
+def build_automaton(
+    dictionaries: Sequence[Dictionary], finalize: bool = True
+) -> Tuple[Automaton, Tables]:
+    """
+    Compiles all dictionaries into a single automaton.
+
+    The value of an entry is an offset into the "payloads" table of integers.
+    There, the length of the entry is followed by the number of dictionaries
+    containing it and, for each of them in their order, its index, the
+    number of IDs and the IDs. An ID is an index into "id_offsets", which
+    delimits its UTF-8 encoding in "id_blob". IDs are thus stored once and
+    no Python objects are kept per entry.
+
+    Parameters
+    ----------
+    dictionaries : Sequence[Dictionary]
+        The dictionaries, in the order of their precedence
+    finalize : bool, optional
+        Call make_automaton, by default True
+
+    Returns
+    -------
+    Tuple[Automaton, Tables]
+        The automaton and the tables its values refer to
+
+    Raises
+    ------
+    ValueError
+        If the payloads exceed the values an automaton can store
+    """
+    ids: Dict[str, int] = {}
+    id_offsets = array("I", [0])
+    id_blob = bytearray()
+    entries: Dict[str, Dict[int, List[int]]] = {}
+    for index, dictionary in enumerate(dictionaries):
+        for word, names in READERS[dictionary.format](dictionary.wordlist):
+            if not word or word in dictionary.stopwords:
+                continue
+            numbers = entries.setdefault(word, {}).setdefault(index, [])
+            for name in names:
+                number = ids.get(name)
+                if number is None:
+                    number = ids[name] = len(id_offsets) - 1
+                    id_blob.extend(name.encode("utf-8"))
+                    id_offsets.append(len(id_blob))
+                numbers.append(number)
+    del ids
+    automaton = Automaton(STORE_INTS)
+    payloads = array("I")
+    for word, found in entries.items():
+        # Values are signed 32-bit integers
+        if len(payloads) > 0x7FFFFFFF:
+            raise ValueError("Too many entries for a single automaton")
+        automaton.add_word(word, len(payloads))
+        payloads.append(len(word))
+        payloads.append(len(found))
+        for index, numbers in found.items():
+            payloads.append(index)
+            payloads.append(len(numbers))
+            payloads.extend(numbers)
+    if finalize:
+        automaton.make_automaton()
+    tables = {
+        "payloads": payloads,
+        "id_offsets": id_offsets,
+        "id_blob": array("B", id_blob),
+    }
+    return automaton, tables
+
+
+def entity_key(entity: Annotation) -> Tuple[int, int]:
+    """
+    A sort key for Annotations.
+
+    Parameters
+    ----------
+    entity : Annotation
+        An Annotation.
+
+    Returns
+    -------
+    Tuple[int, int]
+        The start and the negated end, so that entities starting sooner
+        come first and, at the same start, wider entities.
+
+    """
+    return entity.start, -entity.end
+
+
+def remove_overlap(entities: List[Annotation]) -> List[Annotation]:
+    """
+    Removes shortes matches.
+    E.g. when 'hydrogen peroxide' and 'hydrogen' have overlapping
+    annotations, 'hydrogen peroxide' is returned.
+
+    Parameters
+    ----------
+    entities : List[Annotation]
+        A list of entities extracted from a text.
+
+    Returns
+    -------
+    List[Annotation]
+        The widest annotations in case of an overlap.
+
+    """
+    filtered = []
+    start = -1
+    end = -1
+    # util.filter_spans got introduced in spaCy 2.1.4 (May 12, 2019)
+    # https://spacy.io/api/top-level#util.filter_spans
+    # We keep this function since it is older and tested.
+    for entity in entities:
+        # The first entity will never satisfy these conditions
+        if entity.start >= start and entity.start <= end:
+            continue
+
+        filtered.append(entity)
+        start = entity.start
+        end = entity.end
+    return filtered
+
+
+def disambiguate(annotations: List[Annotation], label: str) -> List[Annotation]:
+    """
+    Narrows down the IDs of ambiguous annotations of a label
+    to the IDs of unambiguous ones, if there are any.
+    """
+    uniques = set()
+    for anno in annotations:
+        if anno.label == label and len(anno.ids) == 1:
+            uniques.update(anno.ids)
+    for i, anno in enumerate(annotations):
+        if anno.label != label or len(anno.ids) == 1:
+            continue
+        candidates = uniques.intersection(anno.ids)
+        if candidates:
+            annotations[i] = anno._replace(ids=tuple(candidates))
+    return annotations
+
+
+def merge_entities(entities: Sequence[Span], spans: Sequence[Span]) -> List[Span]:
+    """
+    Merges new spans into the existing entities of a document.
+    Existing entities overlapping a new span are dropped.
+
+    Parameters
+    ----------
+    entities : Sequence[Span]
+        The existing entities, sorted and without overlaps (as in doc.ents)
+    spans : Sequence[Span]
+        The new spans, sorted and without overlaps
+
+    Returns
+    -------
+    List[Span]
+        All spans in ascending order
+
+    """
+    merged = []
+    i = 0
+    for entity in entities:
+        while i < len(spans) and spans[i].end <= entity.start:
+            merged.append(spans[i])
+            i += 1
+        # Later spans start even further to the right
+        if i < len(spans) and spans[i].start < entity.end:
+            continue
+        merged.append(entity)
+    merged.extend(spans[i:])
+    return merged
+
+
+def context(text: str, start: int, end: int, width: int) -> Tuple[int, int]:
+    """
+    The boundaries of the sentence around a match, approximated by
+    ". " and limited to width characters on either side.
+    """
+    left = max(0, start - width)
+    right = min(len(text), end + width)
+    stop = text.rfind(". ", left, start)
+    if stop != -1:
+        left = stop + 2
+    elif left > 0:
+        # Do not cut a word
+        space = text.find(" ", left, start)
+        if space != -1:
+            left = space + 1
+    stop = text.find(". ", end, right)
+    if stop != -1:
+        right = stop + 1
+    elif right < len(text):
+        space = text.rfind(" ", end, right)
+        if space != -1:
+            right = space
+    return left, right
+
+
+@Language.factory(
+    "dictionarytagger",
+    default_config={"dictionaries": [], "cache_dir": None, "shared": False},
+)
+def my_component(
+    nlp,
+    name,
+    dictionaries: List[Dict[str, Any]],
+    cache_dir: Optional[str],
+    shared: bool,
+):
+    return DictionaryTagger(
+        [make_dictionary(**dictionary) for dictionary in dictionaries],
+        cache_dir=cache_dir,
+        shared=shared,
+    )
+
+
+class DictionaryTagger(Analyzer):
+    """
+    Tags the entries of several labelled dictionaries in a single scan.
+
+    All dictionaries are compiled into one Aho-Corasick automaton. Overlaps
+    are resolved across all labels at once, the widest match wins and, for
+    identical matches, the dictionary listed first. Adding a dictionary
+    thus costs no additional pass over the text.
+    """
+
+    field = "entities"
+    doc_section = "abstract"
+    name = "dictionary_tagger"
+    version = 2
+    positional = True
+
+    def __init__(
+        self,
+        dictionaries: List[Dictionary],
+        finalize: bool = True,
+        cache_dir: Optional[str] = None,
+        shared: bool = False,
+        pos_model: Optional[str] = None,
+        window: int = 150,
+    ):
+        """
+        Creates an Aho-Corasick automaton out of several dictionaries.
+
+        Parameters
+        ----------
+        dictionaries : List[Dictionary]
+            The dictionaries, in the order of their precedence
+        finalize : bool, optional
+            Call make_automaton, by default True
+        cache_dir : Optional[str], optional
+            Load the finalized automaton from this directory,
+            if it has been built from the same dictionaries before.
+        shared : bool, optional
+            Memory-map the automaton from the cache directory,
+            so that all processes share a single copy.
+        pos_model : Optional[str], optional
+            A spaCy model that decides whether entries which might not
+            be nouns, e.g. "lead", are nouns when tagging text without
+            a pipeline. It is loaded only when such an entry is found.
+            Without a model, these entries are never tagged in text.
+        window : int, optional
+            Maximum number of characters on either side of such an entry
+            that are tagged with the POS model, by default 150
+
+        Raises
+        ------
+        ValueError
+            If several dictionaries have the same label
+        """
+        super().__init__()
+        self.labels = [dictionary.label for dictionary in dictionaries]
+        duplicates = sorted(
+            {label for label in self.labels if self.labels.count(label) > 1}
+        )
+        if duplicates:
+            # The entities of a label are looked up in a single dictionary
+            raise ValueError(f"Duplicate dictionary labels: {', '.join(duplicates)}")
+        self.dictionaries = {
+            dictionary.label: dictionary for dictionary in dictionaries
+        }
+        if finalize:
+            self.automaton, tables = cached_automaton(
+                lambda: build_automaton(dictionaries),
+                "-".join(dictionary.label.lower() for dictionary in dictionaries),
+                [dictionary.wordlist for dictionary in dictionaries],
+                {
+                    "dictionaries": [
+                        [
+                            dictionary.label,
+                            dictionary.format,
+                            sorted(dictionary.stopwords),
+                        ]
+                        for dictionary in dictionaries
+                    ]
+                },
+                cache_dir,
+                shared,
+            )
+        else:
+            self.automaton, tables = build_automaton(dictionaries, finalize)
+        self.payloads = tables["payloads"]
+        self.id_offsets = tables["id_offsets"]
+        self.id_blob = tables["id_blob"]
+        self.plurals = frozenset(
+            index
+            for index, dictionary in enumerate(dictionaries)
+            if dictionary.plural
+        )
+        self.pos_model = pos_model
+        self.pos_nlp = None
+        self.window = window
+        if not Span.get_extension("id_candidates"):
+            Span.set_extension("id_candidates", default=object())
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        if isinstance(self.automaton, SharedAutomaton):
+            # Views of the mapped file, taken from the
+            # automaton again once it has been mapped
+            for name in ("payloads", "id_offsets", "id_blob"):
+                del state[name]
+        # Loaded again when needed
+        state["pos_nlp"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        if isinstance(self.automaton, SharedAutomaton):
+            tables = self.automaton.tables
+            self.payloads = tables["payloads"]
+            self.id_offsets = tables["id_offsets"]
+            self.id_blob = tables["id_blob"]
+        if not Span.get_extension("id_candidates"):
+            Span.set_extension("id_candidates", default=object())
+
+    @classmethod
+    def cache_params(cls, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Identifies word lists by the hash of their content, so that the
+        cached results are not reused once a dictionary has been compiled
+        again. The options of the automaton cache are left out.
+        """
+        settings = {
+            name: value
+            for name, value in params.items()
+            if name not in ("cache_dir", "shared")
+        }
+        if "wordlist" in settings:
+            settings["wordlist"] = automaton_key(settings["wordlist"])
+        if "dictionaries" in settings:
+            # Sorted, as the order of sets differs between processes
+            settings["dictionaries"] = [
+                dictionary._replace(
+                    wordlist=automaton_key(dictionary.wordlist),
+                    nouns=sorted(dictionary.nouns),
+                    stopwords=sorted(dictionary.stopwords),
+                )
+                for dictionary in settings["dictionaries"]
+            ]
+        return settings
+
+    def __call__(self, doc):
+        """
+        Applies the tagger automaton to the text.
+
+        Parameters
+        ----------
+        doc : Doc
+            The document we want to search for entities
+
+        """
+        return self.retokenize(doc, self.annotate(doc.text))
+
+    def process(self, text: str) -> Dict[str, Any]:
+        return next(self.process_batch([text]))
+
+    def process_batch(self, texts: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Tags raw texts without a spaCy pipeline.
+
+        Only entries which might not be nouns are checked with the POS
+        model, on the sentences around them. All such sentences of the
+        batch are tagged together.
+
+        Parameters
+        ----------
+        texts : Iterable[str]
+            The texts we want to search for entities
+
+        Yields
+        ------
+        Dict[str, Any]
+            The entities of a text as [start, end, label, ids] lists
+        """
+        texts = list(texts)
+        annotations = [self.annotate(text) for text in texts]
+        windows = {}
+        for text, annos in zip(texts, annotations):
+            for anno in annos:
+                if self.ambiguous(anno):
+                    left, right = context(text, anno.start, anno.end, self.window)
+                    windows.setdefault(text[left:right], []).append((anno, left))
+        nouns = set()
+        if windows and self.pos_model is not None:
+            if self.pos_nlp is None:
+                self.pos_nlp = spacy.load(
+                    self.pos_model, exclude=["parser", "ner", "lemmatizer"]
+                )
+            for doc, annos in zip(self.pos_nlp.pipe(windows), windows.values()):
+                offsets = {
+                    (token.idx, token.idx + len(token))
+                    for token in doc
+                    if token.pos == NOUN
+                }
+                for anno, left in annos:
+                    if (anno.start - left, anno.end - left) in offsets:
+                        nouns.add(id(anno))
+        for annos in annotations:
+            yield {
+                self.field: [
+                    [anno.start, anno.end, anno.label, list(anno.ids)]
+                    for anno in annos
+                    if id(anno) in nouns or not self.ambiguous(anno)
+                ]
+            }
+
+    def ids(self, position: int) -> Tuple[str, ...]:
+        """
+        The IDs stored at a position of the payloads, after their number.
+        """
+        count = self.payloads[position]
+        offsets = self.id_offsets
+        blob = self.id_blob
+        return tuple(
+            blob[offsets[number] : offsets[number + 1]].tobytes().decode("utf-8")
+            for number in self.payloads[position + 1 : position + 1 + count]
+        )
+
+    def ambiguous(self, annotation: Annotation) -> bool:
+        """
+        Whether an annotation is only an entity if it is a noun.
+        """
+        return annotation.name in self.dictionaries[annotation.label].nouns
+
+    def annotate(self, text: str) -> List[Annotation]:
+        """
+        Finds the entries of all dictionaries in a text.
+
+        Parameters
+        ----------
+        text : str
+            The text we want to search for entities
+
+        Returns
+        -------
+        List[Annotation]
+            Non-overlapping annotations in ascending order
+        """
+        payloads = self.payloads
+        # The leftmost-longest matches found so far, ascending, as
+        # start, end, dictionary index and the position of its IDs
+        selected = []
+        # Start and end of the last one
+        last_start = last_end = -1
+        length = len(text)
+        for end, offset in self.automaton.iter(text):
+            end += 1
+            start = end - payloads[offset]
+            if start > last_start:
+                if start <= last_end:
+                    # Starts within a selected match further left
+                    continue
+                i = len(selected)
+            else:
+                # Matches arrive ordered by their end, so this one covers
+                # all selected matches starting at or after its start
+                i = len(selected) - 1
+                while i and selected[i - 1][0] >= start:
+                    i -= 1
+                if i and start <= selected[i - 1][1]:
+                    continue
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            # Simple plural rule
+            exact = length == end or not text[end].isalnum()
+            plural = (
+                not exact
+                and text[end] == "s"
+                and (length == end + 1 or not text[end + 1].isalnum())
+            )
+            position = offset + 2
+            for _ in range(payloads[offset + 1]):
+                index = payloads[position]
+                if exact or plural and index in self.plurals:
+                    del selected[i:]
+                    selected.append((start, end, index, position + 1))
+                    last_start = start
+                    last_end = end
+                    break
+                position += 2 + payloads[position + 1]
+        # Labels and IDs are only materialized for the selected matches
+        annotations = [
+            Annotation(
+                text[start:end], self.labels[index], start, end, self.ids(position)
+            )
+            for start, end, index, position in selected
+        ]
+        for label, dictionary in self.dictionaries.items():
+            if dictionary.disambiguate:
+                annotations = disambiguate(annotations, label)
+        return annotations
+
+    def retokenize(self, doc: Doc, annotations: List[Annotation]) -> Doc:
+        """
+        Adds the annotations aligned to token boundaries as entities
+        and merges multi-token entities into single tokens.
+        """
+        # Char offset -> token index, the first token wins as in list.index
+        starts = {token.idx: token.i for token in reversed(doc)}
+        ends = {token.idx + len(token): token.i for token in reversed(doc)}
+        spans = []
+        for annotation in annotations:
+            s = starts.get(annotation.start)
+            e = ends.get(annotation.end)
+            if s is not None and e is not None:
+                if s == e and self.ambiguous(annotation) and doc[s].pos != NOUN:
+                    continue
+                span = Span(doc, s, e + 1, label=annotation.label)
+                if annotation.ids:
+                    span._.set("id_candidates", annotation.ids)
+                spans.append(span)
+        if spans:
+            if doc.ents:
+                doc.ents = merge_entities(doc.ents, spans)
+            else:
+                try:
+                    doc.ents += tuple(spans)
+                except ValueError as e:
+                    if e.args[0].startswith("[E103]"):
+                        # Trying to set conflicting doc.ents
+                        # Should have been resolved by remove_overlap (ents from same tagger)
+                        # and merge_entities (ents from different tagger)
+                        span_re = re.compile("'\\((\\d+),\\s(\\d+),\\s'[^']+'\\)'")
+                        message = e.args[0]
+                        m = span_re.search(message)
+                        if not m is None:
+                            start1 = int(m.group(1))
+                            end1 = int(m.group(2))
+                            m = span_re.search(message, m.end() + 1)
+                            if not m is None:
+                                start2 = int(m.group(1))
+                                end2 = int(m.group(2))
+                                logging.error(e)
+                                logging.error(
+                                    "First span: %s, second span: %s",
+                                    doc[start1:end1].text,
+                                    doc[start2:end2].text,
+                                )
+                            else:
+                                logging.error(e)
+                        else:
+                            logging.error(e)
+                    else:
+                        logging.error(e)
+                    return doc
+            with doc.retokenize() as retok:
+                for span in spans:
+                    if span.end - span.start > 1:
+                        retok.merge(doc[span.start : span.end])
+        return doc
+
+
+def tagger_parser(description: str, dictionary: str) -> argparse.ArgumentParser:
+    """
+    The command line options shared by the dictionary taggers.
+
+    Parameters
+    ----------
+    description : str
+        Description of the program
+    dictionary : str
+        Help text of the path to the dictionary
+
+    Returns
+    -------
+    argparse.ArgumentParser
+        A parser, to which a tagger may add its own options
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("dictionary", type=str, help=dictionary)
+    parser.add_argument(
+        "-p",
+        "--parallel",
+        metavar="N",
+        type=int,
+        help="Distribute the computation on multiple cores",
+    )
+    parser.add_argument(
+        "--batch", type=int, help="Batch size of bulk import", default=100
+    )
+    parser.add_argument(
+        "--time-budget",
+        metavar="SECONDS",
+        type=float,
+        help="Maximum processing time per document",
+    )
+    parser.add_argument(
+        "--max-chars",
+        metavar="N",
+        type=int,
+        help="Truncate longer texts at a sentence boundary",
+    )
+    parser.add_argument(
+        "--outliers",
+        metavar="FILE",
+        type=str,
+        help="Record documents exceeding the time budget as JSON lines",
+    )
+    parser.add_argument(
+        "--latency-file",
+        metavar="FILE",
+        type=str,
+        default="latency.json",
+        help="Where to store the slowest documents and the latency histogram",
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help="Show the latency report of the last run instead of processing documents",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="N",
+        type=int,
+        help="Profile the first N batches of every worker",
+    )
+    parser.add_argument(
+        "--profiler",
+        choices=PROFILERS,
+        default="cprofile",
+        help="cProfile or a sampling profiler with flamegraph-compatible output",
+    )
+    parser.add_argument(
+        "--profile-output",
+        metavar="PREFIX",
+        type=str,
+        default="profile",
+        help="Path prefix of the merged profile",
+    )
+    parser.add_argument(
+        "--order-by",
+        metavar="ATTRIBUTE",
+        type=str,
+        help="Process documents in the order of this attribute, e.g. an import timestamp or a priority",
+    )
+    parser.add_argument(
+        "--ascending",
+        action="store_true",
+        help="Process the lowest values of --order-by first instead of the highest",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="FILE",
+        type=str,
+        help="Reuse the results of documents with identical content from this SQLite cache",
+    )
+    parser.add_argument(
+        "--cache-size",
+        metavar="MB",
+        type=int,
+        default=1024,
+        help="Size limit of the result cache, least recently used results are evicted first",
+    )
+    parser.add_argument(
+        "--automaton-cache",
+        metavar="DIR",
+        type=str,
+        help="Load the prebuilt automaton of the dictionary from this directory",
+    )
+    parser.add_argument(
+        "--shared-automaton",
+        action="store_true",
+        help="Memory-map the automaton from --automaton-cache, shared by all workers",
+    )
+    return parser
+
+
+def run_tagger(feature: str, tagger, params: Dict[str, Any], args: argparse.Namespace):
+    """
+    Tags the documents of the database as requested on the command line.
+
+    Parameters
+    ----------
+    feature : str
+        Name of the feature in the latency report
+    tagger : type
+        A subclass of DictionaryTagger
+    params : Dict[str, Any]
+        Arguments of the tagger besides the automaton cache
+    args : argparse.Namespace
+        The options parsed by a tagger_parser
+    """
+    if args.report:
+        print(LatencyTracker.load(args.latency_file).report(feature))
+        sys.exit(0)
+    params = dict(
+        params, cache_dir=args.automaton_cache, shared=args.shared_automaton
+    )
+    transformer = DocTransformer(
+        feature,
+        tagger,
+        params,
+        budget=Budget(args.time_budget, args.max_chars),
+        outlier_file=args.outliers,
+        latency_file=args.latency_file,
+        profile=None
+        if args.profile is None
+        else Profile(args.profile, args.profiler, args.profile_output),
+        order_by=args.order_by,
+        descending=not args.ascending,
+        cache=None
+        if args.cache is None
+        else CacheConfig(args.cache, args.cache_size),
+    )
+    if args.parallel is None:
+        transformer.main(args.batch)
+    else:
+        transformer.parallel_main(args.parallel, args.batch)
@@ -6,20 +6,16 @@ Created on Fri Jun 19 11:21:10 2020
 @author: tech
 """
 
-import logging
-import re  # Only used in exception handling
-from collections import namedtuple
-from functools import cmp_to_key
-from pathlib import Path
-from scicopia_tools.analyzers import Analyzer
-from typing import Iterable, List
+from typing import Optional
 
-from ahocorasick import Automaton
-from intervaltree import IntervalTree
 from spacy.language import Language
-from spacy.tokens import Span
 
-Annotation = namedtuple("Annotation", ["name", "label", "start", "end"])
+from scicopia_tools.components.DictionaryTagger import (
+    DictionaryTagger,
+    make_dictionary,
+    run_tagger,
+    tagger_parser,
+)
 
 NEGATIVE_TAX = set(
     [
@@ -56,226 +52,60 @@ NEGATIVE_TAX = set(
 )
 
 
-@Language.factory("taxontagger", default_config={"wordlist": ""})
-def my_component(nlp, name, wordlist: str):
-    return TaxonTagger(wordlist)
+@Language.factory(
+    "taxontagger", default_config={"wordlist": "", "cache_dir": None, "shared": False}
+)
+def my_component(nlp, name, wordlist: str, cache_dir: Optional[str], shared: bool):
+    return TaxonTagger(wordlist, cache_dir=cache_dir, shared=shared)
 
 
-class TaxonTagger(Analyzer):
+class TaxonTagger(DictionaryTagger):
 
     field = "taxa"
     doc_section = "abstract"
     label = "TAXON"
     name = "taxon_tagger"
 
-    def __init__(self, wordlist: str, finalize: bool = True):
+    def __init__(
+        self,
+        wordlist: str,
+        finalize: bool = True,
+        cache_dir: Optional[str] = None,
+        shared: bool = False,
+    ):
         """
         Creates an Aho-Corasick automaton out of a text file.
 
         :param wordlist: An open file with one entity per line.
+        :param cache_dir: Load the finalized automaton from this directory,
+            if it has been built from the same word list before.
+        :param shared: Memory-map the automaton from the cache directory,
+            so that all processes share a single copy.
 
         """
-        super().__init__()
-        automaton = Automaton()
-        lifeforms = dict()
-        with open(wordlist, "rt") as taxa:
-            for line in taxa:
-                id_taxons = line.rstrip().split("\t")
-                if len(id_taxons) != 2:
-                    logging.warning("Found line with wrong format: %s", line)
-                    continue
-                delim = id_taxons[0].rindex(":")
-                label = id_taxons[0][delim + 1 :]
-                variants = id_taxons[1].split("|")
-                for v in variants:
-                    if v in NEGATIVE_TAX:
-                        continue
-                    if v in lifeforms:
-                        dictvalue = lifeforms[v]
-                        if isinstance(dictvalue, str):
-                            dictvalue = tuple([dictvalue, label])
-                        else:  # tuple
-                            dictvalue = list(dictvalue)
-                            dictvalue.append(label)
-                            dictvalue = tuple(dictvalue)
-                        lifeforms[v] = dictvalue
-                    else:
-                        lifeforms[v] = (label,)
-
-        for key in lifeforms:
-            if key != "":
-                _ = automaton.add_word(key, (key, lifeforms[key]))
+        super().__init__(
+            [TaxonTagger.dictionary(wordlist)], finalize, cache_dir, shared
+        )
 
-        if finalize:
-            automaton.make_automaton()
-        self.automaton = automaton
-        self.EntityKey = cmp_to_key(TaxonTagger.entity_sort)
-        if not Span.get_extension("id_candidates"):
-            Span.set_extension("id_candidates", default=object())
-
-    def __call__(self, doc):
+    def dictionary(wordlist: str):
         """
-        Applies the tagger automaton to the text.
-
-        Parameters
-        ----------
-        text : str
-            The text we want to search for entities
-        tagger : Automaton
-            An instance of an Aho-Corasick automaton
-
+        The taxa as a dictionary for a DictionaryTagger.
+        The IDs of ambiguous names are narrowed down to
+        those mentioned unambiguously in the same text.
         """
-        text = doc.text
-        annotations = []
-        for end, (key, labels) in self.automaton.iter(text):
-            end += 1
-            if len(text) != end and text[end].isalnum():
-                continue
-            start = end - len(key) - 1
-            if start >= 0 and text[start].isalnum():
-                continue
-            annotations.append(Annotation(key, labels, start + 1, end))
-        annotations.sort(key=self.EntityKey)
-        annotations = TaxonTagger.remove_overlap(annotations)
-        annotations = TaxonTagger.disambiguate(annotations)
-        return self.retokenize(doc, annotations)
-
-    def disambiguate(annotations):
-        uniques = set()
-        for i, anno in enumerate(annotations):
-            if len(anno.label) == 1:
-                uniques.update(anno.label)
-        for i, anno in enumerate(annotations):
-            if len(anno.label) == 1:
-                continue
-            candidates = uniques.intersection(anno.label)
-            if candidates:
-                annotations[i] = Annotation(
-                    anno.name, tuple(candidates), anno.start, anno.end
-                )
-        return annotations
-
-    def retokenize(self, doc, annotations):
-        start = [token.idx for token in doc]
-        end = [token.idx + len(token) for token in doc]
-        spans = []
-        for annotation in annotations:
-            if annotation.start in start and annotation.end in end:
-                s = start.index(annotation.start)
-                e = end.index(annotation.end)
-                span = Span(doc, s, e + 1, label="TAXON")
-                span._.set("id_candidates", annotation.label)
-                spans.append(span)
-        if spans:
-            if doc.ents:
-                tree = IntervalTree()
-                for ent in doc.ents:
-                    tree[ent.start : ent.end] = ent
-                for span in spans:
-                    tree.remove_overlap(span.start, span.end)
-                    tree.addi(span.start, span.end, span)
-                spans = tuple(
-                    span
-                    for (
-                        _,
-                        _,
-                        span,
-                    ) in tree
-                )
-                doc.ents = spans
-            else:
-                try:
-                    doc.ents += tuple(spans)
-                except ValueError as e:
-                    if e.args[0].startswith("[E103]"):
-                        # Trying to set conflicting doc.ents
-                        # Should have been resolved by remove_overlap (ents from same tagger)
-                        # and the use of an interval tree (ents from different tagger)
-                        span_re = re.compile(
-                            f"'\\((\\d+),\\s(\\d+),\\s'{TaxonTagger.label}'\\)'"
-                        )
-                        message = e.args[0]
-                        m = span_re.search(message)
-                        if not m is None:
-                            start1 = int(m.group(1))
-                            end1 = int(m.group(2))
-                            m = span_re.search(message, m.end() + 1)
-                            if not m is None:
-                                start2 = int(m.group(1))
-                                end2 = int(m.group(2))
-                                logging.error(e)
-                                logging.error(
-                                    "First span: %s, second span: %s",
-                                    doc[start1:end1].text,
-                                    doc[start2:end2].text,
-                                )
-                            else:
-                                logging.error(e)
-                        else:
-                            logging.error(e)
-                    else:
-                        logging.error(e)
-                    return doc
-            with doc.retokenize() as retok:
-                for span in spans:
-                    if span.end - span.start > 1:
-                        retok.merge(doc[span.start : span.end])
-        return doc
-
-    def entity_sort(entity1: Annotation, entity2: Annotation) -> int:
-        """
-        A comparison function for Annotations.
-
-        Parameters
-        ----------
-        entity1 : Annotation
-            An Annotation.
-        entity2 : Annotation
-            Another Annotation.
-
-        Returns
-        -------
-        int
-            -1, if entity1 starts sooner
-             1, if entity1 starts later
-             the difference between the end of entity2 and entity1 otherwise.
-
-        """
-        if entity1.start < entity2.start:
-            return -1
-        if entity1.start > entity2.start:
-            return 1
-        return entity2.end - entity1.end
-
-    def remove_overlap(entities: List[Annotation]) -> List[Annotation]:
-        """
-        Removes shortes matches.
-        E.g. when 'hydrogen peroxide' and 'hydrogen' have overlapping
-        annotations, 'hydrogen peroxide' is returned.
-
-        Parameters
-        ----------
-        entities : List[Annotation]
-            A list of entities extracted from a text.
-
-        Returns
-        -------
-        List[Annotation]
-            The widest annotations in case of an overlap.
-
-        """
-        filtered = []
-        start = -1
-        end = -1
-        # util.filter_spans got introduced in spaCy 2.1.4 (May 12, 2019)
-        # https://spacy.io/api/top-level#util.filter_spans
-        # We keep this function since it is older and tested.
-        for entity in entities:
-            # The first entity will never satisfy these conditions
-            if entity.start >= start and entity.start <= end:
-                continue
-
-            filtered.append(entity)
-            start = entity.start
-            end = entity.end
-        return filtered
+        return make_dictionary(
+            TaxonTagger.label,
+            wordlist,
+            "ids",
+            stopwords=NEGATIVE_TAX,
+            disambiguate=True,
+        )
+
+
+if __name__ == "__main__":
+    PARSER = tagger_parser(
+        "Tag the taxa of the documents in the Arango database",
+        "Path to the taxa, an ID and |-separated names per line",
+    )
+    ARGS = PARSER.parse_args()
+    run_tagger("taxon_ner", TaxonTagger, {"wordlist": ARGS.dictionary}, ARGS)
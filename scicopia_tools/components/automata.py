@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A cache of finalized Aho-Corasick automata.
+
+Building the automaton of a large word list, e.g. the full NCBI taxonomy,
+takes minutes and used to be repeated by every tagger instance, i.e. once
+per dask worker. The finalized automaton is pickled once and loaded by all
+later instances. Unpickling the whole automaton is considerably faster
+than Automaton.save and ahocorasick.load, which deserialize every value
+separately. A cache entry is keyed by a hash of the word list and the
+options that influence the automaton, so an edited word list or different
+options simply miss the cache.
+
+In shared mode, the automaton is written into a flat file instead, which
+SharedAutomaton maps read-only. All workers on a node then share the pages
+of a single copy through the page cache. Transitions are kept in an open
+addressing hash table keyed by node and code point, alongside the failure
+and output links and a table of pickled values. Integer values, as stored
+by an Automaton(STORE_INTS), are kept in the table directly instead.
+
+The values of an automaton may refer to tables of integers or bytes, e.g.
+the IDs of the entries. These arrays are cached and shared with it.
+
+Usage:
+    python -m scicopia_tools.components.automata chemicals WORDLIST CACHE_DIR
+    python -m scicopia_tools.components.automata taxa WORDLIST CACHE_DIR
+"""
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import time
+from array import array
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from ahocorasick import Automaton
+
+logger = logging.getLogger("scicopia_tools.components.automata")
+
+# Part of every key, increased when the way automata are built changes
+FORMAT_VERSION = 3
+
+# Arrays the values of an automaton refer to
+Tables = Dict[str, Sequence[int]]
+
+
+def automaton_key(
+    wordlist: Union[str, Sequence[str]], options: Dict[str, Any] = None
+) -> str:
+    """
+    A hash of the contents of one or more word lists and the build options.
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps([FORMAT_VERSION, options or {}], sort_keys=True).encode("utf-8")
+    )
+    for path in [wordlist] if isinstance(wordlist, str) else wordlist:
+        with open(path, "rb") as words:
+            for block in iter(lambda: words.read(1 << 20), b""):
+                digest.update(block)
+        # Separates the contents of consecutive word lists
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def cache_path(cache_dir: str, name: str, key: str) -> str:
+    return os.path.join(cache_dir, f"{name}-{key[:32]}.automaton")
+
+
+def load_automaton(path: str) -> Optional[Tuple[Automaton, Tables]]:
+    """
+    Loads a saved automaton and its tables,
+    or returns None if there is no valid one.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as cached:
+            return pickle.load(cached)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError) as e:
+        logger.warning("Ignoring the invalid automaton cache %s: %s", path, e)
+        return None
+
+
+def save_automaton(automaton: Automaton, tables: Tables, path: str):
+    """
+    Saves an automaton and its tables. Other processes
+    only ever see a complete file, as it is renamed into place.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(handle)
+    try:
+        with open(temporary, "wb") as cached:
+            pickle.dump(
+                (automaton, tables), cached, protocol=pickle.HIGHEST_PROTOCOL
+            )
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+MAGIC = b"SCIAC\x00\x00\x01"
+# Marks free slots of the transition table and nodes without a value
+NONE = 0xFFFFFFFF
+EMPTY = 0xFFFFFFFFFFFFFFFF
+# Fibonacci hashing
+MULTIPLIER = 0x9E3779B97F4A7C15
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _aligned(data: bytearray):
+    data.extend(b"\x00" * (-len(data) % 8))
+
+
+def write_shared_automaton(
+    items: Iterable[Tuple[str, Any]], path: str, tables: Optional[Tables] = None
+):
+    """
+    Builds an Aho-Corasick automaton and writes it into a flat file.
+
+    Parameters
+    ----------
+    items : Iterable[Tuple[str, Any]]
+        Words and their picklable values, e.g. Automaton.items().
+        If all of them are integers, they are stored unpickled.
+    path : str
+        The file SharedAutomaton maps
+    tables : Optional[Tables], optional
+        Arrays the values refer to, stored alongside
+    """
+    children = [{}]
+    node_values = array("I", [NONE])
+    values = []
+    for word, value in items:
+        node = 0
+        for char in word:
+            child = children[node].get(char)
+            if child is None:
+                child = len(children)
+                children[node][char] = child
+                children.append({})
+                node_values.append(NONE)
+            node = child
+        if node_values[node] == NONE:
+            node_values[node] = len(values)
+            values.append(value)
+    blob = bytearray()
+    ints = all(type(value) is int for value in values)
+    if ints:
+        value_offsets = array("q", values)
+    else:
+        value_offsets = array("Q", [0])
+        for value in values:
+            blob.extend(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            value_offsets.append(len(blob))
+    words = len(values)
+    del values
+    nodes = len(children)
+    fail = array("I", bytes(4 * nodes))
+    outputs = array("I", [NONE]) * nodes
+    queue = deque(children[0].values())
+    while queue:
+        node = queue.popleft()
+        for char, child in children[node].items():
+            state = fail[node]
+            while state and char not in children[state]:
+                state = fail[state]
+            target = children[state].get(char, 0) if node else 0
+            fail[child] = target
+            outputs[child] = target if node_values[target] != NONE else outputs[target]
+            queue.append(child)
+    edges = nodes - 1
+    bits = max(edges * 2, 2).bit_length()
+    keys = array("Q", [EMPTY]) * (1 << bits)
+    targets = array("I", bytes(4 * (1 << bits)))
+    shift = 64 - bits
+    size_mask = (1 << bits) - 1
+    for node, table in enumerate(children):
+        for char, child in table.items():
+            key = node << 21 | ord(char)
+            slot = ((key * MULTIPLIER) & MASK64) >> shift
+            while keys[slot] != EMPTY:
+                slot = (slot + 1) & size_mask
+            keys[slot] = key
+            targets[slot] = child
+    del children
+
+    data = bytearray()
+    layout = {}
+    for name, values in (
+        ("keys", keys),
+        ("targets", targets),
+        ("fail", fail),
+        ("outputs", outputs),
+        ("node_values", node_values),
+        ("value_offsets", value_offsets),
+    ):
+        layout[name] = [len(data), values.typecode, len(values)]
+        data.extend(values.tobytes())
+        _aligned(data)
+    layout["blob"] = [len(data), "B", len(blob)]
+    data.extend(blob)
+    _aligned(data)
+    extra = {}
+    for name, values in (tables or {}).items():
+        extra[name] = [len(data), values.typecode, len(values)]
+        data.extend(values.tobytes())
+        _aligned(data)
+    header = json.dumps(
+        {
+            "arrays": layout,
+            "tables": extra,
+            "shift": shift,
+            "words": words,
+            "ints": ints,
+        }
+    ).encode("utf-8")
+    prefix = bytearray(MAGIC + struct.pack("<Q", len(header)) + header)
+    _aligned(prefix)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as flat:
+            flat.write(prefix)
+            flat.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+class SharedAutomaton:
+    """
+    A finalized Aho-Corasick automaton mapped read-only from a file
+    written by write_shared_automaton. It offers the parts of the
+    interface of pyahocorasick's Automaton used by the taggers.
+    """
+
+    def __init__(self, path: str):
+        """
+        Parameters
+        ----------
+        path : str
+            A file written by write_shared_automaton
+
+        Raises
+        ------
+        ValueError
+            If the file is not a shared automaton
+        """
+        self.path = path
+        with open(path, "rb") as flat:
+            self.mmap = mmap.mmap(flat.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mmap[: len(MAGIC)] != MAGIC:
+            self.mmap.close()
+            raise ValueError(f"Not a shared automaton: {path}")
+        (length,) = struct.unpack_from("<Q", self.mmap, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(self.mmap[start : start + length])
+        base = start + length + (-(start + length) % 8)
+        self.view = view = memoryview(self.mmap)
+
+        def cast(offset, typecode, count):
+            size = array(typecode).itemsize
+            return view[base + offset : base + offset + size * count].cast(typecode)
+
+        arrays = {
+            name: cast(*layout) for name, layout in header["arrays"].items()
+        }
+        # Arrays the values refer to
+        self.tables = {
+            name: cast(*layout) for name, layout in header["tables"].items()
+        }
+        self.keys = arrays["keys"]
+        self.targets = arrays["targets"]
+        self.fail = arrays["fail"]
+        self.outputs = arrays["outputs"]
+        self.node_values = arrays["node_values"]
+        # The values themselves in case of integers,
+        # otherwise the offsets of the pickled values in the blob
+        self.value_offsets = arrays["value_offsets"]
+        self.blob = arrays["blob"]
+        self.ints = header.get("ints", False)
+        self.shift = header["shift"]
+        self.size_mask = len(self.keys) - 1
+        self.words = header["words"]
+
+    def __getstate__(self) -> Dict[str, str]:
+        # Unpickled copies, e.g. on dask workers, map the file themselves
+        return {"path": self.path}
+
+    def __setstate__(self, state: Dict[str, str]):
+        self.__init__(state["path"])
+
+    def __len__(self) -> int:
+        return self.words
+
+    def goto(self, node: int, char: str) -> int:
+        """
+        The child of a node, or NONE.
+        """
+        key = node << 21 | ord(char)
+        slot = ((key * MULTIPLIER) & MASK64) >> self.shift
+        keys = self.keys
+        while True:
+            found = keys[slot]
+            if found == key:
+                return self.targets[slot]
+            if found == EMPTY:
+                return NONE
+            slot = (slot + 1) & self.size_mask
+
+    def value(self, node: int) -> Any:
+        index = self.node_values[node]
+        if self.ints:
+            return self.value_offsets[index]
+        start = self.value_offsets[index]
+        return pickle.loads(self.blob[start : self.value_offsets[index + 1]])
+
+    def walk(self, word: str) -> int:
+        node = 0
+        for char in word:
+            node = self.goto(node, char)
+            if node == NONE:
+                break
+        return node
+
+    def exists(self, word: str) -> bool:
+        node = self.walk(word)
+        return node != NONE and self.node_values[node] != NONE
+
+    def get(self, word: str, default: Any = None) -> Any:
+        node = self.walk(word)
+        if node == NONE or self.node_values[node] == NONE:
+            return default
+        return self.value(node)
+
+    def longest_prefix(self, string: str) -> int:
+        """
+        The length of the longest prefix of string that exists in the trie.
+        """
+        node = 0
+        for length, char in enumerate(string):
+            node = self.goto(node, char)
+            if node == NONE:
+                return length
+        return len(string)
+
+    def iter(self, text: str) -> Iterator[Tuple[int, Any]]:
+        """
+        Like Automaton.iter: the index of the last character
+        and the value of every match, longest first.
+        """
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+        node_values = self.node_values
+        state = 0
+        for end, char in enumerate(text):
+            while True:
+                child = goto(state, char)
+                if child != NONE:
+                    state = child
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            match = state if node_values[state] != NONE else outputs[state]
+            while match != NONE:
+                yield end, self.value(match)
+                match = outputs[match]
+
+    def close(self):
+        for name in (
+            "keys",
+            "targets",
+            "fail",
+            "outputs",
+            "node_values",
+            "value_offsets",
+            "blob",
+        ):
+            getattr(self, name).release()
+        for table in self.tables.values():
+            table.release()
+        self.view.release()
+        self.mmap.close()
+
+
+def shared_automaton(
+    build: Callable[[], Tuple[Automaton, Tables]], path: str
+) -> Tuple[SharedAutomaton, Tables]:
+    if os.path.exists(path):
+        try:
+            automaton = SharedAutomaton(path)
+            return automaton, automaton.tables
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring the invalid automaton cache %s: %s", path, e)
+    automaton, tables = build()
+    write_shared_automaton(automaton.items(), path, tables)
+    automaton = SharedAutomaton(path)
+    return automaton, automaton.tables
+
+
+def cached_automaton(
+    build: Callable[[], Tuple[Automaton, Tables]],
+    name: str,
+    wordlist: Union[str, Sequence[str]],
+    options: Dict[str, Any] = None,
+    cache_dir: Optional[str] = None,
+    shared: bool = False,
+) -> Tuple[Union[Automaton, SharedAutomaton], Tables]:
+    """
+    Loads a finalized automaton from the cache or builds and caches it.
+
+    Parameters
+    ----------
+    build : Callable[[], Tuple[Automaton, Tables]]
+        Builds the finalized automaton and the tables its values refer to
+    name : str
+        A prefix of the file name, e.g. "chemicals"
+    wordlist : Union[str, Sequence[str]]
+        The word lists the automaton is built from
+    options : Dict[str, Any], optional
+        Further options that influence the automaton
+    cache_dir : Optional[str], optional
+        Where the automata are kept, by default None, i.e. no caching
+    shared : bool, optional
+        Map a flat file shared by all processes instead of loading
+        a private copy, by default False. Requires a cache_dir.
+
+    Returns
+    -------
+    Tuple[Union[Automaton, SharedAutomaton], Tables]
+        The finalized automaton and its tables
+
+    Raises
+    ------
+    ValueError
+        If a shared automaton is requested without a cache_dir
+    """
+    start = time.perf_counter()
+    if cache_dir is None:
+        if shared:
+            raise ValueError("A shared automaton needs a cache directory")
+        compiled = build()
+        logger.info("Built %s automaton in %.2f s", name, time.perf_counter() - start)
+        return compiled
+    path = cache_path(cache_dir, name, automaton_key(wordlist, options))
+    if shared:
+        compiled = shared_automaton(build, f"{path}.shared")
+        logger.info(
+            "Mapped shared %s automaton in %.2f s", name, time.perf_counter() - start
+        )
+        return compiled
+    compiled = load_automaton(path)
+    if compiled is not None:
+        logger.info(
+            "Loaded %s automaton from %s in %.2f s",
+            name,
+            path,
+            time.perf_counter() - start,
+        )
+        return compiled
+    compiled = build()
+    save_automaton(*compiled, path)
+    logger.info(
+        "Built %s automaton in %.2f s and saved it to %s",
+        name,
+        time.perf_counter() - start,
+        path,
+    )
+    return compiled
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(
+        description="Build the automaton of a word list ahead of time"
+    )
+    PARSER.add_argument(
+        "tagger", choices=["chemicals", "taxa"], help="The tagger the word list is for"
+    )
+    PARSER.add_argument("wordlist", type=str, help="Path to the word list")
+    PARSER.add_argument("cache_dir", type=str, help="The automaton cache directory")
+    PARSER.add_argument(
+        "--shared",
+        action="store_true",
+        help="Build the flat file memory-mapped by all workers",
+    )
+    ARGS = PARSER.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if ARGS.tagger == "chemicals":
+        from scicopia_tools.components.ChemTagger import ChemTagger
+
+        ChemTagger(ARGS.wordlist, cache_dir=ARGS.cache_dir, shared=ARGS.shared)
+    else:
+        from scicopia_tools.components.TaxonTagger import TaxonTagger
+
+        TaxonTagger(ARGS.wordlist, cache_dir=ARGS.cache_dir, shared=ARGS.shared)
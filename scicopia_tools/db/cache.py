@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content-addressed cache of analyzer results.
+
+The same abstract is often imported several times, e.g. from arXiv and
+PubMed. Results are stored in a local SQLite database under the hash of the
+analyzer, its version and parameters and the analyzed text, so every copy
+after the first one is looked up instead of computed. The cache is bounded
+in size, the least recently used results are evicted first.
+
+Analyzers have to increase their `version` attribute whenever their output
+changes, otherwise stale results will be served.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger("scicopia_tools.db.cache")
+
+# path: location of the SQLite database
+# max_mb: size limit of the stored results in megabytes
+CacheConfig = namedtuple("CacheConfig", ["path", "max_mb"])
+
+
+def cache_namespace(Analyzer, params: Dict[str, Any] = None) -> str:
+    """
+    Identifies the results of an analyzer class, its version and parameters,
+    as far as they are relevant according to its cache_params.
+    """
+    if not isinstance(Analyzer, type):
+        Analyzer = type(Analyzer)
+    version = getattr(Analyzer, "version", 0)
+    params = params or {}
+    cache_params = getattr(Analyzer, "cache_params", None)
+    if cache_params is not None:
+        params = cache_params(params)
+    settings = json.dumps(params, sort_keys=True, default=str)
+    return f"{Analyzer.__module__}.{Analyzer.__qualname__}:{version}:{settings}"
+
+
+class ResultCache:
+    def __init__(
+        self,
+        path: str,
+        Analyzer,
+        params: Dict[str, Any] = None,
+        max_mb: int = 1024,
+    ):
+        """
+        Opens or creates a cache.
+        Several processes may share the same file.
+
+        Parameters
+        ----------
+        path : str
+            Location of the SQLite database
+        Analyzer : Type[Analyzer]
+            The analyzer (class or instance) whose results are cached
+        params : Dict[str, Any], optional
+            The parameters the analyzer has been created with, by default None
+        max_mb : int, optional
+            Size limit of the stored results in megabytes, by default 1024
+        """
+        self.namespace = cache_namespace(Analyzer, params).encode("utf-8")
+        doc_section = getattr(Analyzer, "doc_section", None)
+        # For multiple sections, the whole document is fetched,
+        # but only the analyzed attributes identify the content
+        self.fields = doc_section if isinstance(doc_section, list) else None
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        # Dask workers call the cache from a thread pool
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results "
+            "(key BLOB PRIMARY KEY, value TEXT, size INTEGER, used REAL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS lru ON results (used, size)"
+        )
+        # The total size of the results, kept up to date with every
+        # change, so that it is not summed up over the whole table
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta "
+            "(id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER)"
+        )
+        self.connection.execute(
+            "INSERT OR IGNORE INTO meta "
+            "SELECT 0, TOTAL(size) FROM results"
+        )
+
+    def key(self, section) -> bytes:
+        """
+        The hash of the analyzer and a document section.
+        """
+        if isinstance(section, dict) and self.fields is not None:
+            section = {field: section.get(field) for field in self.fields}
+        if isinstance(section, str):
+            content = section.encode("utf-8")
+        else:
+            content = json.dumps(section, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(self.namespace + b"\0" + content).digest()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, Dict[str, Any]]:
+        """
+        Looks up several results at once and marks them as recently used.
+
+        Returns
+        -------
+        Dict[bytes, Dict[str, Any]]
+            The cached results by key, missing keys are left out
+        """
+        found = {}
+        unique = list(set(keys))
+        with self.lock:
+            # SQLite allows at most 999 parameters per statement
+            for i in range(0, len(unique), 900):
+                chunk = unique[i : i + 900]
+                marks = ",".join("?" * len(chunk))
+                rows = self.connection.execute(
+                    f"SELECT key, value FROM results WHERE key IN ({marks})", chunk
+                )
+                found.update((key, json.loads(value)) for key, value in rows)
+            if found:
+                now = time.time()
+                # A single transaction instead of one commit per hit
+                self.connection.execute("BEGIN IMMEDIATE")
+                try:
+                    self.connection.executemany(
+                        "UPDATE results SET used = ? WHERE key = ?",
+                        ((now, key) for key in found),
+                    )
+                    self.connection.execute("COMMIT")
+                except BaseException:
+                    self.connection.execute("ROLLBACK")
+                    raise
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items: List[Tuple[bytes, Dict[str, Any]]]):
+        """
+        Stores results and evicts the least recently used ones,
+        if the size limit has been exceeded.
+        """
+        if not items:
+            return
+        now = time.time()
+        # The last result of a key wins, as with INSERT OR REPLACE
+        rows = {}
+        for key, result in items:
+            value = json.dumps(result)
+            rows[key] = (key, value, len(value), now)
+        rows = list(rows.values())
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                replaced = self.stored_size([key for key, *_ in rows])
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", rows
+                )
+                added = sum(size for _, _, size, _ in rows)
+                self.connection.execute(
+                    "UPDATE meta SET total = total + ? WHERE id = 0",
+                    (added - replaced,),
+                )
+                self.evict()
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def stored_size(self, keys: List[bytes]) -> int:
+        """
+        The total size of those of the keys that are already stored.
+        """
+        size = 0
+        unique = list(set(keys))
+        for i in range(0, len(unique), 900):
+            chunk = unique[i : i + 900]
+            marks = ",".join("?" * len(chunk))
+            (chunk_size,) = self.connection.execute(
+                f"SELECT TOTAL(size) FROM results WHERE key IN ({marks})", chunk
+            ).fetchone()
+            size += int(chunk_size)
+        return size
+
+    def evict(self):
+        """
+        Removes the least recently used results, if the size limit has been
+        exceeded. Has to be called inside of the transaction that added them.
+        """
+        (total,) = self.connection.execute(
+            "SELECT total FROM meta WHERE id = 0"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        # Make some room, so that not every following batch triggers an eviction
+        excess = total - 0.9 * self.max_bytes
+        victims = []
+        freed = 0
+        oldest = self.connection.execute("SELECT key, size FROM results ORDER BY used")
+        for key, size in oldest:
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        oldest.close()
+        self.connection.executemany("DELETE FROM results WHERE key = ?", victims)
+        self.connection.execute(
+            "UPDATE meta SET total = total - ? WHERE id = 0", (freed,)
+        )
+        logger.debug("Evicted %d results from the cache", len(victims))
+
+    def stats(self) -> Tuple[int, int]:
+        return self.hits, self.misses
+
+    def close(self):
+        self.connection.close()
+
+
+def cache_summary(feature: str, hits: int, misses: int) -> str:
+    """
+    A one-line summary of the cache usage of a run.
+    """
+    lookups = hits + misses
+    rate = 100 * hits / lookups if lookups else 0.0
+    return (
+        f"Result cache for {feature}: {hits} hits, {misses} misses "
+        f"({rate:.1f}% hit rate)"
+    )
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tail latency of the analyzers.
+
+Aggregate throughput hides which documents are expensive. The tracker keeps
+the slowest documents of each analyzer together with their size, as well as
+a histogram of the processing times on a logarithmic scale.
+"""
+import heapq
+import json
+import math
+from collections import Counter, namedtuple
+from os.path import exists
+from typing import Any, Dict, Tuple
+
+SlowDoc = namedtuple("SlowDoc", ["seconds", "key", "chars", "tokens"])
+
+
+def bucket(seconds: float) -> int:
+    """
+    Maps a duration onto a histogram bucket.
+    Bucket 0 holds everything up to 1 ms, bucket b > 0 everything
+    between 2**(b-1) ms and 2**b ms.
+    """
+    millis = seconds * 1000
+    if millis <= 1:
+        return 0
+    return math.ceil(math.log2(millis))
+
+
+def section_size(section) -> Tuple[int, int]:
+    """
+    The number of characters and whitespace-separated tokens of a document
+    section. Sections made up of several fields are summed up.
+    """
+    if isinstance(section, str):
+        return len(section), len(section.split())
+    if isinstance(section, dict):
+        texts = [value for value in section.values() if isinstance(value, str)]
+        return sum(map(len, texts)), sum(len(text.split()) for text in texts)
+    return 0, 0
+
+
+class LatencyTracker:
+    def __init__(self, k: int = 20):
+        """
+        Parameters
+        ----------
+        k : int, optional
+            The number of slowest documents to keep per analyzer, by default 20
+        """
+        self.k = k
+        self.slowest = {}
+        self.histograms = {}
+
+    def record(self, feature: str, key: str, chars: int, tokens: int, seconds: float):
+        self.record_entry(feature, SlowDoc(seconds, key, chars, tokens))
+        self.histograms.setdefault(feature, Counter())[bucket(seconds)] += 1
+
+    def merge(self, other: "LatencyTracker"):
+        """
+        Adds the measurements of another tracker, e.g. one returned by a worker.
+        """
+        for feature, heap in other.slowest.items():
+            for entry in heap:
+                self.record_entry(feature, entry)
+        for feature, histogram in other.histograms.items():
+            self.histograms.setdefault(feature, Counter()).update(histogram)
+
+    def record_entry(self, feature: str, entry: SlowDoc):
+        """
+        Keeps the entry, if it is among the k slowest documents.
+        """
+        heap = self.slowest.setdefault(feature, [])
+        if len(heap) < self.k:
+            heapq.heappush(heap, entry)
+        elif entry.seconds > heap[0].seconds:
+            heapq.heapreplace(heap, entry)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            feature: {
+                "slowest": [
+                    entry._asdict() for entry in sorted(heap, reverse=True)
+                ],
+                "histogram": {
+                    str(b): count
+                    for b, count in sorted(self.histograms.get(feature, {}).items())
+                },
+            }
+            for feature, heap in self.slowest.items()
+        }
+
+    def dump(self, filename: str):
+        """
+        Writes the measurements to a JSON file. Sections of other
+        analyzers already present in the file are kept.
+        """
+        report = {}
+        if exists(filename):
+            with open(filename, "rt") as report_file:
+                report = json.load(report_file)
+        report.update(self.to_dict())
+        with open(filename, "wt") as report_file:
+            json.dump(report, report_file, indent=2)
+
+    @classmethod
+    def load(cls, filename: str, k: int = 20) -> "LatencyTracker":
+        tracker = cls(k)
+        with open(filename, "rt") as report_file:
+            report = json.load(report_file)
+        for feature, section in report.items():
+            for entry in section["slowest"]:
+                tracker.record_entry(feature, SlowDoc(**entry))
+            tracker.histograms[feature] = Counter(
+                {int(b): count for b, count in section["histogram"].items()}
+            )
+        return tracker
+
+    def report(self, feature: str) -> str:
+        """
+        A human-readable summary of the measurements for one analyzer.
+        """
+        if feature not in self.slowest:
+            return f"No measurements for {feature}."
+        lines = [f"Slowest documents for {feature}:"]
+        lines.append(f"{'seconds':>10} {'chars':>8} {'tokens':>7}  _key")
+        for entry in sorted(self.slowest[feature], reverse=True):
+            lines.append(
+                f"{entry.seconds:>10.3f} {entry.chars:>8} {entry.tokens:>7}  {entry.key}"
+            )
+        histogram = self.histograms.get(feature, Counter())
+        total = sum(histogram.values())
+        lines.append("")
+        lines.append(f"Latency histogram ({total} documents):")
+        for b in range(max(histogram) + 1 if histogram else 0):
+            count = histogram.get(b, 0)
+            bar = "#" * math.ceil(50 * count / total) if count else ""
+            lines.append(f"{'<= ' + str(2 ** b) + ' ms':>14} {count:>8} {bar}")
+        return "\n".join(lines)
@@ -1,7 +1,10 @@
 from datetime import datetime
+import json
 import logging
 import multiprocessing
-from typing import Dict, Iterable, List, Tuple
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Tuple
 
 from dask.distributed import Client, LocalCluster, WorkerPlugin, get_worker
 from pyArango.database import Database
@@ -10,9 +13,26 @@ from streamz import Stream
 from tqdm import tqdm
 
 from scicopia_tools.db.arango import setup
+from scicopia_tools.db.cache import CacheConfig, ResultCache, cache_summary
+from scicopia_tools.db.latency import LatencyTracker, section_size
+from scicopia_tools.db.profiling import BatchProfiler, Profile, merge_results
+from scicopia_tools.db.routing import (
+    LANGUAGE_FIELD,
+    UNKNOWN,
+    LanguageRouter,
+    load_analyzers,
+    supported_languages,
+)
+from scicopia_tools.db.watchdog import Budget, Watchdog, timeout_field, truncate
+from scicopia_tools.exceptions import DocumentTimeout
 
 logger = logging.getLogger("scicopia_tools.db.parallel")
 
+# The field set by the Deduplicator
+DUPLICATE_FIELD = "duplicate_of"
+# The number of failed documents the watch mode leaves out at most
+MAX_FAILED = 10000
+
 def split_batch(query: Iterable, n: int) -> List:
     """
     Split an iterable into batches of size n.
@@ -41,64 +61,568 @@ def split_batch(query: Iterable, n: int) -> List:
         yield data
 
 
-def worker_setup(feature, Analyzer, params, dask_worker):
+def worker_setup(
+    feature, Analyzer, params, budget, profile, cache, models, dask_worker
+) -> float:
+    """
+    Loads the analyzers of a worker.
+
+    Returns
+    -------
+    float
+        The startup time of the worker in seconds
+    """
+    start = time.perf_counter()
     dask_worker.collection, dask_worker.connection, dask_worker.db = setup()
     dask_worker.feature = feature
     dask_worker.analyzer = Analyzer() if params is None else Analyzer(**params)
+    languages = supported_languages(Analyzer, models)
+    if languages is None:
+        dask_worker.router = dask_worker.analyzers = None
+    else:
+        dask_worker.router = LanguageRouter(languages)
+        dask_worker.analyzers = load_analyzers(dask_worker.analyzer, params, models)
+    dask_worker.budget = budget
+    dask_worker.profiler = (
+        BatchProfiler(0) if profile is None else BatchProfiler(profile.batches, profile.mode)
+    )
+    dask_worker.cache = (
+        None if cache is None else ResultCache(cache.path, Analyzer, params, cache.max_mb)
+    )
+    return time.perf_counter() - start
+
+
+def worker_profile(dask_worker):
+    return dask_worker.profiler.results()
 
 
 class TeardownPlugin(WorkerPlugin):
     def teardown(self, worker):
-        worker.analyzer.release_resources()
+        for analyzer in set((worker.analyzers or {}).values()) | {worker.analyzer}:
+            analyzer.release_resources()
         worker.db.disconnectSession()
+        if worker.cache is not None:
+            worker.cache.close()
 
 
-def process_parallel(docs: Tuple[Dict[str, str]]):
-    worker = get_worker()
+def analyze_docs(
+    analyzer,
+    feature: str,
+    docs: Tuple[Dict[str, str]],
+    budget: Budget = None,
+    tracker: LatencyTracker = None,
+    cache: ResultCache = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Applies an analyzer to a batch of documents.
+    Analyzers with a process_batch method get all texts at once,
+    unless there is a time budget per document. Keyed analyzers get
+    the key of each document as a second argument.
+    Documents that come with the result of their canonical
+    near-duplicate take over that result. Documents that exceed the
+    time budget are marked with the budget, see timeout_field.
+
+    Parameters
+    ----------
+    analyzer : Analyzer
+        An instantiated analyzer
+    feature : str
+        The name of the feature, only used for logging
+    docs : Tuple[Dict[str, str]]
+        Documents with the fields '_key' and 'doc_section'
+        and optionally 'canonical'
+    budget : Budget, optional
+        Limits for the processing time and the length of a
+        document section, by default None
+    tracker : LatencyTracker, optional
+        Records the processing time of every document, by default None
+    cache : ResultCache, optional
+        Results of documents with the same content are taken from
+        and new results are added to the cache, by default None
+
+    Returns
+    -------
+    Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]
+        1. The updates to be saved to the database, including the
+           timeout markers
+        2. The documents that exceeded the time budget
+
+    Raises
+    ------
+    Exception
+        Any exception raised by the analyzer, after it has been logged
+    """
     updates = []
+    outliers = []
+    pending = []
     for doc in docs:
         if doc is None:
             continue
-        data = doc["doc_section"]
-        if data:
-            try:
-                data = worker.analyzer.process(data)
-                data["modified_at"] = round(datetime.now().timestamp())
-                data["_key"] = doc["_key"]
-                updates.append(data)
-            except Exception as e:
-                error = f"Exception occurred while processing document {doc['_key']}: {str(e)}"
-                logger.error(error)
-                return ("error", error)
+        if doc.get("canonical") is not None:
+            updates.append(
+                {
+                    analyzer.field: doc["canonical"],
+                    "modified_at": round(datetime.now().timestamp()),
+                    "_key": doc["_key"],
+                }
+            )
+        elif doc["doc_section"]:
+            pending.append(doc)
         else:
-            logger.debug(f"Document {doc['_key']} has None for {worker.feature}")
+            logger.debug(f"Document {doc['_key']} has None for {feature}")
+    sections = [doc["doc_section"] for doc in pending]
+    if budget is not None and budget.max_chars:
+        sections = [
+            truncate(section, budget.max_chars) if isinstance(section, str) else section
+            for section in sections
+        ]
+    keyed = getattr(analyzer, "keyed", False)
+    if keyed:
+        # The result depends on more than the text
+        cache = None
+    cached = {}
+    if cache is not None:
+        keys = [cache.key(section) for section in sections]
+        cached = cache.get_many(keys)
+        missing = [key not in cached for key in keys]
+        sections = [section for section, miss in zip(sections, missing) if miss]
+    fresh = []
+    timed = budget is not None and budget.seconds
+    process_batch = getattr(analyzer, "process_batch", None)
+    if keyed:
+        results = map(analyzer.process, sections, [doc["_key"] for doc in pending])
+    elif process_batch is None or timed:
+        # Batched analyzers parse several texts ahead, which would
+        # blur the time spent on a single document
+        results = map(analyzer.process, sections)
+    else:
+        results = iter(process_batch(sections))
+    for i, doc in enumerate(pending):
+        if cache is not None and not missing[i]:
+            data = dict(cached[keys[i]])
+            data["modified_at"] = round(datetime.now().timestamp())
+            data["_key"] = doc["_key"]
+            updates.append(data)
+            continue
+        start = time.perf_counter()
+        try:
+            if timed:
+                with Watchdog(budget.seconds):
+                    data = next(results)
+            else:
+                data = next(results)
+        except DocumentTimeout:
+            seconds = time.perf_counter() - start
+            chars, tokens = section_size(doc["doc_section"])
+            if tracker is not None:
+                tracker.record(feature, doc["_key"], chars, tokens, seconds)
+            outlier = {
+                "_key": doc["_key"],
+                "feature": feature,
+                "chars": chars,
+                "seconds": round(seconds, 3),
+            }
+            logger.warning(
+                "Document %s (%d characters) exceeded the time budget for %s",
+                doc["_key"],
+                outlier["chars"],
+                feature,
+            )
+            outliers.append(outlier)
+            updates.append(
+                {
+                    timeout_field(analyzer.field): budget.seconds,
+                    "modified_at": round(datetime.now().timestamp()),
+                    "_key": doc["_key"],
+                }
+            )
+            continue
+        except Exception as e:
+            error = f"Exception occurred while processing document {doc['_key']}: {str(e)}"
+            logger.error(error)
+            raise
+        if tracker is not None:
+            chars, tokens = section_size(doc["doc_section"])
+            tracker.record(
+                feature, doc["_key"], chars, tokens, time.perf_counter() - start
+            )
+        if cache is not None:
+            fresh.append((keys[i], dict(data)))
+        data["modified_at"] = round(datetime.now().timestamp())
+        data["_key"] = doc["_key"]
+        updates.append(data)
+    if cache is not None:
+        cache.put_many(fresh)
+    return updates, outliers
+
+
+def analyze_routed(
+    analyzer,
+    analyzers: Dict[str, Any],
+    router: LanguageRouter,
+    feature: str,
+    docs: Tuple[Dict[str, str]],
+    budget: Budget = None,
+    tracker: LatencyTracker = None,
+    cache: ResultCache = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Like analyze_docs, but documents are first grouped by language and
+    each group is handed to the analyzer for its language. Documents in
+    unsupported languages are skipped. Languages detected on the way
+    are saved as well, so that these documents are not fetched again.
+
+    Parameters
+    ----------
+    analyzer : Analyzer
+        The default analyzer
+    analyzers : Dict[str, Any]
+        Analyzers by language, None if the analyzer is language-independent
+    router : LanguageRouter
+        Determines the languages, None if the analyzer is language-independent
+
+    The other parameters and the return values are those of analyze_docs.
+    The result cache is only used for the default analyzer.
+    """
+    if router is None:
+        return analyze_docs(analyzer, feature, docs, budget, tracker, cache)
+    groups, detected = router.route(docs)
+    updates = []
+    outliers = []
+    for language, group in groups.items():
+        if not router.supports(language):
+            logger.debug("Skipping %d documents in %s", len(group), language)
+            updates.extend(
+                {
+                    "_key": doc["_key"],
+                    LANGUAGE_FIELD: language,
+                    "modified_at": round(datetime.now().timestamp()),
+                }
+                for doc in group
+                if doc["_key"] in detected
+            )
+            continue
+        target = analyzers[language]
+        group_updates, group_outliers = analyze_docs(
+            target,
+            feature,
+            group,
+            budget,
+            tracker,
+            cache if target is analyzer else None,
+        )
+        for update in group_updates:
+            if update["_key"] in detected:
+                update[LANGUAGE_FIELD] = language
+        updates.extend(group_updates)
+        outliers.extend(group_outliers)
+    return updates, outliers
+
+
+def save_updates(collection, updates: List[Dict[str, Any]]):
     try:
-        worker.collection.bulkSave(updates, details=True, onDuplicate="update")
+        collection.bulkSave(updates, details=True, onDuplicate="update")
     except UpdateError as e:
         return ("error", e.message)
     finally:
         updates.clear()
 
 
-def generate_query(collection: str, db: Database, Analyzer, batch_size: int):
-    # TODO: change to work with multiple doc_sections
+def process_parallel(docs: Tuple[Dict[str, str]]):
+    worker = get_worker()
+    tracker = LatencyTracker()
+    with worker.profiler:
+        try:
+            updates, outliers = analyze_routed(
+                worker.analyzer,
+                worker.analyzers,
+                worker.router,
+                worker.feature,
+                docs,
+                worker.budget,
+                tracker,
+                worker.cache,
+            )
+        except Exception as e:
+            return ("error", str(e))
+        error = save_updates(worker.collection, updates)
+    if error is not None:
+        return error
+    return {"outliers": outliers, "latency": tracker}
+
+
+def worker_cache_stats(dask_worker) -> Tuple[int, int]:
+    if dask_worker.cache is None:
+        return 0, 0
+    return dask_worker.cache.stats()
+
+
+def generate_query(
+    collection: str,
+    db: Database,
+    Analyzer,
+    batch_size: int,
+    order_by: str = None,
+    descending: bool = True,
+    reuse_duplicates: bool = False,
+    languages: List[str] = None,
+    timeout: float = None,
+):
+    """
+    Fetches all documents that still have to be processed by an analyzer.
+
+    Parameters
+    ----------
+    collection : str
+        The name of the document collection
+    db : Database
+        A handle to the database that holds the collection
+    Analyzer : Type[Analyzer]
+        The analyzer class whose field and doc_section are used
+    batch_size : int
+        The batch size of the cursor
+    order_by : str, optional
+        An attribute, e.g. an import timestamp or a priority, that determines
+        the processing order. By default None, i.e. the order of the collection scan.
+        There should be a persistent index on this attribute, so that no sort
+        over the whole collection is needed.
+    descending : bool, optional
+        Process the highest values first, by default True
+    reuse_duplicates : bool, optional
+        Fetch the result of the canonical document for near-duplicates
+        found by the Deduplicator, by default False
+    languages : List[str], optional
+        Only fetch documents in one of these languages or without
+        a reliably detected language, by default None, i.e. all documents
+    timeout : float, optional
+        The time budget per document in seconds. Documents that exceeded
+        a budget at least as large are left out. By default None, i.e. no
+        budget, so that all of them are tried again.
+
+    Returns
+    -------
+    Query
+        A cursor returning '_key', 'doc_section', 'canonical' if
+        reuse_duplicates is set and 'language' if languages are given
+    """
+    sort = ""
+    if order_by is not None:
+        sort = f"SORT x.{order_by} {'DESC' if descending else 'ASC'} "
+    filters = [f"x.{Analyzer.field} == null"]
+    if isinstance(Analyzer.doc_section, list):
+        filters.append(f"{Analyzer.doc_section} ANY IN ATTRIBUTES(x)")
+        section = f"KEEP(x, {Analyzer.doc_section})"
+    else:
+        filters.append(f"x.{Analyzer.doc_section} != null")
+        section = f"x.{Analyzer.doc_section}"
+    extra = ""
+    if languages is not None:
+        field = f"x.{LANGUAGE_FIELD}"
+        filters.append(f"({field} == null OR {field} IN {list(languages) + [UNKNOWN]})")
+        extra += f", '{LANGUAGE_FIELD}': {field}"
+    if timeout is not None:
+        field = f"x.{timeout_field(Analyzer.field)}"
+        filters.append(f"({field} == null OR {field} < {timeout})")
+    canonical = ""
+    if reuse_duplicates:
+        duplicate_of = f"x.{DUPLICATE_FIELD}"
+        canonical = (
+            f"LET canonical = {duplicate_of} != null AND {duplicate_of} != x._key "
+            f"? DOCUMENT('{collection}', {duplicate_of}).{Analyzer.field} : null "
+        )
+        extra = ", canonical" + extra
+    AQL = (
+        f"FOR x IN {collection} {sort}FILTER {' AND '.join(filters)} {canonical}"
+        f"RETURN {{ '_key': x._key, 'doc_section': {section}{extra} }}"
+    )
+    return db.AQLQuery(AQL, rawResults=True, batchSize=batch_size, ttl=3600)
+
+
+def pending_count(query) -> int:
+    """
+    The number of documents a query from generate_query will return,
+    whether it is answered by a full collection scan or an index scan.
+    """
+    stats = query.response["extra"]["stats"]
+    return stats["scannedFull"] + stats["scannedIndex"] - stats["filtered"]
+
+
+def generate_watch_query(
+    collection: str,
+    db: Database,
+    Analyzer,
+    key: str,
+    batch_size: int,
+    languages: List[str] = None,
+    timeout: float = None,
+    failed: Iterable[str] = (),
+):
+    """
+    Fetches the next documents that still have to be processed, in the
+    order of their key. Only unprocessed documents are looked at, so the
+    writes of the analyzer itself do not bring documents back, and it does
+    not matter when or with which timestamps new documents were imported.
+    A persistent index on the field of the analyzer keeps polling cheap.
+
+    Parameters
+    ----------
+    collection : str
+        The name of the document collection
+    db : Database
+        A handle to the database that holds the collection
+    Analyzer : Type[Analyzer]
+        The analyzer class whose field and doc_section are used
+    key : str
+        The key of the last seen document, "" to start from the beginning
+    batch_size : int
+        The maximum number of documents to be returned
+    languages : List[str], optional
+        Only fetch documents in one of these languages or without
+        a reliably detected language, by default None, i.e. all documents
+    timeout : float, optional
+        Leave out documents that exceeded a time budget at least this
+        large, by default None, see generate_query
+    failed : Iterable[str], optional
+        Keys of documents the analyzer failed on, which are left out
+
+    Returns
+    -------
+    Query
+        A cursor returning '_key', 'doc_section' and 'language'
+    """
+    filters = [f"x.{Analyzer.field} == null", "x._key > @key"]
     if isinstance(Analyzer.doc_section, list):
-        AQL = f"FOR x IN {collection} FILTER x.{Analyzer.field} == null AND {Analyzer.doc_section} ANY IN ATTRIBUTES(x) RETURN {{ '_key': x._key, 'doc_section': x }}"
-        return db.AQLQuery(AQL, rawResults=True, batchSize=batch_size, ttl=3600)
+        section = f"KEEP(x, {Analyzer.doc_section})"
+        filters.append(f"LENGTH({section}) > 0")
     else:
-        AQL = f"FOR x IN {collection} FILTER x.{Analyzer.field} == null and x.{Analyzer.doc_section} != null RETURN {{ '_key': x._key, 'doc_section': x.{Analyzer.doc_section} }}"
-        return db.AQLQuery(AQL, rawResults=True, batchSize=batch_size, ttl=3600)
+        section = f"x.{Analyzer.doc_section}"
+        # analyze_docs writes nothing for empty sections,
+        # they would be fetched again in every round
+        filters.append(f"{section} != null AND {section} != ''")
+    if languages is not None:
+        field = f"x.{LANGUAGE_FIELD}"
+        filters.append(f"({field} == null OR {field} IN {list(languages) + [UNKNOWN]})")
+    if timeout is not None:
+        field = f"x.{timeout_field(Analyzer.field)}"
+        filters.append(f"({field} == null OR {field} < {timeout})")
+    filters.append("x._key NOT IN @failed")
+    AQL = (
+        f"FOR x IN {collection} FILTER {' AND '.join(filters)} "
+        f"SORT x._key LIMIT @limit "
+        f"RETURN {{ '_key': x._key, 'doc_section': {section}, "
+        f"'{LANGUAGE_FIELD}': x.{LANGUAGE_FIELD} }}"
+    )
+    return db.AQLQuery(
+        AQL,
+        rawResults=True,
+        batchSize=batch_size,
+        bindVars={"key": key, "limit": batch_size, "failed": list(failed)},
+    )
 
 
 class DocTransformer:
-    def __init__(self, feature: str, analyzer, params=None):
+    def __init__(
+        self,
+        feature: str,
+        analyzer,
+        params=None,
+        budget: Budget = None,
+        outlier_file: str = None,
+        latency_file: str = None,
+        profile: Profile = None,
+        order_by: str = None,
+        descending: bool = True,
+        cache: CacheConfig = None,
+        reuse_duplicates: bool = False,
+        models: Dict[str, str] = None,
+    ):
         self.collection, self.connection, self.db = setup()
         self.feature = feature
         self.analyzer = analyzer
         self.params = params
+        self.budget = budget
+        self.timeout = None if budget is None else budget.seconds
+        self.outlier_file = outlier_file
+        self.outliers = []
+        self.latency_file = latency_file
+        self.tracker = LatencyTracker()
+        self.profile = profile
+        self.profiler = (
+            BatchProfiler(0) if profile is None else BatchProfiler(profile.batches, profile.mode)
+        )
+        self.order_by = order_by
+        self.descending = descending
+        if order_by is not None:
+            # Non-sparse, so that it can be used for sorting
+            self.collection.ensurePersistentIndex([order_by], sparse=False)
+        self.cache_config = cache
+        self.cache = (
+            None if cache is None else ResultCache(cache.path, analyzer, params, cache.max_mb)
+        )
+        self.cache_stats = (0, 0)
+        if reuse_duplicates and getattr(analyzer, "positional", False):
+            logger.warning(
+                "Results of %s refer to character offsets, near-duplicates will be processed anyway",
+                feature,
+            )
+            reuse_duplicates = False
+        self.reuse_duplicates = reuse_duplicates
+        # spaCy models for languages the analyzer
+        # does not support by default
+        self.models = models
+        self.languages = supported_languages(analyzer, models)
+        self.router = None if self.languages is None else LanguageRouter(self.languages)
+        self.analyzers = None
 
     def teardown(self):
         self.connection.disconnectSession()
+        if self.cache is not None:
+            self.cache.close()
+
+    def collect(self, result):
+        """
+        Gathers the outliers and latencies reported for a processed batch.
+        Errors have already been logged where they occurred.
+        """
+        if isinstance(result, dict):
+            self.outliers.extend(result["outliers"])
+            self.tracker.merge(result["latency"])
+
+    def finish_run(self):
+        """
+        Stores the outliers and the latency measurements of the run.
+        """
+        checkpoint = getattr(self.analyzer, "checkpoint", None)
+        if checkpoint is not None and not isinstance(self.analyzer, type):
+            checkpoint()
+        self.write_outliers()
+        if self.latency_file is not None:
+            self.tracker.dump(self.latency_file)
+        logger.info("%s", self.tracker.report(self.feature))
+        if self.cache is not None:
+            hits, misses = self.cache.stats()
+            hits += self.cache_stats[0]
+            misses += self.cache_stats[1]
+            logger.info("%s", cache_summary(self.feature, hits, misses))
+
+    def write_outliers(self):
+        """
+        Appends the documents that exceeded the time budget as JSON lines
+        to the outlier file, so they can be examined later.
+        """
+        if not self.outliers:
+            return
+        logger.warning(
+            "%d documents exceeded the time budget for %s",
+            len(self.outliers),
+            self.feature,
+        )
+        if self.outlier_file is not None:
+            with open(self.outlier_file, "at") as outlier_file:
+                for outlier in self.outliers:
+                    outlier_file.write(json.dumps(outlier))
+                    outlier_file.write("\n")
+        self.outliers.clear()
 
     def parallel_main(self, parallel: int, batch_size: int):
         if parallel <= 0:
@@ -111,13 +635,26 @@ class DocTransformer:
                 multiprocessing.cpu_count(),
             )
             parallel = multiprocessing.cpu_count()
+        if getattr(self.analyzer, "sequential", False):
+            logger.warning(
+                "%s keeps state across documents and cannot be run in parallel", self.feature
+            )
+            self.main(batch_size)
+            return
 
         # Leave early, if there is nothing to be done
-        query = generate_query(self.collection.name, self.db, self.analyzer, batch_size)
-        unfinished = (
-            query.response["extra"]["stats"]["scannedFull"]
-            - query.response["extra"]["stats"]["filtered"]
+        query = generate_query(
+            self.collection.name,
+            self.db,
+            self.analyzer,
+            batch_size,
+            self.order_by,
+            self.descending,
+            self.reuse_duplicates,
+            self.languages,
+            self.timeout,
         )
+        unfinished = pending_count(query)
         if unfinished == 0:
             logger.info("Nothing to be done. Task %s completed.", self.feature)
             return
@@ -126,55 +663,164 @@ class DocTransformer:
         teardown = TeardownPlugin()
         client = Client(cluster)
         client.register_worker_plugin(teardown)
-        client.run(worker_setup, self.feature, self.analyzer, self.params)
+        startup = client.run(
+            worker_setup,
+            self.feature,
+            self.analyzer,
+            self.params,
+            self.budget,
+            self.profile,
+            self.cache_config,
+            self.models,
+        )
+        startup = sorted(startup.values())
+        logger.info(
+            "Started %d workers for %s in %.2f s (fastest %.2f s)",
+            len(startup),
+            self.feature,
+            startup[-1],
+            startup[0],
+        )
 
         source = Stream()
-        # Sink should be a no-op, since process_parallel saves into
-        # a database
-        source.scatter().map(process_parallel).gather().sink(lambda x: None)
+        # process_parallel saves into a database, the sink only
+        # collects the outliers and latencies
+        source.scatter().map(process_parallel).gather().sink(self.collect)
         with tqdm(total=unfinished) as progress:
             for docs in split_batch(query, batch_size):
                 source.emit(docs)
                 progress.update(len(docs))
                 # if not query.response["hasMore"]:
                 #     break
+        if self.profile is not None:
+            profiles = client.run(worker_profile)
+            merge_results(list(profiles.values()), self.profile.mode, self.profile.output)
+        if self.cache is not None:
+            stats = client.run(worker_cache_stats).values()
+            self.cache_stats = tuple(map(sum, zip(*stats)))
+        self.finish_run()
 
     def main(self, batch_size: int) -> None:
-        query = generate_query(self.collection.name, self.db, self.analyzer, batch_size)
-        unfinished = (
-            query.response["extra"]["stats"]["scannedFull"]
-            - query.response["extra"]["stats"]["filtered"]
+        self.run_pending(batch_size)
+        self.finish_run()
+
+    def run_pending(self, batch_size: int) -> None:
+        """
+        Processes all pending documents in a single process,
+        without storing the results of the run.
+        """
+        query = generate_query(
+            self.collection.name,
+            self.db,
+            self.analyzer,
+            batch_size,
+            self.order_by,
+            self.descending,
+            self.reuse_duplicates,
+            self.languages,
+            self.timeout,
         )
+        unfinished = pending_count(query)
         if unfinished == 0:
             logger.info("Nothing to be done. Task %s completed.", self.feature)
             return
-        self.analyzer = self.analyzer() if self.params is None else self.analyzer(self.params)
+        self.load_analyzer()
         with tqdm(total=unfinished) as progress:
             for docs in split_batch(query, batch_size):
                 self.process_doc(docs)
                 progress.update(len(docs))
+        if self.profile is not None:
+            merge_results(
+                [self.profiler.results()], self.profile.mode, self.profile.output
+            )
 
-    def process_doc(self, docs: Tuple[Dict[str, str]]):
-        updates = []
-        for doc in docs:
-            if doc is None:
-                continue
-            data = doc["doc_section"]
-            if data:
-                try:
-                    data = self.analyzer.process(data)
-                    data["modified_at"] = round(datetime.now().timestamp())
-                    data["_key"] = doc["_key"]
-                    updates.append(data)
-                except Exception as e:
-                    error = f"Exception occurred while processing document {doc['_key']}: {str(e)}"
-                    logger.error(error)
-                    return ("error", error)
-            else:
-                logger.debug(f"Document {doc['_key']} has None for {self.feature}")
+    def load_analyzer(self):
+        start = time.perf_counter()
+        if isinstance(self.analyzer, type):
+            self.analyzer = (
+                self.analyzer() if self.params is None else self.analyzer(**self.params)
+            )
+        if self.router is not None and self.analyzers is None:
+            self.analyzers = load_analyzers(self.analyzer, self.params, self.models)
+        logger.info("Loaded %s in %.2f s", self.feature, time.perf_counter() - start)
+
+    def watch(self, batch_size: int, interval: float = 5.0) -> None:
+        """
+        Keeps the analyzer loaded and processes documents as they arrive.
+        After a regular run over all pending documents, the collection is
+        polled for documents that still lack the field of the analyzer,
+        see generate_watch_query.
+
+        Parameters
+        ----------
+        batch_size : int
+            The maximum size of a micro-batch
+        interval : float, optional
+            Seconds to wait after all pending documents
+            have been processed, by default 5.0
+        """
+        # Non-sparse, so that documents without the field are indexed
+        self.collection.ensurePersistentIndex([self.analyzer.field], sparse=False)
+        self.run_pending(batch_size)
+        self.load_analyzer()
+        logger.info("Watching %s for new documents", self.collection.name)
+        key = ""
+        # Keys of failed documents in the order of their failure
+        failed = {}
         try:
-            self.collection.bulkSave(updates, details=True, onDuplicate="update")
-        except UpdateError as e:
-            return ("error", e.message)
-        finally:
-            updates.clear()
+            while True:
+                docs = list(
+                    generate_watch_query(
+                        self.collection.name,
+                        self.db,
+                        self.analyzer,
+                        key,
+                        batch_size,
+                        self.languages,
+                        self.timeout,
+                        failed,
+                    )
+                )
+                if docs:
+                    key = docs[-1]["_key"]
+                    error = self.process_doc(docs)
+                    if error is not None:
+                        logger.error("Skipping %d documents: %s", len(docs), error[1])
+                        failed.update(dict.fromkeys(doc["_key"] for doc in docs))
+                        # The oldest failures are tried again rather
+                        # than letting the query grow without bound
+                        for old in list(islice(failed, max(len(failed) - MAX_FAILED, 0))):
+                            del failed[old]
+                    else:
+                        logger.info("Processed %d new documents", len(docs))
+                if len(docs) < batch_size:
+                    # Documents with keys below the last position
+                    # are looked at in the next round
+                    key = ""
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            logger.info("Stopped watching %s", self.collection.name)
+        self.finish_run()
+
+    def process_doc(self, docs: Tuple[Dict[str, str]]):
+        with self.profiler:
+            try:
+                updates, outliers = analyze_routed(
+                    self.analyzer,
+                    self.analyzers,
+                    self.router,
+                    self.feature,
+                    docs,
+                    self.budget,
+                    self.tracker,
+                    self.cache,
+                )
+            except Exception as e:
+                return ("error", str(e))
+            self.outliers.extend(outliers)
+            # State the results rely on, e.g. the index of the Deduplicator,
+            # is persisted first, so that it never lags behind the database
+            checkpoint = getattr(self.analyzer, "checkpoint", None)
+            if checkpoint is not None:
+                checkpoint()
+            return save_updates(self.collection, updates)
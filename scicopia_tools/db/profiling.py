@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Built-in profiling of analyzers and workers.
+
+Each process profiles a configurable number of batches, either with cProfile
+or with a sampling profiler. The per-process results are merged into a single
+report: cProfile data is written as a .pstats file (e.g. for snakeviz or
+flameprof) plus a text summary, sampled stacks are written in the folded
+format understood by flamegraph.pl and speedscope.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+from collections import Counter, namedtuple
+from typing import Iterable, Iterator, List
+
+logger = logging.getLogger("scicopia_tools.db.profiling")
+
+# batches: number of batches to profile per process
+# mode: "cprofile" or "sample"
+# output: path prefix of the merged report
+Profile = namedtuple("Profile", ["batches", "mode", "output"])
+
+PROFILERS = ("cprofile", "sample")
+
+
+class StackSampler:
+    """
+    Periodically records the call stack of one thread.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.thread_id = None
+        self.stopped = threading.Event()
+        self.sampler = None
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self.stopped.clear()
+        self.sampler = threading.Thread(target=self._sample, daemon=True)
+        self.sampler.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.sampler.join()
+
+    def _sample(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(";", ",")
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+class RawStats:
+    """
+    Wraps the statistics of a finished cProfile run,
+    so that pstats can load them without a file.
+    """
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class BatchProfiler:
+    """
+    Profiles the first batches processed in this process and
+    ignores all the following ones.
+    """
+
+    def __init__(self, batches: int, mode: str = "cprofile"):
+        """
+        Parameters
+        ----------
+        batches : int
+            The number of batches to be profiled
+        mode : str, optional
+            Either "cprofile" or "sample", by default "cprofile"
+        """
+        if mode not in PROFILERS:
+            raise ValueError(f"Unknown profiler: {mode}")
+        self.remaining = batches
+        self.mode = mode
+        self.profiler = cProfile.Profile() if mode == "cprofile" else StackSampler()
+        # A worker may run several batches in parallel threads,
+        # only one of them is profiled at a time.
+        self.lock = threading.Lock()
+        self.owner = None
+
+    def start(self):
+        if self.remaining <= 0 or not self.lock.acquire(blocking=False):
+            return
+        self.owner = threading.get_ident()
+        if self.mode == "cprofile":
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+
+    def stop(self):
+        if self.owner != threading.get_ident():
+            return
+        if self.mode == "cprofile":
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+        self.remaining -= 1
+        self.owner = None
+        self.lock.release()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def results(self):
+        """
+        The picklable results of this profiler, to be merged with merge_results.
+        """
+        if self.mode == "cprofile":
+            self.profiler.create_stats()
+            return self.profiler.stats
+        return self.profiler.stacks
+
+
+def profile_items(items: Iterable, profiler: BatchProfiler, n: int) -> Iterator:
+    """
+    Profiles whatever happens while the first n items of an iterator
+    are consumed, e.g. by spaCy's nlp.pipe.
+    """
+    profiler.start()
+    for i, item in enumerate(items):
+        if i == n:
+            profiler.stop()
+        yield item
+    profiler.stop()
+
+
+def merge_results(results: List, mode: str, output: str) -> List[str]:
+    """
+    Merges the results of several profilers into a single report.
+
+    Parameters
+    ----------
+    results : List
+        Results of BatchProfiler.results(), e.g. one per worker
+    mode : str
+        Either "cprofile" or "sample"
+    output : str
+        The path prefix of the report files
+
+    Returns
+    -------
+    List[str]
+        The paths of the files that have been written
+    """
+    if mode == "cprofile":
+        stats = pstats.Stats()
+        for result in results:
+            if result:
+                stats.add(RawStats(result))
+        stats.dump_stats(f"{output}.pstats")
+        summary = io.StringIO()
+        stats.stream = summary
+        stats.sort_stats("cumulative").print_stats(50)
+        with open(f"{output}.txt", "wt") as summary_file:
+            summary_file.write(summary.getvalue())
+        files = [f"{output}.pstats", f"{output}.txt"]
+    else:
+        stacks = Counter()
+        for result in results:
+            stacks.update(result)
+        with open(f"{output}.folded", "wt") as folded:
+            for stack, count in stacks.most_common():
+                folded.write(f"{stack} {count}\n")
+        files = [f"{output}.folded"]
+    logger.info("Profile written to %s", ", ".join(files))
+    return files
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Language-aware routing of documents to analyzers.
+
+Analyzers built on an English spaCy model declare `languages = ("en",)`.
+Documents are routed by the language field set by LangDetect, or by the
+language detected on the fly if it is missing. Documents in a supported
+language go to the default analyzer or to an analyzer loaded with the model
+configured for their language, all other documents are skipped.
+Documents whose language could not be determined reliably are handed to
+the default analyzer.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+UNKNOWN = "unk"
+# The field set by LangDetect
+LANGUAGE_FIELD = "language"
+
+
+def supported_languages(
+    Analyzer, models: Dict[str, str] = None
+) -> Optional[List[str]]:
+    """
+    The languages an analyzer can handle, by itself or with one of the
+    configured models, or None if it is language-independent.
+    """
+    languages = getattr(Analyzer, "languages", None)
+    if languages is None:
+        return None
+    return sorted(set(languages) | set(models or {}))
+
+
+def load_analyzers(
+    analyzer, params: Dict[str, Any] = None, models: Dict[str, str] = None
+) -> Dict[str, Any]:
+    """
+    Maps every supported language to an analyzer.
+
+    Parameters
+    ----------
+    analyzer : Analyzer
+        The default analyzer, which handles its declared
+        languages and documents of unknown language
+    params : Dict[str, Any], optional
+        The parameters the default analyzer has been created with
+    models : Dict[str, str], optional
+        spaCy models by language, e.g. {"de": "de_core_news_lg"}.
+        An additional analyzer is created with each of them.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Analyzers by ISO 639-1 code
+    """
+    analyzers = {language: analyzer for language in analyzer.languages}
+    analyzers[UNKNOWN] = analyzer
+    for language, model in (models or {}).items():
+        analyzers[language] = type(analyzer)(**{**(params or {}), "model": model})
+    return analyzers
+
+
+class LanguageRouter:
+    def __init__(self, languages: List[str]):
+        """
+        Parameters
+        ----------
+        languages : List[str]
+            The languages to be processed
+        """
+        self.languages = frozenset(languages)
+        self.detector = None
+
+    def language(self, section) -> str:
+        if not section:
+            return UNKNOWN
+        if self.detector is None:
+            # LangDetect's command line interface imports the DocTransformer
+            from scicopia_tools.analyzers.LangDetect import LangDetect
+
+            self.detector = LangDetect()
+        return self.detector.detect(section)
+
+    def route(self, docs) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]:
+        """
+        Groups documents by their language.
+
+        Parameters
+        ----------
+        docs : Tuple[Dict[str, str]]
+            Documents with the fields '_key', 'doc_section' and 'language'
+
+        Returns
+        -------
+        Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]
+            1. Documents by language, including unsupported languages
+            2. The languages of documents that had none, by key
+        """
+        groups = {}
+        detected = {}
+        for doc in docs:
+            if doc is None:
+                continue
+            language = doc.get(LANGUAGE_FIELD)
+            if language is None:
+                language = self.language(doc["doc_section"])
+                detected[doc["_key"]] = language
+            groups.setdefault(language, []).append(doc)
+        return groups, detected
+
+    def supports(self, language: str) -> bool:
+        return language == UNKNOWN or language in self.languages
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-document time budget for analyzers.
+
+Keyphrase extraction and relation extraction grow super-linearly with
+the length of a text, so a single pathological document can stall a whole
+batch. The watchdog bounds the time spent on one document, the character
+cap bounds the input size.
+"""
+import ctypes
+import threading
+from collections import namedtuple
+
+from scicopia_tools.exceptions import DocumentTimeout
+
+# seconds: time budget per document, None for no limit
+# max_chars: longer texts are truncated at a sentence boundary, None for no limit
+Budget = namedtuple("Budget", ["seconds", "max_chars"])
+
+SENTENCE_ENDS = (". ", "? ", "! ", ".\n", "?\n", "!\n")
+
+
+def timeout_field(field: str) -> str:
+    """
+    The attribute marking documents that exceeded the time budget of an
+    analyzer. It holds the budget in seconds, so that only runs with a
+    larger budget try these documents again.
+    """
+    return f"{field}_timeout"
+
+
+def _raise_in_thread(thread_id: int, exception) -> None:
+    """
+    Schedules an exception in another thread.
+    Passing None clears a pending exception.
+    """
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(
+        ctypes.c_ulong(thread_id),
+        None if exception is None else ctypes.py_object(exception),
+    )
+
+
+class Watchdog:
+    """
+    A context manager that raises DocumentTimeout in the thread that entered
+    it, once the time budget is spent.
+
+    The exception is delivered asynchronously between two bytecode
+    instructions, so a long-running call into a C extension is only
+    interrupted once it returns to Python code.
+    """
+
+    def __init__(self, seconds: float):
+        """
+        Parameters
+        ----------
+        seconds : float
+            The time budget in seconds.
+        """
+        self.seconds = seconds
+        self.lock = threading.Lock()
+        self.thread_id = None
+        self.timer = None
+        self.armed = False
+        self.fired = False
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        self.armed = True
+        self.fired = False
+        self.timer = threading.Timer(self.seconds, self._expire)
+        self.timer.daemon = True
+        self.timer.start()
+        return self
+
+    def _expire(self):
+        with self.lock:
+            if not self.armed:
+                return
+            self.fired = True
+            _raise_in_thread(self.thread_id, DocumentTimeout)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timer.cancel()
+        with self.lock:
+            self.armed = False
+            if self.fired and exc_type is not DocumentTimeout:
+                # The analyzer finished or raised another exception before
+                # the timeout got delivered, which would otherwise surface
+                # later in unrelated code
+                _raise_in_thread(self.thread_id, None)
+        return False
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """
+    Shortens a text to at most max_chars characters.
+    The cut is made after the last complete sentence, if there is one,
+    otherwise at the last whitespace and only as a last resort in the
+    middle of a word.
+
+    Parameters
+    ----------
+    text : str
+        The text to be shortened
+    max_chars : int
+        The maximum length of the text
+
+    Returns
+    -------
+    str
+        The text itself, if it is short enough, its truncated version otherwise
+    """
+    if len(text) <= max_chars:
+        return text
+    # Look one character further, so that a sentence ending
+    # exactly at the cap is still recognized
+    head = text[: max_chars + 1]
+    cut = max(head.rfind(end) for end in SENTENCE_ENDS)
+    if cut > 0:
+        return text[: cut + 1]
+    cut = head.rfind(" ")
+    if cut > 0:
+        return text[:cut]
+    return text[:max_chars]
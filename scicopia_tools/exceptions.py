@@ -13,4 +13,7 @@ class DBError(ScicopiaException):
     """Exceptions related to ArangoDB."""
 
 class ConfigError(ScicopiaException):
-    """Exceptions related to Configuration."""
\ No newline at end of file
+    """Exceptions related to Configuration."""
+
+class DocumentTimeout(ScicopiaException):
+    """Raised when an analyzer exceeds the time budget for a document."""
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 19:14:05 2026
+
+@author: tech
+"""
+import pickle
+import shutil
+
+import pytest
+from ahocorasick import Automaton
+
+from scicopia_tools.components.automata import (
+    SharedAutomaton,
+    automaton_key,
+    write_shared_automaton,
+)
+from scicopia_tools.components.ChemTagger import ChemTagger
+from scicopia_tools.components.TaxonTagger import TaxonTagger
+
+CHEMICALS = "scicopia_tools/tests/resources/chemicals.txt"
+TAXA = "scicopia_tools/tests/resources/taxa.tsv"
+
+
+def test_cached_chemicals(tmp_path):
+    built = ChemTagger(CHEMICALS, cache_dir=str(tmp_path))
+    files = list(tmp_path.iterdir())
+    assert len(files) == 1
+    loaded = ChemTagger(CHEMICALS, cache_dir=str(tmp_path))
+    assert sorted(loaded.automaton.items()) == sorted(built.automaton.items())
+    # An invalid file is rebuilt
+    files[0].write_bytes(b"garbage")
+    rebuilt = ChemTagger(CHEMICALS, cache_dir=str(tmp_path))
+    assert sorted(rebuilt.automaton.items()) == sorted(built.automaton.items())
+
+
+def test_cached_taxa(tmp_path):
+    built = TaxonTagger(TAXA, cache_dir=str(tmp_path))
+    loaded = TaxonTagger(TAXA, cache_dir=str(tmp_path))
+    text = "Caenorhabditis elegans and C. elegans"
+    assert list(loaded.automaton.iter(text)) == list(built.automaton.iter(text))
+
+
+def test_automaton_key(tmp_path):
+    wordlist = tmp_path / "chemicals.txt"
+    shutil.copy(CHEMICALS, wordlist)
+    key = automaton_key(str(wordlist))
+    assert key == automaton_key(CHEMICALS)
+    assert key != automaton_key(str(wordlist), {"negative": ["water"]})
+    with open(wordlist, "at") as words:
+        words.write("caffeine\n")
+    assert key != automaton_key(str(wordlist))
+
+
+def test_shared_automaton(tmp_path):
+    automaton = Automaton()
+    for word in ("he", "she", "his", "hers", "Müller"):
+        automaton.add_word(word, (word, len(word)))
+    automaton.make_automaton()
+    path = str(tmp_path / "words.shared")
+    write_shared_automaton(automaton.items(), path)
+    shared = SharedAutomaton(path)
+    text = "ushers and his Müller"
+    assert list(shared.iter(text)) == list(automaton.iter(text))
+    assert shared.longest_prefix("hex") == automaton.longest_prefix("hex")
+    assert shared.exists("hers") and not shared.exists("her")
+    assert shared.get("she") == ("she", 3)
+    assert shared.get("her", 0) == 0
+    assert len(shared) == 5
+    # Copies sent to other processes map the file themselves
+    copy = pickle.loads(pickle.dumps(shared))
+    assert list(copy.iter(text)) == list(automaton.iter(text))
+    copy.close()
+    shared.close()
+
+
+def test_shared_taxa(tmp_path):
+    private = TaxonTagger(TAXA)
+    shared = TaxonTagger(TAXA, cache_dir=str(tmp_path), shared=True)
+    assert isinstance(shared.automaton, SharedAutomaton)
+    text = "Caenorhabditis elegans and C. elegans"
+    assert list(shared.automaton.iter(text)) == list(private.automaton.iter(text))
+    # The offsets into the payloads are stored without pickling
+    assert shared.automaton.ints
+    copy = pickle.loads(pickle.dumps(shared))
+    assert isinstance(copy.automaton, SharedAutomaton)
+    assert copy.annotate(text) == private.annotate(text)
+    with pytest.raises(ValueError):
+        ChemTagger(CHEMICALS, shared=True)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 18:21:05 2026
+
+@author: tech
+"""
+from scicopia_tools.analyzers import Analyzer
+from scicopia_tools.components.ChemTagger import ChemTagger
+from scicopia_tools.db.cache import ResultCache, cache_namespace
+from scicopia_tools.db.parallel import analyze_docs
+
+
+class Counter(Analyzer):
+    field = "length"
+    doc_section = "abstract"
+
+    def __init__(self):
+        self.calls = 0
+
+    def process(self, text):
+        self.calls += 1
+        return {Counter.field: len(text)}
+
+
+def test_namespace():
+    assert cache_namespace(Counter) == cache_namespace(Counter())
+    assert cache_namespace(Counter, {"a": 1}) != cache_namespace(Counter)
+    before = cache_namespace(Counter)
+    Counter.version = 2
+    try:
+        assert cache_namespace(Counter) != before
+        assert cache_namespace(Counter).endswith(":2:{}")
+    finally:
+        del Counter.version
+
+
+def test_namespace_of_dictionaries(tmp_path):
+    wordlist = tmp_path / "chemicals.txt"
+    wordlist.write_text("water\n")
+    params = {"wordlist": str(wordlist), "pos_model": None}
+    before = cache_namespace(ChemTagger, params)
+    # Only the content of the word list matters
+    copy = tmp_path / "copy.txt"
+    copy.write_text("water\n")
+    assert cache_namespace(ChemTagger, dict(params, wordlist=str(copy))) == before
+    assert (
+        cache_namespace(ChemTagger, dict(params, cache_dir="automata", shared=True))
+        == before
+    )
+    wordlist.write_text("water\nlead\n")
+    assert cache_namespace(ChemTagger, params) != before
+
+
+def test_duplicates_are_looked_up(tmp_path):
+    analyzer = Counter()
+    cache = ResultCache(str(tmp_path / "cache.db"), Counter)
+    docs = [
+        {"_key": "1", "doc_section": "An abstract"},
+        {"_key": "2", "doc_section": "An abstract"},
+        {"_key": "3", "doc_section": "Another abstract"},
+    ]
+    updates, _ = analyze_docs(analyzer, "length", docs[:1], cache=cache)
+    assert analyzer.calls == 1
+    updates, _ = analyze_docs(analyzer, "length", docs[1:], cache=cache)
+    assert analyzer.calls == 2
+    assert [(u["_key"], u["length"]) for u in updates] == [("2", 11), ("3", 16)]
+    assert cache.stats() == (1, 2)
+    cache.close()
+
+
+def test_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.db"), Counter, max_mb=0)
+    cache.max_bytes = 100
+    for i in range(10):
+        cache.put_many([(cache.key(str(i)), {"length": "x" * 20})])
+    (total,) = cache.connection.execute("SELECT TOTAL(size) FROM results").fetchone()
+    assert total <= 100
+    # The most recent results survive
+    assert cache.key("9") in cache.get_many([cache.key("9")])
+    assert not cache.get_many([cache.key("0")])
+    cache.close()
+
+
+def test_running_total(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResultCache(path, Counter)
+    cache.put_many([(cache.key("a"), {"length": 1}), (cache.key("b"), {"length": 2})])
+    # Replaced results are only counted once
+    cache.put_many([(cache.key("a"), {"length": 100}), (cache.key("a"), {"length": 10})])
+    cache.close()
+    cache = ResultCache(path, Counter)
+    (total,) = cache.connection.execute("SELECT total FROM meta").fetchone()
+    (actual,) = cache.connection.execute("SELECT TOTAL(size) FROM results").fetchone()
+    assert total == actual == 2 * len('{"length": 1}') + 1
+    cache.close()
@@ -21,3 +21,34 @@ def test_english():
     detector = LangDetect()
     result = detector.process(text)
     assert result == {"language": "en"}
+
+
+def test_short_abstract_with_title():
+    detector = LangDetect()
+    doc = {
+        "title": "Falsches Üben von Xylophonmusik quält jeden größeren Zwerg",
+        "abstract": "Zwerg.",
+    }
+    assert detector.process(doc) == {"language": "de"}
+    assert detector.process({"title": None, "abstract": "Zwerg."}) == {
+        "language": "unk"
+    }
+
+
+def test_prefix():
+    # Cuts the first Ü in half
+    detector = LangDetect(prefix_bytes=42)
+    text = "Pack my box with five dozen liquor jugs. " + "Üben quält größeren Zwerg. " * 100
+    assert detector.text(text) == "Pack my box with five dozen liquor jugs. "
+    assert detector.process(text) == {"language": "en"}
+
+
+def test_batch():
+    texts = [
+        "Falsches Üben von Xylophonmusik quält jeden größeren Zwerg.",
+        "Pack my box with five dozen liquor jugs.",
+    ] * 10
+    detector = LangDetect(threads=3)
+    languages = [result["language"] for result in detector.process_batch(texts)]
+    detector.release_resources()
+    assert languages == ["de", "en"] * 10
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 19:20:48 2026
+
+@author: tech
+"""
+from scicopia_tools.analyzers.Deduplicator import Deduplicator
+from scicopia_tools.analyzers.minhash import (
+    MinHasher,
+    normalize,
+    shingles,
+    similarity,
+)
+from scicopia_tools.db.parallel import DUPLICATE_FIELD, analyze_docs
+
+ABSTRACT = (
+    "Groundwater ecosystems harbour diverse microbial communities that are "
+    "shaped by the surface input of organic matter. We sampled wells along a "
+    "hillslope transect over three years and sequenced the 16S rRNA genes of "
+    "the bacterial and archaeal communities."
+)
+PREPRINT = ABSTRACT.replace("three years", "three  years").replace(
+    "16S rRNA", "１６S rRNA"
+) + " Preprint."
+OTHER = (
+    "Keyphrase extraction ranks candidate phrases of a document. We present a "
+    "graph-based model that encodes topical information in a multipartite graph."
+)
+
+
+def test_normalize():
+    assert normalize("Hello,  WORLD!") == "hello world"
+    assert normalize("１６S") == "16s"
+
+
+def test_similarity_estimate():
+    hasher = MinHasher(num_perm=256)
+    first = shingles(ABSTRACT)
+    second = shingles(PREPRINT)
+    jaccard = len(set(first) & set(second)) / len(set(first) | set(second))
+    estimate = similarity(hasher.signature(first), hasher.signature(second))
+    assert abs(estimate - jaccard) < 0.1
+    assert similarity(hasher.signature(first), hasher.signature(shingles(OTHER))) < 0.2
+
+
+def test_canonical(tmp_path):
+    index = str(tmp_path / "minhash.pkl")
+    dedup = Deduplicator(index)
+    docs = [
+        {"_key": "a", "doc_section": ABSTRACT},
+        {"_key": "b", "doc_section": OTHER},
+        {"_key": "c", "doc_section": PREPRINT},
+    ]
+    updates, _ = analyze_docs(dedup, "dedup", docs)
+    assert [u[DUPLICATE_FIELD] for u in updates] == ["a", "b", "a"]
+    dedup.checkpoint()
+    reloaded = Deduplicator(index)
+    assert reloaded.process(PREPRINT, "d") == {"duplicate_of": "a"}
+    assert len(reloaded.index) == 2
+
+
+def test_copy_from_canonical(tmp_path):
+    dedup = Deduplicator(str(tmp_path / "minhash.pkl"))
+    docs = [{"_key": "c", "doc_section": PREPRINT, "canonical": "a"}]
+    updates, _ = analyze_docs(dedup, "dedup", docs)
+    assert updates[0]["duplicate_of"] == "a"
+    assert len(dedup.index) == 0
+
+
+def test_journal(tmp_path):
+    index = str(tmp_path / "minhash.pkl")
+    dedup = Deduplicator(index)
+    for i in range(8):
+        dedup.process(" ".join(f"w{i * j}" for j in range(40)), str(i))
+    assert len(dedup.index) == 8
+    dedup.checkpoint()
+    dedup.process(ABSTRACT, "a")
+    dedup.checkpoint()
+    # Small enough not to rewrite the whole index
+    with open(f"{index}.journal", "rb") as journal:
+        complete = journal.read()
+    # A crash in the middle of appending the next batch
+    with open(f"{index}.journal", "ab") as journal:
+        journal.write(complete[:10])
+    reloaded = Deduplicator(index)
+    assert "a" in reloaded.index and len(reloaded.index) == len(dedup.index)
+    assert reloaded.process(PREPRINT, "c") == {DUPLICATE_FIELD: "a"}
+    reloaded.process(OTHER, "d")
+    reloaded.checkpoint()
+    assert len(Deduplicator(index).index) == len(reloaded.index)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 23:31:08 2026
+
+@author: tech
+"""
+import gzip
+
+import pytest
+import zstandard as zstd
+
+from scicopia_tools.compile.dictionaries import compile_dictionary, normalize
+from scicopia_tools.components.TaxonTagger import TaxonTagger
+
+TAXA = (
+    "species:ncbi:562\tEscherichia  coli|E. coli|Escherichia coli\n"
+    "species:ncbi:9606\tHomo sapiens|human|unknown\n"
+    "a broken line\n"
+    "species:ncbi:562\tE. coli|Bacterium coli\n"
+)
+
+
+def test_normalize():
+    assert normalize(" Escherichia \t coli\n") == "Escherichia coli"
+    # Decomposed umlauts are composed
+    assert normalize("Mu\u0308ller") == "M\u00fcller"
+
+
+@pytest.mark.parametrize("compression", ["plain", "gzip", "zstd"])
+def test_compile_ids(tmp_path, compression):
+    source = tmp_path / "taxa.tsv.dump"
+    data = TAXA.encode("utf-8")
+    if compression == "gzip":
+        data = gzip.compress(data)
+    elif compression == "zstd":
+        data = zstd.ZstdCompressor().compress(data)
+    source.write_bytes(data)
+    output = tmp_path / "taxa.tsv"
+    assert compile_dictionary(str(source), str(output), "ids", {"unknown"}) == (2, 5)
+    assert output.read_text() == (
+        "species:ncbi:562\tEscherichia coli|E. coli|Bacterium coli\n"
+        "species:ncbi:9606\tHomo sapiens|human\n"
+    )
+    tagger = TaxonTagger(str(output))
+    assert tagger.annotate("E. coli lives in humans")[0].ids == ("562",)
+
+
+def test_compile_parallel(tmp_path):
+    source = tmp_path / "chemicals.txt.gz"
+    words = [f"compound {i % 700}" for i in range(2000)]
+    source.write_bytes(gzip.compress("\n".join(words).encode("utf-8")))
+    sequential = tmp_path / "sequential.txt"
+    parallel = tmp_path / "parallel.txt"
+    compile_dictionary(str(source), str(sequential), "words", chunk_size=300)
+    assert compile_dictionary(
+        str(source), str(parallel), "words", parallel=2, chunk_size=300
+    ) == (700, 700)
+    assert parallel.read_text() == sequential.read_text()
+    with pytest.raises(ValueError):
+        compile_dictionary(str(source), str(parallel), "xml")
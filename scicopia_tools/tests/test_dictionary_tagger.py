@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 20:21:36 2026
+
+@author: tech
+"""
+
+import pytest
+import spacy
+from spacy.tokens import Span
+
+from scicopia_tools.components.ChemTagger import ChemTagger
+from scicopia_tools.components.DictionaryTagger import (
+    Annotation,
+    DictionaryTagger,
+    build_automaton,
+    make_dictionary,
+    merge_entities,
+)
+from scicopia_tools.components.TaxonTagger import TaxonTagger
+
+CHEMICALS = "scicopia_tools/tests/resources/chemicals.txt"
+TAXA = "scicopia_tools/tests/resources/taxa.tsv"
+
+
+@pytest.fixture(scope="module")
+def tagger():
+    return DictionaryTagger(
+        [ChemTagger.dictionary(CHEMICALS), TaxonTagger.dictionary(TAXA)]
+    )
+
+
+def test_single_scan(tagger):
+    text = "A water buffalo is more common than a nitrogen buffalo."
+    assert tagger.annotate(text) == [
+        Annotation("water buffalo", "TAXON", 2, 15, ("89462",)),
+        Annotation("nitrogen", "CHEMICAL", 38, 46, ()),
+    ]
+
+
+def test_rules(tagger):
+    # Plurals only for chemicals, taxa need an exact match
+    assert [a.name for a in tagger.annotate("Nitrogens and water buffalos")] == [
+        "Nitrogen",
+        "water",
+    ]
+    text = "Caenorhabditis elegans is a nematode. C. elegans lives in soil."
+    assert [a.ids for a in tagger.annotate(text)] == [("6239",), ("6239",)]
+
+
+def test_pipeline(tagger):
+    nlp = spacy.blank("en")
+    doc = tagger(nlp("A water buffalo is more common than a nitrogen buffalo."))
+    assert [(ent.text, ent.label_) for ent in doc.ents] == [
+        ("water buffalo", "TAXON"),
+        ("nitrogen", "CHEMICAL"),
+    ]
+    assert doc.ents[0]._.id_candidates == ("89462",)
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        make_dictionary("GENE", "genes.txt", "xml")
+
+
+def test_duplicate_labels():
+    with pytest.raises(ValueError, match="CHEMICAL"):
+        DictionaryTagger(
+            [ChemTagger.dictionary(CHEMICALS), ChemTagger.dictionary(TAXA)]
+        )
+
+
+def test_merge_entities(tagger):
+    nlp = spacy.blank("en")
+    doc = nlp("Acetic acid is found in vinegar, ethanol in wine.")
+    # Existing entities overlapping a new one are replaced
+    doc.ents = [
+        Span(doc, 0, 1, label="ORG"),
+        Span(doc, 5, 6, label="PRODUCT"),
+        Span(doc, 7, 8, label="CHEMICAL"),
+    ]
+    spans = [Span(doc, 0, 2, label="CHEMICAL"), Span(doc, 9, 10, label="PRODUCT")]
+    assert [
+        (ent.start, ent.end, ent.label_) for ent in merge_entities(doc.ents, spans)
+    ] == [
+        (0, 2, "CHEMICAL"),
+        (5, 6, "PRODUCT"),
+        (7, 8, "CHEMICAL"),
+        (9, 10, "PRODUCT"),
+    ]
+    doc = tagger(doc)
+    assert [(ent.text, ent.label_) for ent in doc.ents] == [
+        ("Acetic acid", "CHEMICAL"),
+        ("vinegar", "PRODUCT"),
+        ("ethanol", "CHEMICAL"),
+    ]
+
+
+def test_process(tagger):
+    text = "A water buffalo is more common than a nitrogen buffalo."
+    assert tagger.process(text) == {
+        "entities": [[2, 15, "TAXON", ["89462"]], [38, 46, "CHEMICAL", []]]
+    }
+
+
+def test_lazy_pos(tmp_path):
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("attribute_ruler")
+    ruler.add([[{"LOWER": "lead"}, {"LOWER": "were"}]], {"POS": "NOUN"})
+    nlp.to_disk(tmp_path / "pos")
+    texts = ["Ethanol and lead were found.", "Pipes lead to ethanol."]
+    # Without a model, words like "lead" are never tagged in text
+    tagger = ChemTagger(CHEMICALS)
+    assert [result["chemicals"] for result in tagger.process_batch(texts)] == [
+        [[0, 7, "CHEMICAL", []]],
+        [[14, 21, "CHEMICAL", []]],
+    ]
+    tagger = ChemTagger(CHEMICALS, pos_model=str(tmp_path / "pos"))
+    # Texts without such words do not need the model
+    assert tagger.process(texts[0][:8]) == {"chemicals": [[0, 7, "CHEMICAL", []]]}
+    assert tagger.pos_nlp is None
+    assert [result["chemicals"] for result in tagger.process_batch(texts)] == [
+        [[0, 7, "CHEMICAL", []], [12, 16, "CHEMICAL", []]],
+        [[14, 21, "CHEMICAL", []]],
+    ]
+
+
+def test_leftmost_longest(tmp_path):
+    wordlist = tmp_path / "chemicals.txt"
+    wordlist.write_text(
+        "acetic\nacetic acid\nacid\nhydrogen\nhydrogen peroxide\noxide\n"
+    )
+    tagger = DictionaryTagger([make_dictionary("CHEMICAL", str(wordlist), plural=True)])
+    text = "Acetic acidic hydrogen peroxides, hydrogen oxide, acetic acids"
+    assert [(a.name, a.start, a.end) for a in tagger.annotate(text)] == [
+        ("Acetic", 0, 6),
+        ("hydrogen peroxide", 14, 31),
+        ("hydrogen", 34, 42),
+        ("oxide", 43, 48),
+        ("acetic acid", 50, 61),
+    ]
+
+
+def test_payloads(tmp_path):
+    wordlist = tmp_path / "taxa.tsv"
+    wordlist.write_text("species:ncbi:562\tE. coli|coli\nspecies:ncbi:10\tcoli\n")
+    dictionary = make_dictionary("TAXON", str(wordlist), "ids")
+    automaton, tables = build_automaton([dictionary])
+    # Every ID is stored once
+    assert tables["id_blob"].tobytes() == b"56210"
+    assert list(tables["id_offsets"]) == [0, 3, 5]
+    offset = automaton.get("coli")
+    assert list(tables["payloads"][offset : offset + 6]) == [4, 1, 0, 2, 0, 1]
+    tagger = DictionaryTagger([dictionary])
+    assert tagger.annotate("coli") == [Annotation("coli", "TAXON", 0, 4, ("562", "10"))]
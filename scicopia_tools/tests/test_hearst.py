@@ -6,6 +6,9 @@ Created on Fri Mar  6 15:23:40 2020
 @author: kampe
 """
 
+import pytest
+from spacy.tokens import Doc
+
 from scicopia_tools.analyzers.Hearst import Hearst
 from scicopia_tools.components.ChemTagger import ChemTagger
 
@@ -13,9 +16,119 @@ from scicopia_tools.components.ChemTagger import ChemTagger
 def test_such_as():
     chemicals_path = "scicopia_tools/tests/resources/chemicals.txt"
     extra = [{"component": "chemtagger", "config": {"wordlist": chemicals_path}}]
-    hearst = Hearst("en_core_web_sm", extra)
+    hearst = Hearst("en_core_web_sm", extra, patterns=["such as"])
     # Taken from: https://en.wikipedia.org/wiki/Ethyl_acetate
     text = "Ascorbic acid is a redox catalyst which can reduce, and thereby neutralize, reactive oxygen species such as hydrogen peroxide."
     relations = hearst.process(text)[Hearst.field]
     assert len(relations) == 1
     assert " ".join(relations[0]) == "reactive oxygen species such as hydrogen peroxide"
+
+
+PARSES = [
+    (
+        "such as",
+        ["reactive", "species", "such", "as", "peroxide", "and", "water", "."],
+        [1, 1, 3, 1, 3, 4, 4, 1],
+        ["amod", "ROOT", "amod", "prep", "pobj", "cc", "conj", "punct"],
+        ["ADJ", "NOUN", "ADJ", "ADP", "NOUN", "CCONJ", "NOUN", "PUNCT"],
+        [
+            ("reactive species", "such as", "peroxide"),
+            ("reactive species", "such as", "water"),
+        ],
+    ),
+    (
+        "including",
+        ["solvents", "including", "ethanol"],
+        [0, 0, 1],
+        ["ROOT", "prep", "pobj"],
+        ["NOUN", "VERB", "NOUN"],
+        [("solvents", "including", "ethanol")],
+    ),
+    (
+        "and other",
+        ["iron", ",", "copper", "and", "other", "metals"],
+        [0, 0, 0, 2, 5, 2],
+        ["ROOT", "punct", "conj", "cc", "amod", "conj"],
+        ["NOUN", "PUNCT", "NOUN", "CCONJ", "ADJ", "NOUN"],
+        [("metals", "and other", "iron"), ("metals", "and other", "copper")],
+    ),
+    (
+        "especially",
+        ["metals", ",", "especially", "iron"],
+        [0, 0, 3, 0],
+        ["ROOT", "punct", "advmod", "appos"],
+        ["NOUN", "PUNCT", "ADV", "NOUN"],
+        [("metals", "especially", "iron")],
+    ),
+    (
+        "is a",
+        ["Ascorbic", "acid", "is", "a", "catalyst"],
+        [1, 2, 2, 4, 2],
+        ["amod", "nsubj", "ROOT", "det", "attr"],
+        ["ADJ", "NOUN", "AUX", "DET", "NOUN"],
+        [("catalyst", "is a", "Ascorbic acid")],
+    ),
+]
+
+
+@pytest.fixture(scope="module")
+def hearst():
+    return Hearst("blank:en")
+
+
+@pytest.mark.parametrize("name,words,heads,deps,pos,expected", PARSES)
+def test_patterns(hearst, name, words, heads, deps, pos, expected):
+    doc = Doc(hearst.nlp.vocab, words=words, heads=heads, deps=deps, pos=pos)
+    assert hearst.extract(doc) == expected
+
+
+def test_select_patterns():
+    hearst = Hearst("blank:en", patterns=["is a"])
+    name, words, heads, deps, pos, _ = PARSES[0]
+    doc = Doc(hearst.nlp.vocab, words=words, heads=heads, deps=deps, pos=pos)
+    assert hearst.extract(doc) == []
+    # Only the triggers of the selected patterns are searched for
+    assert hearst.windows("Metals such as iron.") == []
+    assert hearst.windows("Iron is a metal.") == [(0, 16)]
+    # Triggers have to be whole words
+    assert hearst.windows("Iron is a.") == [(0, 10)]
+    assert (
+        hearst.windows(
+            "This approach improves the analysis and the synthesis. "
+            "We discuss this aspect. Results were good."
+        )
+        == []
+    )
+    with pytest.raises(ValueError):
+        Hearst("blank:en", patterns=["like"])
+
+
+def test_prefilter():
+    hearst = Hearst("blank:en", patterns=["such as"])
+    text = (
+        "Ascorbic acid is a redox catalyst. "
+        "It neutralizes reactive oxygen species such as hydrogen peroxide. "
+        "The rest is irrelevant. Still irrelevant. "
+        "Other acids such as citric acid are antioxidants too."
+    )
+    assert [text[start:end] for start, end in hearst.windows(text)] == [
+        "It neutralizes reactive oxygen species such as hydrogen peroxide.",
+        "Other acids such as citric acid are antioxidants too.",
+    ]
+    assert hearst.windows("A nonsuch as well as an asuch asset.") == []
+    # The Matcher ignores the case, so does the prefilter
+    assert hearst.windows("Metals, Such As iron.") == [(0, 21)]
+    assert hearst.windows("METALS SUCH AS IRON.") == [(0, 20)]
+    text = "İstanbul is big. Cities such as İzmir too."
+    assert [text[start:end] for start, end in hearst.windows(text)] == [
+        "Cities such as İzmir too."
+    ]
+    hearst.context = 1
+    assert hearst.windows(text) == [(0, len(text))]
+    # Texts without a trigger are not parsed at all
+    hearst.nlp = None
+    assert hearst.process("Nothing to see here. Move along.") == {"hearst": []}
+    assert list(hearst.process_batch(["Nothing.", "Still nothing."])) == [
+        {"hearst": []},
+        {"hearst": []},
+    ]
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 18:52:47 2026
+
+@author: tech
+"""
+from scicopia_tools.compile.hypernyms import HypernymGraph, normalize_term, save_graph
+from scicopia_tools.compile.utils import chunked
+
+
+def test_normalize_term():
+    assert normalize_term("Hydrogen  peroxide") == "hydrogen peroxide"
+    assert normalize_term(" \n") == ""
+
+
+def test_graph():
+    graph = HypernymGraph()
+    graph.add(
+        [
+            ["reactive oxygen species", "such as", "hydrogen peroxide"],
+            ["reactive oxygen species", "such as", "Hydrogen peroxide"],
+            ["reactive oxygen species", "such as", "superoxide"],
+        ]
+    )
+    graph.add(
+        [
+            ["Reactive oxygen species", "including", "hydrogen peroxide"],
+            ["acid", "such as", "Acid"],
+        ]
+    )
+    assert graph.terms == ["hydrogen peroxide", "reactive oxygen species", "superoxide"]
+    assert list(graph.counts) == [2, 2, 1]
+    assert len(graph) == 2
+    assert list(graph.vertices())[0] == {
+        "_key": "0",
+        "term": "hydrogen peroxide",
+        "count": 2,
+    }
+    assert list(graph.edges("terms")) == [
+        {
+            "_from": "terms/0",
+            "_to": "terms/1",
+            "weight": 2,
+            "patterns": ["such as", "including"],
+        },
+        {
+            "_from": "terms/2",
+            "_to": "terms/1",
+            "weight": 1,
+            "patterns": ["such as"],
+        },
+    ]
+    assert len(list(graph.edges("terms", min_weight=2))) == 1
+
+
+def test_chunked():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunked([], 2)) == []
+
+
+class FakeCollection:
+    def __init__(self):
+        self.documents = []
+        self.indexes = []
+
+    def bulkSave(self, documents):
+        self.documents.extend(documents)
+
+    def ensurePersistentIndex(self, fields, unique=False):
+        self.indexes.append((fields, unique))
+
+
+class FakeDatabase(dict):
+    def hasCollection(self, name):
+        return False
+
+    def createCollection(self, className, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+def test_save_graph():
+    graph = HypernymGraph()
+    graph.add([["acid", "such as", "citric acid"]])
+    database = FakeDatabase()
+    save_graph(database, graph, "terms", "hypernyms", batch_size=1)
+    assert len(database["terms"].documents) == 2
+    assert len(database["hypernyms"].documents) == 1
+    # Traversals start from a term
+    assert database["terms"].indexes == [(["term"], True)]
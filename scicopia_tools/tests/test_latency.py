@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:02:17 2026
+
+@author: tech
+"""
+from scicopia_tools.db.latency import LatencyTracker, bucket, section_size
+
+
+def test_bucket():
+    assert bucket(0.0005) == 0
+    assert bucket(0.001) == 0
+    assert bucket(0.0015) == 1
+    assert bucket(0.003) == 2
+    assert bucket(1.0) == 10
+
+
+def test_section_size():
+    assert section_size("Two tokens") == (10, 2)
+    assert section_size({"title": "A title", "year": 2021}) == (7, 2)
+
+
+def test_top_k():
+    tracker = LatencyTracker(k=3)
+    for i in range(10):
+        tracker.record("split", str(i), 100 * i, 10 * i, i / 10)
+    slowest = sorted(tracker.slowest["split"], reverse=True)
+    assert [entry.key for entry in slowest] == ["9", "8", "7"]
+    assert sum(tracker.histograms["split"].values()) == 10
+
+
+def test_merge_and_dump(tmp_path):
+    first = LatencyTracker(k=2)
+    first.record("tags", "a", 10, 2, 0.5)
+    second = LatencyTracker(k=2)
+    second.record("tags", "b", 20, 4, 2.0)
+    second.record("tags", "c", 30, 6, 0.1)
+    first.merge(second)
+    filename = str(tmp_path / "latency.json")
+    first.dump(filename)
+    loaded = LatencyTracker.load(filename, k=2)
+    assert [entry.key for entry in sorted(loaded.slowest["tags"], reverse=True)] == [
+        "b",
+        "a",
+    ]
+    assert loaded.histograms["tags"] == first.histograms["tags"]
+    assert "Slowest documents for tags" in loaded.report("tags")
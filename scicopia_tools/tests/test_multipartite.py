@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:05:37 2026
+
+@author: tech
+"""
+import json
+
+import pytest
+
+from scicopia_tools.analyzers.multipartite import multipartite_rank
+
+POS = {"NOUN", "PROPN", "ADJ"}
+
+REFERENCE = [
+    "Deep reinforcement learning has achieved remarkable results in games. "
+    "However, deep reinforcement learning agents need many samples. "
+    "We propose a sample-efficient policy optimization method for continuous control "
+    "and evaluate the method on standard continuous control benchmarks.",
+    "Nitrifying bacteria oxidize ammonia to nitrite and nitrite to nitrate. "
+    "Complete ammonia oxidizers were discovered in the genus Nitrospira. "
+    "Their ecological role in groundwater and soil environments is still unclear.",
+]
+
+
+def test_hand_tagged():
+    import spacy
+    from spacy.tokens import Doc
+
+    text = (
+        "Deep neural networks learn graph representations . "
+        "Graph neural networks process graph data . "
+        "The data comes from citation graphs ."
+    )
+    words = text.split()
+    tags = {
+        "Deep": "ADJ",
+        "neural": "ADJ",
+        "learn": "VERB",
+        "process": "VERB",
+        "comes": "VERB",
+        "The": "DET",
+        "from": "ADP",
+        ".": "PUNCT",
+    }
+    doc = Doc(
+        spacy.blank("en").vocab,
+        words=words,
+        pos=[tags.get(word, "NOUN") for word in words],
+        sent_starts=[i == 0 or words[i - 1] == "." for i in range(len(words))],
+    )
+    keyphrases = [key for key, _ in multipartite_rank(doc, POS, {"the", "."})]
+    assert keyphrases == [
+        "deep neural networks",
+        "graph representations",
+        "graph data",
+        "graph neural networks",
+        "data",
+        "citation graphs",
+    ]
+
+
+def test_parity_with_pke():
+    pytest.importorskip("en_core_web_sm")
+    pytest.importorskip("pke")
+    from scicopia_tools.analyzers.AutoTagger import AutoTagger
+
+    with open("scicopia_tools/tests/data/arxiv.json") as input:
+        corpus = REFERENCE + [json.load(input)["abstract"]]
+
+    native = AutoTagger("en_core_web_sm", engine="native")
+    reference = AutoTagger("en_core_web_sm", engine="pke")
+    for text in corpus:
+        assert native.process(text) == reference.process(text)
+
+
+@pytest.mark.parametrize("engine", ["native", "pke"])
+def test_batch_matches_process(engine):
+    pytest.importorskip("en_core_web_sm")
+    if engine == "pke":
+        pytest.importorskip("pke")
+    from scicopia_tools.analyzers.AutoTagger import AutoTagger
+
+    tagger = AutoTagger("en_core_web_sm", batch_size=2, engine=engine)
+    batched = list(tagger.process_batch(REFERENCE))
+    assert batched == [tagger.process(text) for text in REFERENCE]
+    assert all(result["tags"] for result in batched)
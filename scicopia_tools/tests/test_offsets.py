@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 20:03:31 2026
+
+@author: tech
+"""
+import json
+
+import pytest
+
+from scicopia_tools.analyzers.offsets import (
+    ENCODINGS,
+    decode_offsets,
+    encode_offsets,
+    from_varints,
+    to_varints,
+)
+
+# Single spaces, a line break followed by an indentation,
+# no gap at all and a first sentence not starting at 0
+OFFSETS = [(2, 56), (57, 75), (78, 118), (118, 139), (140, 200)]
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_roundtrip(encoding):
+    encoded = encode_offsets(OFFSETS, encoding)
+    # Has to survive the database
+    encoded = json.loads(json.dumps(encoded))
+    assert decode_offsets(encoded) == OFFSETS
+
+
+def test_delta():
+    assert encode_offsets(OFFSETS, "delta") == [2, 54, 18, ~3, 40, ~0, 21, 60]
+    assert decode_offsets([]) == []
+    assert decode_offsets(None) == []
+
+
+def test_varints():
+    values = [0, 1, -1, 63, -64, 64, 300, -300, 2 ** 40]
+    assert from_varints(to_varints(values)) == values
+    # Small numbers take one byte each
+    assert len(to_varints(list(range(60)))) == 80
+
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError):
+        encode_offsets(OFFSETS, "zip")
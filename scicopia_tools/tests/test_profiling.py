@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 12:20:51 2026
+
+@author: tech
+"""
+import pstats
+
+from scicopia_tools.db.profiling import BatchProfiler, merge_results
+
+
+def busy():
+    return sum(i * i for i in range(100000))
+
+
+def test_merged_cprofile(tmp_path):
+    results = []
+    for _ in range(2):
+        profiler = BatchProfiler(2, "cprofile")
+        for _ in range(3):
+            with profiler:
+                busy()
+        results.append(profiler.results())
+    prefix = str(tmp_path / "profile")
+    merge_results(results, "cprofile", prefix)
+    stats = pstats.Stats(f"{prefix}.pstats")
+    calls = [
+        value[1] for func, value in stats.stats.items() if func[2] == "busy"
+    ]
+    # Two workers, two profiled batches each
+    assert calls == [4]
+
+
+def test_folded_stacks(tmp_path):
+    profiler = BatchProfiler(1, "sample")
+    with profiler:
+        for _ in range(20):
+            busy()
+    prefix = str(tmp_path / "profile")
+    merge_results([profiler.results()], "sample", prefix)
+    with open(f"{prefix}.folded") as folded:
+        lines = folded.read().splitlines()
+    assert lines
+    assert any("test_profiling.py:busy" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
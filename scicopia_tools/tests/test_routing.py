@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 21:14:52 2026
+
+@author: tech
+"""
+from scicopia_tools.analyzers import Analyzer
+from scicopia_tools.compile.ngrams import filter_languages
+from scicopia_tools.db.parallel import analyze_routed
+from scicopia_tools.db.routing import (
+    LanguageRouter,
+    load_analyzers,
+    supported_languages,
+)
+
+ENGLISH = "Pack my box with five dozen liquor jugs."
+GERMAN = "Falsches Üben von Xylophonmusik quält jeden größeren Zwerg."
+FRENCH = "Portez ce vieux whisky au juge blond qui fume sur son île intérieure."
+
+
+class Model(Analyzer):
+    field = "model"
+    doc_section = "abstract"
+    languages = ("en",)
+
+    def __init__(self, model: str = "en_core_web_sm"):
+        self.model = model
+
+    def process(self, text):
+        return {Model.field: self.model}
+
+
+def test_supported_languages():
+    assert supported_languages(Analyzer) is None
+    assert supported_languages(Model, {"de": "de_core_news_sm"}) == ["de", "en"]
+
+
+def test_routing():
+    models = {"de": "de_core_news_sm"}
+    analyzer = Model()
+    analyzers = load_analyzers(analyzer, None, models)
+    router = LanguageRouter(supported_languages(Model, models))
+    docs = [
+        {"_key": "1", "doc_section": ENGLISH, "language": None},
+        {"_key": "2", "doc_section": GERMAN, "language": None},
+        {"_key": "3", "doc_section": FRENCH, "language": None},
+        {"_key": "4", "doc_section": FRENCH, "language": "en"},
+    ]
+    updates, _ = analyze_routed(analyzer, analyzers, router, "model", docs)
+    updates = {update["_key"]: update for update in updates}
+    assert updates["1"]["model"] == "en_core_web_sm"
+    assert updates["1"]["language"] == "en"
+    assert updates["2"]["model"] == "de_core_news_sm"
+    # Skipped, only the detected language is stored
+    assert "model" not in updates["3"]
+    assert updates["3"]["language"] == "fr"
+    # A stored language is trusted and not overwritten
+    assert updates["4"]["model"] == "en_core_web_sm"
+    assert "language" not in updates["4"]
+
+
+def test_filter_languages():
+    docs = [
+        {"abstract": ENGLISH, "language": None},
+        {"abstract": GERMAN, "language": None},
+        {"abstract": GERMAN, "language": "en"},
+        # Handed to the default analyzer by the routing as well
+        {"abstract": FRENCH, "language": "unk"},
+    ]
+    assert list(filter_languages(docs, ["en"])) == [ENGLISH, GERMAN, FRENCH]
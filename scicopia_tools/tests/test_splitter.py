@@ -30,3 +30,29 @@ def test_such_as():
     split = TextSplitter("en_core_web_sm")
     splits = split.process(doc["abstract"])
     assert result == splits["abstract_offsets"]
+
+
+def test_regex_backend():
+    split = TextSplitter(backend="regex")
+    text = (
+        "Growth of C. elegans was reduced (Smith et al. 2019, Fig. 2). "
+        "The effect, i.e. a loss of 20%, was strong!  Was it? Yes."
+    )
+    offsets = split.process(text)["abstract_offsets"]
+    assert [text[start:end] for start, end in offsets] == [
+        "Growth of C. elegans was reduced (Smith et al. 2019, Fig. 2).",
+        "The effect, i.e. a loss of 20%, was strong!",
+        "Was it?",
+        "Yes.",
+    ]
+
+
+def test_rule_based_backends():
+    with open("scicopia_tools/tests/data/arxiv.json") as input:
+        doc = json.load(input)
+    regex = TextSplitter(backend="regex").process(doc["abstract"])
+    sentencizer = next(
+        TextSplitter(backend="sentencizer").process_batch([doc["abstract"]])
+    )
+    assert regex == sentencizer
+    assert len(regex["abstract_offsets"]) == 10
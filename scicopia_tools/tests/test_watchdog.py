@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:12:44 2026
+
+@author: tech
+"""
+import time
+
+import pytest
+
+from scicopia_tools.analyzers import Analyzer
+from scicopia_tools.db import watchdog
+from scicopia_tools.db.parallel import analyze_docs
+from scicopia_tools.db.watchdog import Budget, Watchdog, timeout_field, truncate
+from scicopia_tools.exceptions import DocumentTimeout
+
+
+class Sleeper(Analyzer):
+    field = "sleep"
+    doc_section = "abstract"
+
+    def process(self, text):
+        if text == "slow":
+            while True:
+                pass
+        return {Sleeper.field: text}
+
+
+def test_truncate_short():
+    text = "Short enough."
+    assert truncate(text, 100) == text
+
+
+def test_truncate_sentence():
+    text = "First sentence. Second sentence. Third sentence."
+    assert truncate(text, 35) == "First sentence. Second sentence."
+
+
+def test_truncate_whitespace():
+    text = "A single sentence without any end in sight"
+    assert truncate(text, 20) == "A single sentence"
+
+
+def test_truncate_hard():
+    assert truncate("Supercalifragilistic", 5) == "Super"
+
+
+def test_watchdog_expires():
+    with pytest.raises(DocumentTimeout):
+        with Watchdog(0.05):
+            while True:
+                pass
+
+
+def test_watchdog_in_time():
+    with Watchdog(1):
+        result = sum(range(1000))
+    # The timer must not fire after the block has been left
+    time.sleep(0.05)
+    assert result == 499500
+
+
+def test_watchdog_other_exception(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        watchdog, "_raise_in_thread", lambda thread, exc: calls.append(exc)
+    )
+    dog = Watchdog(60)
+    with pytest.raises(ValueError):
+        with dog:
+            # The budget expires, but the analyzer raises
+            # before the timeout has been delivered
+            dog._expire()
+            raise ValueError("Analyzer failed")
+    # The pending timeout is cleared
+    assert calls == [DocumentTimeout, None]
+
+
+def test_timeout_marker():
+    docs = [
+        {"_key": "1", "doc_section": "slow"},
+        {"_key": "2", "doc_section": "fast"},
+    ]
+    updates, outliers = analyze_docs(Sleeper(), "sleep", docs, Budget(0.05, None))
+    assert [outlier["_key"] for outlier in outliers] == ["1"]
+    # The marker keeps the document from being selected again and again
+    assert updates[0]["_key"] == "1"
+    assert updates[0][timeout_field("sleep")] == 0.05
+    assert "sleep" not in updates[0]
+    assert (updates[1]["_key"], updates[1]["sleep"]) == ("2", "fast")